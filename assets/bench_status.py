@@ -0,0 +1,49 @@
+"""
+Benchmarks for finding the current status of assets
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test assets --pattern="bench_*.py"
+"""
+
+import timeit
+from datetime import timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.test import TestCase
+from django.utils import timezone
+
+from smm.tests import SMMTestUsers
+
+from .models import Asset, AssetStatus, AssetStatusValue
+from .tests import AssetsHelpers
+
+
+class BenchAssetStatus(TestCase):
+    """ Compare finding the current status of 100 assets, each with 1000 statuses """
+    def setUp(self):
+        self.smm = SMMTestUsers()
+        asset_type = AssetsHelpers(self.smm).create_asset_type()
+        values = [AssetStatusValue.objects.create(name=f'value{i}') for i in range(5)]
+        self.assets = Asset.objects.bulk_create([Asset(name=f'asset{i}', asset_type=asset_type, owner=self.smm.user1) for i in range(100)])
+        start = timezone.now() - timedelta(days=30)
+        AssetStatus.objects.bulk_create([
+            AssetStatus(asset=asset, status=values[i % len(values)], since=start + timedelta(minutes=i))
+            for asset in self.assets for i in range(1000)
+        ])
+        # Bulk creates don't update the current status
+        latest = AssetStatus.objects.filter(asset=OuterRef('pk')).order_by('-since', '-pk').values('pk')[:1]
+        Asset.objects.update(current_status=Subquery(latest))
+
+    def test_current_status(self):
+        """ The latest status of each asset (by looking through its statuses), or the status each asset points at """
+        def latest():
+            return [str(AssetStatus.objects.filter(asset=asset).latest('since').status) for asset in Asset.objects.order_by('pk')]
+
+        def current():
+            return [str(asset.current_status.status) for asset in Asset.objects.select_related('current_status__status').order_by('pk')]
+
+        self.assertEqual(latest(), current())
+        print()
+        for name, find in (('latest', latest), ('current_status', current)):
+            best = min(timeit.repeat(find, number=1, repeat=5))
+            print(f"100 assets with 1000 statuses, {name}: {best * 1000:.1f} ms")
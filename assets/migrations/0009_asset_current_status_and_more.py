@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def forward_func(apps, schema_editor):
+    # Point each asset at its most recent status
+    Asset = apps.get_model('assets', 'asset')
+    AssetStatus = apps.get_model('assets', 'assetstatus')
+    latest = AssetStatus.objects.filter(asset=OuterRef('pk')).order_by('-since', '-pk').values('pk')[:1]
+    Asset.objects.update(current_status=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0008_remove_assetcommand_acknowledged_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='current_status',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_for', to='assets.assetstatus'),
+        ),
+        migrations.AddIndex(
+            model_name='assetstatus',
+            index=models.Index(fields=['asset', '-since'], name='assets_asse_asset_i_abd38a_idx'),
+        ),
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0009_asset_current_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assetcommand',
+            index=models.Index(fields=['asset', '-issued'], name='assets_asse_asset_i_3d6bf0_idx'),
+        ),
+    ]
@@ -8,8 +8,12 @@ Assets are things that can do searches
 - etc
 """
 
+from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from icons.models import Icon
@@ -55,14 +59,16 @@ class Asset(models.Model):
     owner = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True, blank=True)
     asset_type = models.ForeignKey(AssetType, on_delete=models.PROTECT)
     icon = models.ForeignKey(Icon, on_delete=models.SET_NULL, null=True, blank=True)
+    # The most recent AssetStatus (kept up to date by AssetStatus.save)
+    current_status = models.ForeignKey('AssetStatus', on_delete=models.SET_NULL, null=True, blank=True, related_name='current_for')
 
     def icon_url(self):
         """
         Return the icon url for this asset
         """
-        if self.icon is not None:
+        if self.icon_id is not None:
             return self.icon.get_url()
-        if self.asset_type.icon is not None:
+        if self.asset_type.icon_id is not None:
             return self.asset_type.icon.get_url()
         return None
 
@@ -77,7 +83,7 @@ class Asset(models.Model):
             'type_name': self.asset_type.name,
             'owner': str(self.owner)
         }
-        if status := AssetStatus.current_for_asset(self):
+        if status := self.current_status:
             data['status'] = str(status.status)
             data['status_inop'] = status.status.inop
             data['status_since'] = status.since
@@ -140,12 +146,18 @@ class AssetCommand(models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        AssetCommand.forget_last_command(self.asset_id)
         if self.mission is not None:
             if self.responded_at is not None:
                 timeline_record_asset_command_response(self.mission, self.responded_by, self.asset, self.get_command_display(), self.response_type, self.response_message)
             else:
                 timeline_record_asset_command_sent(self.mission, self.issued_by, self.asset, self.get_command_display(), self.reason, self.position)
 
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        AssetCommand.forget_last_command(self.asset_id)
+        return result
+
     def __str__(self):
         return f"Command {self.asset} to {self.get_command_display()}"
 
@@ -155,15 +167,47 @@ class AssetCommand(models.Model):
         Find the current command that applies to an asset
         """
         try:
-            return AssetCommand.objects.filter(asset=asset).order_by('-issued')[0]
+            return AssetCommand.objects.filter(asset=asset).select_related('issued_by', 'responded_by').order_by('-issued')[0]
         except IndexError:
             return None
 
+    @staticmethod
+    def _last_command_cache_key(asset_id):
+        """
+        The cache key of the last command for an asset
+        """
+        return f'assets:last_command:{asset_id}'
+
+    @staticmethod
+    def forget_last_command(asset_id):
+        """
+        Remove the cached last command for an asset (because it has changed)
+        """
+        key = AssetCommand._last_command_cache_key(asset_id)
+        cache.delete(key)
+        # Again once the change can be seen, in case it was cached (as it was before) in the meantime
+        transaction.on_commit(lambda: cache.delete(key))
+
     @staticmethod
     def last_command_for_asset_to_json(asset):
         """
         Find the current command that applies to an asset
         Return in the a structure for json
+
+        This is asked for with every position an asset reports, so it's cached
+        (for settings.ASSET_COMMAND_CACHE_TIMEOUT seconds) until a command for the asset is saved
+        """
+        key = AssetCommand._last_command_cache_key(asset.pk)
+        last_command = cache.get(key)
+        if last_command is None:
+            last_command = AssetCommand._last_command_for_asset_to_json(asset)
+            cache.add(key, last_command, getattr(settings, 'ASSET_COMMAND_CACHE_TIMEOUT', 5))
+        return last_command
+
+    @staticmethod
+    def _last_command_for_asset_to_json(asset):
+        """
+        Find the current command that applies to an asset (without the cache)
         """
         last_command = {}
         if asset_command := AssetCommand.last_command_for_asset(asset):
@@ -186,6 +230,11 @@ class AssetCommand(models.Model):
                 last_command['longitude'] = asset_command.position.x
         return last_command
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['asset', '-issued']),
+        ]
+
 
 class AssetStatusValue(models.Model):
     """
@@ -245,18 +294,25 @@ class AssetStatus(models.Model):
     def __str__(self):
         return f'{self.asset.name} is {self.status.name}'
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Only replace the current status with a newer one (another status may have been set at the same time)
+            updated = Asset.objects.filter(pk=self.asset_id).filter(Q(current_status__isnull=True) | Q(current_status__since__lte=self.since)) \
+                .update(current_status=self)
+        if updated and AssetStatus.asset.is_cached(self):
+            self.asset.current_status = self
+
     @classmethod
     def current_for_asset(cls, asset):
         """
         Get the most recent status for an asset
         """
-        try:
-            return cls.objects.filter(asset=asset).latest('since')
-        except cls.DoesNotExist:
-            return None
+        return cls.objects.filter(current_for=asset).select_related('status').first()
 
     class Meta:
         indexes = [
             models.Index(fields=['asset']),
             models.Index(fields=['since']),
+            models.Index(fields=['asset', '-since']),
         ]
@@ -45,6 +45,20 @@ class AssetCommandTestCase(TestCase):
         command = AssetCommand.last_command_for_asset(asset=pccr)
         self.assertEqual(str(command), "Command PCCR to Circle")
 
+    def test_asset_get_latest_cached(self):
+        """
+        Check the latest command (as json) is cached until a command is saved for the asset
+        """
+        pccr = Asset.objects.get(name='PCCR')
+        self.assertEqual(AssetCommand.last_command_for_asset_to_json(pccr)['action'], 'RON')
+        with self.assertNumQueries(0):
+            self.assertEqual(AssetCommand.last_command_for_asset_to_json(pccr)['action'], 'RON')
+        command = AssetCommand.objects.create(asset=pccr, issued_by=self.user, command='CIR', reason='test2')
+        self.assertEqual(AssetCommand.last_command_for_asset_to_json(pccr)['action'], 'CIR')
+        command.response_type = 'ACK'
+        command.save()
+        self.assertEqual(AssetCommand.last_command_for_asset_to_json(pccr)['response']['type'], 'ACK')
+
 
 class AssetCommandWebTestCase(TestCase):
     """
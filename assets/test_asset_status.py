@@ -2,9 +2,13 @@
 Tests for asset status
 """
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from icons.models import Icon
 from smm.tests import SMMTestUsers
 
-from .models import AssetStatus
+from .models import Asset, AssetStatus
 from .tests import AssetsHelpers
 from .test_asset_status_value import AssetStatusValueBase
 
@@ -86,6 +90,18 @@ class AssetStatusTestCase(AssetStatusBase):
         status_asset1 = AssetStatus.current_for_asset(asset=self.asset1)
         self.assertEqual(status2.pk, status_asset1.pk)
 
+    def test_0013_check_current_status(self):
+        """
+        Check that the asset points at its latest status, even when an older one is added later
+        """
+        status1 = self.create_asset_status(asset=self.asset1, status=self.status_value1)
+        status2 = self.create_asset_status(asset=self.asset1, status=self.status_inop)
+        self.assertEqual(Asset.objects.get(pk=self.asset1.pk).current_status, status2)
+        AssetStatus.objects.create(asset=self.asset1, status=self.status_value1, since=status1.since)
+        self.assertEqual(Asset.objects.get(pk=self.asset1.pk).current_status, status2)
+        self.assertEqual(AssetStatus.current_for_asset(self.asset1), status2)
+        self.assertIsNone(AssetStatus.current_for_asset(self.asset2))
+
     def test_0100_check_asset_has_status(self):
         """
         Check that an asset reports its status when there is one set
@@ -248,3 +264,39 @@ class AssetStatusUrlTestCase(AssetStatusBase):
         """
         response = self.smm.client1.put(f'/assets/{self.asset1.pk}/status/', data={})
         self.assertEqual(response.status_code, 405)
+
+
+class AssetListQueriesTestCase(AssetStatusBase):
+    """
+    Check listing assets doesn't query for each asset
+    """
+    def list_queries(self):
+        """
+        The number of queries to list user1's assets
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.smm.client1.get('/assets/', HTTP_ACCEPT='application/json')
+        return len(queries), response.json()['assets']
+
+    def test_0001_asset_list_queries(self):
+        """
+        Check the queries don't change with 100 assets (with icons and status histories)
+        """
+        icon = Icon.objects.create(name='boat', filename='boat.png')
+        self.asset_type.icon = icon
+        self.asset_type.save()
+        self.create_asset_status(asset=self.asset1, status=self.status_value1)
+        queries, assets = self.list_queries()
+        self.assertEqual(len(assets), 1)
+
+        assets = Asset.objects.bulk_create([
+            Asset(name=f'asset-{i}', asset_type=self.asset_type, owner=self.smm.user1, icon=icon if i % 2 else None)
+            for i in range(99)
+        ])
+        for asset in assets:
+            self.create_asset_status(asset=asset, status=self.status_value1)
+            self.create_asset_status(asset=asset, status=self.status_inop)
+        self.assertEqual(self.list_queries()[0], queries)
+        assets = self.list_queries()[1]
+        self.assertEqual(len(assets), 100)
+        self.assertTrue(all(asset['icon_url'] == icon.get_url() for asset in assets))
@@ -133,15 +133,16 @@ class AssetsView(View):
         """
         Return all this users assets as json
         """
-        assets = list(Asset.objects.filter(owner=request.user))
+        assets = list(Asset.objects.filter(owner=request.user).select_related('owner', 'icon', 'asset_type__icon', 'current_status__status'))
         if request.GET.get('all', False):
             org_members = OrganizationMember.objects.filter(user=request.user, role__in=['A', 'R', 'b'], removed__isnull=True)
-            for org_member in org_members:
-                org_assets = OrganizationAsset.objects.filter(organization=org_member.organization, removed__isnull=True)
-                for org_asset in org_assets:
-                    found = any(a.pk == org_asset.asset.pk for a in assets)
-                    if not found:
-                        assets.append(org_asset.asset)
+            org_assets = OrganizationAsset.objects.filter(organization__in=org_members.values('organization'), removed__isnull=True) \
+                .select_related('asset__owner', 'asset__icon', 'asset__asset_type__icon', 'asset__current_status__status').order_by('pk')
+            found = {a.pk for a in assets}
+            for org_asset in org_assets:
+                if org_asset.asset.pk not in found:
+                    found.add(org_asset.asset.pk)
+                    assets.append(org_asset.asset)
         return JsonResponse({'assets': [a.as_object() for a in assets]})
 
     def get(self, request):
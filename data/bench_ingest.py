@@ -0,0 +1,60 @@
+"""
+Benchmarks for listening for asset positions (see the listen_positions command)
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test data --pattern="bench_*.py"
+"""
+
+import io
+import socketserver
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from assets.models import Asset, AssetType
+from mission.models import Mission, MissionAsset, MissionUser
+from .ingest import position_writer
+from .management.commands.listen_positions import Listener, UDPHandler
+from .models import AssetPointTime
+
+
+class BenchListenPositions(TransactionTestCase):
+    """ How many positions a second are recorded from generate_positions """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test', password='password')
+        mission = Mission.objects.create(creator=self.user)
+        MissionUser(mission=mission, user=self.user, permissions_admin=True, creator=self.user).save()
+        asset_type = AssetType.objects.create(name='boat')
+        self.assets = [Asset.objects.create(name=f'boat{i}', asset_type=asset_type, owner=self.user) for i in range(10)]
+        for asset in self.assets:
+            MissionAsset.objects.create(mission=mission, asset=asset, creator=self.user)
+
+    def listen(self, rate, duration=10):
+        """ Send positions at rate for duration seconds, and return how many were written each second """
+        listener = Listener(self.user)
+        # Look up the missions here, so the server thread doesn't leave a database connection open
+        for asset in self.assets:
+            listener.missions.mission_id(asset.pk)
+        server = socketserver.UDPServer(('127.0.0.1', 0), UDPHandler)
+        server.listener = listener
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        start = AssetPointTime.objects.count()
+        before = position_writer().metrics()
+        call_command('generate_positions', *[str(asset.pk) for asset in self.assets], '--port', str(server.server_address[1]),
+                     '--rate', str(rate), '--duration', str(duration), stdout=io.StringIO())
+        server.shutdown()
+        server.server_close()
+        # Wait for what has been queued to be written
+        position_writer().stop()
+        written = AssetPointTime.objects.count() - start
+        metrics = {name: value - before[name] for name, value in position_writer().metrics().items()}
+        print(f"{rate} positions/s sent: {written / duration:.0f}/s written, {metrics['rejected']} rejected, {metrics['failed']} failed, "
+              f"{listener.ignored} ignored, {metrics['batches']} batches ({metrics['write_seconds']:.1f}s writing)")
+
+    def test_listen(self):
+        """ 10 assets, sending 5000 positions/s then more """
+        print()
+        for rate in (5000, 10000, 20000):
+            self.listen(rate)
@@ -0,0 +1,48 @@
+"""
+Benchmarks for assets reporting their position
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test data --pattern="bench_*.py"
+"""
+
+import time
+
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from assets.models import Asset, AssetCommand, AssetType
+from mission.models import MissionAsset
+from .tests import UserDataTestCase
+
+
+class BenchPositionReport(UserDataTestCase):
+    """ Compare reporting positions with and without the last command cached """
+    def setUp(self):
+        super().setUp()
+        asset_type = AssetType.objects.create(name='boat')
+        self.asset = Asset.objects.create(name='boat1', asset_type=asset_type, owner=self.user)
+        MissionAsset.objects.create(mission=self.mission, asset=self.asset, creator=self.user)
+        AssetCommand.objects.create(asset=self.asset, issued_by=self.user, command='RON', reason='Added to mission', mission=self.mission)
+        self.client = Client()
+        self.client.login(username='test', password='password')
+
+    def report(self, count):
+        """ Report count positions, and return the time taken and queries for each """
+        url = f'/data/assets/{self.asset.pk}/position/add/'
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for i in range(count):
+                response = self.client.post(url, {'lat': -43.5 + i * 0.0001, 'lon': 172.5, 'fix': 3, 'heading': 90})
+            taken = time.perf_counter() - start
+        self.assertEqual(response.json()['action'], 'RON')
+        return taken, len(queries) / count
+
+    def test_report(self):
+        """ 1000 position reports """
+        print()
+        for name, backend in (('no cache', 'django.core.cache.backends.dummy.DummyCache'),
+                              ('last command cached', 'django.core.cache.backends.locmem.LocMemCache')):
+            with override_settings(CACHES={'default': {'BACKEND': backend}}):
+                taken, queries = self.report(1000)
+            print(f"1000 position reports, {name}: {1000 / taken:.0f} reports/s, {queries:.1f} queries each")
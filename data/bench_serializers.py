@@ -0,0 +1,76 @@
+"""
+Benchmarks for the size of the map data sent to clients
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test data --pattern="bench_*.py"
+"""
+
+import gzip
+import timeit
+import unittest
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from assets.models import Asset, AssetType
+from mission.models import Mission
+from search.models import Search
+from search.patterns.library import TrackCreepingLinePattern
+from search.polygon.convex import linestring_from_points
+from .models import AssetPointTime, GeoTimeLabel
+from .serializers import GeoJSONSerializer, TopoJSONSerializer
+
+
+class BenchSerializers(unittest.TestCase):
+    """ Compare the size of a mission's searches and an asset track in each format """
+    def setUp(self):
+        self.user = get_user_model()(pk=1, username='test')
+        self.mission = Mission(pk=1, creator=self.user)
+        asset_type = AssetType(pk=1, name='boat')
+        datum = GeoTimeLabel(pk=1)
+        rng = np.random.default_rng(1234)
+        self.searches = []
+        # 50 creeping line searches, along 5km lines around a point
+        for i in range(50):
+            start = np.array([172.5, -43.5]) + rng.uniform(-0.5, 0.5, 2)
+            line = np.array([start, start + rng.uniform(-0.05, 0.05, 2)])
+            geo = linestring_from_points(TrackCreepingLinePattern(50, width=500).points(line), srid=4326)
+            search = Search(pk=i + 1, geo=geo, created_by=self.user, mission=self.mission, created_for=asset_type,
+                            datum=datum, sweep_width=50, width=500, search_type='Creeping Line')
+            search.start_point = Point(geo[0], srid=4326)
+            search.end_point = Point(geo[-1], srid=4326)
+            self.searches.append(search)
+        # A track reported every second for an hour
+        asset = Asset(pk=1, name='boat1', asset_type=asset_type, owner=self.user)
+        steps = np.cumsum(rng.normal(0, 0.0002, (3600, 2)), axis=0) + (172.5, -43.5)
+        now = timezone.now()
+        self.track = [AssetPointTime(pk=i + 1, geo=Point(*steps[i], srid=4326), asset=asset, created_by=self.user, mission=self.mission,
+                                     created_at=now + timedelta(seconds=i), heading=90, fix=3) for i in range(len(steps))]
+
+    def bench(self, name, objecttype, objects):
+        """ Print the size (raw and gzipped) and time taken for each format """
+        print()
+        formats = (
+            ('GeoJSON (full precision)', GeoJSONSerializer, None),
+            ('GeoJSON (6 decimal places)', GeoJSONSerializer, 6),
+            ('GeoJSON (5 decimal places)', GeoJSONSerializer, 5),
+            ('TopoJSON (6 decimal places)', TopoJSONSerializer, 6),
+        )
+        for description, serializer, precision in formats:
+            def serialize(serializer=serializer, precision=precision):
+                return serializer().serialize(objects, geometry_field=objecttype.GEOFIELD, fields=objecttype.GEOJSON_FIELDS,
+                                              use_natural_foreign_keys=True, precision=precision)
+            data = serialize().encode()
+            best = min(timeit.repeat(serialize, number=1, repeat=3))
+            print(f"{name}, {description}: {len(data) / 1024:.0f} KiB ({len(gzip.compress(data)) / 1024:.0f} KiB gzipped) in {best * 1000:.0f} ms")
+
+    def test_searches(self):
+        """ 50 creeping line searches """
+        self.bench("50 searches", Search, self.searches)
+
+    def test_track(self):
+        """ An hour long track """
+        self.bench("3600 point track", AssetPointTime, self.track)
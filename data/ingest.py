@@ -0,0 +1,178 @@
+"""
+Batched writing of asset positions
+
+Positions reported by assets are most of what is written to the
+database. With settings.POSITION_INGEST_BATCHED, positions (from
+asset_record_position and the listen_positions command) are put in a
+queue instead of being saved one at a time, and a writer thread adds
+them to the database together (one multi-row insert) every
+POSITION_INGEST_INTERVAL seconds, or as soon as POSITION_INGEST_BATCH
+of them are waiting.
+
+The queue holds at most POSITION_INGEST_MAX_QUEUED positions, when the
+database can't keep up submit() waits a little for space then raises
+IngestFull, so the sender can try again later (rather than the queue
+growing until the process runs out of memory).
+
+Queued positions are written when the process exits normally, but are
+lost if it is killed.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from tiles.cache import invalidate_tracks
+from .models import AssetPointTime
+
+# Tells the writer thread to stop (once everything before it is written)
+_STOP = object()
+
+
+class IngestFull(Exception):
+    """
+    The queue of positions to write is full
+    """
+
+
+def write_positions(positions):
+    """
+    Add positions to the database
+    """
+    AssetPointTime.objects.bulk_create(positions)
+    # Bulk creates don't send the signals that tiles are invalidated by
+    for mission_id in {position.mission_id for position in positions}:
+        invalidate_tracks(mission_id)
+
+
+class PositionWriter:
+    """
+    A queue of positions, written in batches by a thread
+    """
+    def __init__(self, batch_size=500, interval=0.05, max_queued=10000, write=write_positions):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.write = write
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stats = {'submitted': 0, 'written': 0, 'failed': 0, 'rejected': 0, 'batches': 0, 'write_seconds': 0.0}
+
+    def start(self):
+        """
+        Start the writer thread (if it isn't running)
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='position-writer', daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Write everything that's been queued, and stop the writer thread
+        """
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread is not None and thread.is_alive():
+            self.queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, position, timeout=0.5):
+        """
+        Queue a position (an unsaved AssetPointTime) to be written
+        Raises IngestFull if there's no space for it within timeout seconds
+        """
+        self.start()
+        try:
+            self.queue.put(position, timeout=timeout)
+        except queue.Full as error:
+            self._count('rejected', 1)
+            raise IngestFull("Too many positions waiting to be written") from error
+        self._count('submitted', 1)
+
+    def metrics(self):
+        """
+        Counts of positions submitted/written/failed (lost to an error writing them)/rejected (queue full),
+        the number of batches, time spent writing them, and how many positions are waiting
+        """
+        with self.lock:
+            metrics = dict(self.stats)
+        metrics['queued'] = self.queue.qsize()
+        return metrics
+
+    def _count(self, name, value):
+        with self.lock:
+            self.stats[name] += value
+
+    def _next_batch(self):
+        """
+        Wait for a position, then collect positions for up to interval seconds (or until there's a full batch)
+        Returns the batch, and whether the writer should stop after it
+        """
+        first = self.queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            try:
+                position = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if position is _STOP:
+                return batch, True
+            batch.append(position)
+        return batch, False
+
+    def _run(self):
+        try:
+            stop = False
+            while not stop:
+                batch, stop = self._next_batch()
+                if not batch:
+                    continue
+                start = time.monotonic()
+                try:
+                    self.write(batch)
+                    self._count('written', len(batch))
+                except Exception:  # pylint: disable=W0718
+                    # Keep going (with a new database connection), the positions are lost
+                    self._count('failed', len(batch))
+                    connection.close()
+                self._count('batches', 1)
+                self._count('write_seconds', time.monotonic() - start)
+        finally:
+            connection.close()
+
+
+_writer = None  # pylint: disable=C0103
+_writer_lock = threading.Lock()
+
+
+def position_writer():
+    """
+    The position writer for this process
+    """
+    global _writer  # pylint: disable=W0603
+    with _writer_lock:
+        if _writer is None:
+            _writer = PositionWriter(batch_size=getattr(settings, 'POSITION_INGEST_BATCH', 500),
+                                     interval=getattr(settings, 'POSITION_INGEST_INTERVAL', 0.05),
+                                     max_queued=getattr(settings, 'POSITION_INGEST_MAX_QUEUED', 10000))
+            atexit.register(_writer.stop, 10)
+        return _writer
+
+
+def record_position(position):
+    """
+    Save a position (an unsaved AssetPointTime), or queue it to be written with others (settings.POSITION_INGEST_BATCHED)
+    Raises IngestFull if it can't be queued
+    """
+    if getattr(settings, 'POSITION_INGEST_BATCHED', False):
+        position_writer().submit(position)
+    else:
+        position.save()
@@ -0,0 +1,56 @@
+"""
+Send made up positions for assets to listen_positions, to see how many it can record
+
+Each asset moves around a random walk from a starting point, the positions
+are sent as RMC sentences over UDP, several to a datagram.
+"""
+import random
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from data.nmea import make_rmc
+
+# Lines to send in each datagram (so they stay well under a typical MTU)
+LINES_PER_DATAGRAM = 20
+
+
+class Command(BaseCommand):
+    """
+    Generate positions for assets
+    """
+    help = 'Send made up asset positions to listen_positions over UDP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assets', type=int, nargs='+', help='Ids of the assets (in a mission) to send positions for')
+        parser.add_argument('--host', default='127.0.0.1', help='Address listen_positions is on')
+        parser.add_argument('--port', type=int, required=True, help='UDP port listen_positions is on')
+        parser.add_argument('--rate', type=int, default=5000, help='Positions per second to send')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to send for')
+        parser.add_argument('--latitude', type=float, default=-43.5, help='Where the assets start')
+        parser.add_argument('--longitude', type=float, default=172.5, help='Where the assets start')
+
+    def handle(self, *args, **options):
+        rng = random.Random(1234)
+        positions = {asset_id: [options['latitude'], options['longitude']] for asset_id in options['assets']}
+        assets = list(positions)
+        sent = 0
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            start = time.monotonic()
+            while time.monotonic() - start < options['duration']:
+                lines = []
+                for i in range(LINES_PER_DATAGRAM):
+                    asset_id = assets[(sent + i) % len(assets)]
+                    position = positions[asset_id]
+                    position[0] += rng.uniform(-0.0001, 0.0001)
+                    position[1] += rng.uniform(-0.0001, 0.0001)
+                    lines.append(f'{asset_id},{make_rmc(position[0], position[1], rng.uniform(0, 359))}')
+                sender.sendto('\n'.join(lines).encode('ascii'), (options['host'], options['port']))
+                sent += len(lines)
+                # Keep to the rate
+                delay = start + sent / options['rate'] - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            taken = time.monotonic() - start
+        self.stdout.write(f"Sent {sent} positions in {taken:.1f}s ({sent / taken:.0f}/s) for {len(assets)} assets")
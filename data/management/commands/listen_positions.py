@@ -0,0 +1,185 @@
+"""
+Listen for asset positions sent as NMEA sentences, over UDP and/or TCP
+
+Each line (a UDP datagram can have several) is the id of an asset then
+an RMC or GGA sentence (see data.nmea), i.e.
+    12,$GPRMC,013012,A,4330.0000,S,17215.0000,E,0.0,90.0,010125,,*3B
+
+Positions are recorded as the given user (who must be allowed to record
+positions for each asset), for assets that are in a mission, and are
+written in batches (see data.ingest).
+
+Reading the lines takes about 60us a position (mostly making the
+AssetPointTime), so one process can read roughly 8000 positions a second
+(on one core, shared with generate_positions) before UDP datagrams are
+dropped. See data/bench_ingest.py for the rate they are written at.
+"""
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from assets.models import Asset
+from mission.decorators import mission_asset_get
+from organization.helpers import organization_user_is_asset_recorder
+from data.ingest import IngestFull, position_writer
+from data.models import AssetPointTime
+from data.nmea import parse_nmea
+
+
+class AssetMissions:
+    """
+    The mission each asset is in, remembered for a while (assets rarely change missions)
+    """
+    def __init__(self, user, remember=30):
+        self.user = user
+        self.remember = remember
+        self.missions = {}
+        self.lock = threading.Lock()
+
+    def mission_id(self, asset_id):
+        """
+        The mission the asset is in, or None if it isn't in one (or can't be recorded by the user)
+        """
+        with self.lock:
+            mission_id, expires = self.missions.get(asset_id, (None, 0))
+        if expires > time.monotonic():
+            return mission_id
+        mission_id = None
+        asset = Asset.objects.filter(pk=asset_id).first()
+        if asset is not None and (asset.owner_id == self.user.pk or organization_user_is_asset_recorder(self.user, asset)):
+            mission_asset = mission_asset_get(asset)
+            mission_id = mission_asset.mission_id if mission_asset is not None else None
+        with self.lock:
+            self.missions[asset_id] = (mission_id, time.monotonic() + self.remember)
+        return mission_id
+
+
+class Listener:
+    """
+    Turn lines into positions, and queue them to be written
+    """
+    def __init__(self, user):
+        self.user = user
+        self.missions = AssetMissions(user)
+        self.writer = position_writer()
+        self.ignored = 0
+        self.lock = threading.Lock()
+
+    def line(self, line):
+        """
+        Record the position in a line (asset id,NMEA sentence)
+        """
+        asset_id, _, sentence = line.strip().partition(',')
+        position = parse_nmea(sentence)
+        mission_id = self.missions.mission_id(int(asset_id)) if position is not None and asset_id.isdigit() else None
+        if mission_id is None:
+            # Lines come from a thread for each TCP connection
+            with self.lock:
+                self.ignored += 1
+            return
+        try:
+            self.writer.submit(AssetPointTime(asset_id=int(asset_id), geo=Point(position['longitude'], position['latitude']), alt=position['altitude'],
+                                              heading=position['heading'], created_by=self.user, mission_id=mission_id))
+        except IngestFull:
+            # Counted by the writer
+            pass
+
+
+class UDPHandler(socketserver.BaseRequestHandler):
+    """
+    A datagram of one or more lines
+    """
+    def handle(self):
+        for line in self.request[0].decode('ascii', 'replace').splitlines():
+            if line.strip():
+                self.server.listener.line(line)
+
+
+class TCPHandler(socketserver.StreamRequestHandler):
+    """
+    A connection sending lines
+    """
+    def handle(self):
+        try:
+            for line in self.rfile:
+                if line.strip():
+                    self.server.listener.line(line.decode('ascii', 'replace'))
+        finally:
+            # Each connection is handled in its own thread, with its own database connection
+            connection.close()
+
+
+class Command(BaseCommand):
+    """
+    Listen for asset positions
+    """
+    help = 'Listen for asset positions (asset id,NMEA sentence lines) over UDP and/or TCP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User to record the positions as')
+        parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+        parser.add_argument('--udp', type=int, help='UDP port to listen on')
+        parser.add_argument('--tcp', type=int, help='TCP port to listen on')
+        parser.add_argument('--report', type=float, default=10, help='Seconds between printing how many positions have been written')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist as error:
+            raise CommandError(f"Unknown user {options['username']}") from error
+        if options['udp'] is None and options['tcp'] is None:
+            raise CommandError("Give a --udp and/or --tcp port to listen on")
+
+        listener = Listener(user)
+        servers = []
+        if options['udp'] is not None:
+            servers.append(socketserver.UDPServer((options['host'], options['udp']), UDPHandler))
+            self.stdout.write(f"Listening on UDP {options['host']}:{options['udp']}")
+        if options['tcp'] is not None:
+            servers.append(socketserver.ThreadingTCPServer((options['host'], options['tcp']), TCPHandler))
+            self.stdout.write(f"Listening on TCP {options['host']}:{options['tcp']}")
+        for server in servers:
+            server.listener = listener
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # Stop (writing what has been queued) when killed
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        try:
+            self.report(listener, options['report'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+            listener.writer.stop()
+            self.stdout.write(self.metrics(listener))
+
+    def report(self, listener, interval):
+        """
+        Print what has been written every interval seconds (forever)
+        """
+        last = listener.writer.metrics()
+        while True:
+            time.sleep(interval)
+            metrics = listener.writer.metrics()
+            rate = (metrics['written'] - last['written']) / interval
+            self.stdout.write(f"{rate:.0f} positions/s, {self.metrics(listener)}")
+            last = metrics
+
+    @staticmethod
+    def metrics(listener):
+        """
+        The writer's metrics, and how many lines were ignored
+        """
+        metrics = listener.writer.metrics()
+        return (f"written {metrics['written']} in {metrics['batches']} batches ({metrics['write_seconds']:.1f}s writing), "
+                f"queued {metrics['queued']}, rejected {metrics['rejected']}, failed {metrics['failed']}, ignored {listener.ignored}")
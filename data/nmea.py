@@ -0,0 +1,89 @@
+"""
+Read positions from NMEA 0183 sentences (as sent by GPS receivers)
+
+Only the sentences with a position are understood:
+- RMC (recommended minimum): position, and course (heading)
+- GGA (fix data): position, and altitude
+"""
+from functools import reduce
+
+
+def _checksum(body):
+    """
+    The checksum of the body of a sentence (between the $ and *)
+    """
+    return reduce(lambda value, char: value ^ ord(char), body, 0)
+
+
+def _checksum_ok(sentence):
+    """
+    Check the checksum (*XX at the end) of a sentence, if it has one
+    """
+    body, _, checksum = sentence.partition('*')
+    if not checksum:
+        return True
+    try:
+        expected = int(checksum[:2], 16)
+    except ValueError:
+        return False
+    return _checksum(body) == expected
+
+
+def _coordinate(value, hemisphere, negative):
+    """
+    Convert (d)ddmm.mmmm and N/S/E/W to decimal degrees
+    """
+    degrees, minutes = divmod(float(value), 100)
+    degrees += minutes / 60
+    return -degrees if hemisphere == negative else degrees
+
+
+def parse_nmea(sentence):
+    """
+    Read the position in an RMC or GGA sentence (i.e. $GPRMC,...*XX)
+
+    Returns a dict of longitude, latitude, altitude and heading (None when not in the sentence),
+    or None if the sentence doesn't have a (valid) position
+    """
+    sentence = sentence.strip()
+    if not sentence.startswith('$') or not _checksum_ok(sentence[1:]):
+        return None
+    fields = sentence[1:].split('*')[0].split(',')
+    kind = fields[0][-3:]
+    position = None
+    try:
+        if kind == 'RMC' and len(fields) >= 9 and fields[2] == 'A':
+            position = {
+                'latitude': _coordinate(fields[3], fields[4], 'S'),
+                'longitude': _coordinate(fields[5], fields[6], 'W'),
+                'altitude': None,
+                'heading': round(float(fields[8])) % 360 if fields[8] else None,
+            }
+        elif kind == 'GGA' and len(fields) >= 10 and fields[6] not in ('', '0'):
+            position = {
+                'latitude': _coordinate(fields[2], fields[3], 'S'),
+                'longitude': _coordinate(fields[4], fields[5], 'W'),
+                'altitude': float(fields[9]) if fields[9] else None,
+                'heading': None,
+            }
+    except ValueError:
+        return None
+    if position is None or abs(position['latitude']) > 90 or abs(position['longitude']) > 180:
+        return None
+    return position
+
+
+def make_rmc(latitude, longitude, heading):
+    """
+    Make an RMC sentence for a position (i.e. for testing)
+    """
+    def coordinate(value, width, positive, negative):
+        # Rounded to the 4 decimal places of minutes first, so i.e. 43.99999999 is 4400.0000 not 4360.0000
+        minutes = round(abs(value) * 60, 4)
+        degrees, minutes = divmod(minutes, 60)
+        return f'{int(degrees):0{width}d}{minutes:07.4f}', positive if value >= 0 else negative
+
+    lat, lat_hemisphere = coordinate(latitude, 2, 'N', 'S')
+    lon, lon_hemisphere = coordinate(longitude, 3, 'E', 'W')
+    body = f'GPRMC,000000,A,{lat},{lat_hemisphere},{lon},{lon_hemisphere},0.0,{heading:.1f},010125,,'
+    return f'${body}*{_checksum(body):02X}'
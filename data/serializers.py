@@ -0,0 +1,196 @@
+"""
+Serializers for map data
+
+- GeoJSON with the coordinates rounded to a number of decimal places (GeoJSONSerializer)
+- TopoJSON, with the coordinates quantized to integers and lines delta encoded (TopoJSONSerializer)
+
+6 decimal places of a degree is ~0.1m, more than enough to show on a map,
+and much shorter than the 15+ significant digits of a double.
+"""
+import json
+
+import numpy as np
+from django.contrib.gis.geos import WKTWriter
+from django.contrib.gis.serializers.geojson import Serializer as DjangoGeoJSONSerializer
+
+# Decimal places to round coordinates to (when not set in settings.GEOJSON_PRECISION)
+DEFAULT_PRECISION = 6
+
+
+def round_coordinates(coordinates, precision):
+    """
+    Round the coordinates (of any type of GeoJSON geometry) to precision decimal places
+    """
+    if not coordinates:
+        return coordinates
+    if not isinstance(coordinates[0], list):
+        # A single position
+        return [round(value, precision) for value in coordinates]
+    if not isinstance(coordinates[0][0], list):
+        # A list of positions (line or ring)
+        return np.round(np.asarray(coordinates, dtype=np.float64), precision).tolist()
+    return [round_coordinates(part, precision) for part in coordinates]
+
+
+def round_geometry(geometry, precision):
+    """
+    Round the coordinates of a GeoJSON geometry (in place) to precision decimal places
+    """
+    if geometry is None:
+        return geometry
+    if geometry['type'] == 'GeometryCollection':
+        for part in geometry['geometries']:
+            round_geometry(part, precision)
+    else:
+        geometry['coordinates'] = round_coordinates(geometry['coordinates'], precision)
+    return geometry
+
+
+def _flatten_parts(coordinates):
+    """
+    The lists of positions in nested coordinates (i.e. the rings of a MultiPolygon)
+    """
+    if coordinates and not isinstance(coordinates[0][0], list):
+        return [coordinates]
+    return [part for nested in coordinates for part in _flatten_parts(nested)]
+
+
+def geometry_positions(geometry):
+    """
+    The positions (as N x 2 arrays) in a GeoJSON geometry
+    """
+    if geometry is None:
+        return []
+    if geometry['type'] == 'GeometryCollection':
+        return [positions for part in geometry['geometries'] for positions in geometry_positions(part)]
+    if geometry['type'] == 'Point':
+        return [np.asarray([geometry['coordinates']], dtype=np.float64)[:, :2]]
+    return [np.asarray(part, dtype=np.float64)[:, :2] for part in _flatten_parts(geometry['coordinates'])]
+
+
+class GeoJSONSerializer(DjangoGeoJSONSerializer):
+    """
+    GeoJSON, with the coordinates rounded to precision decimal places
+    (None keeps the full precision)
+
+    Other geometry fields (in the properties, as EWKT) are rounded too.
+    """
+    # Options are set up when serializing starts (like Django's serializers)
+    # pylint: disable=W0201
+    def _init_options(self):
+        super()._init_options()
+        self.precision = self.json_kwargs.pop("precision", DEFAULT_PRECISION)
+        self.json_kwargs.setdefault("separators", (",", ":"))
+        self._wkt_writer = None if self.precision is None else WKTWriter(trim=True, precision=self.precision)
+
+    def handle_field(self, obj, field):
+        value = field.value_from_object(obj)
+        if self._wkt_writer is None or field.name == self.geometry_field or not hasattr(field, 'geom_type') or value is None:
+            super().handle_field(obj, field)
+        else:
+            self._current[field.name] = f"SRID={value.srid};{self._wkt_writer.write(value).decode()}"
+
+    def get_dump_object(self, obj):
+        data = super().get_dump_object(obj)
+        if self.precision is not None:
+            round_geometry(data['geometry'], self.precision)
+        return data
+
+    def end_object(self, obj):
+        # Without the space after the comma between features
+        if not self.first:
+            self.stream.write(",")
+        json.dump(self.get_dump_object(obj), self.stream, **self.json_kwargs)
+        self._current = None
+
+
+class TopoJSONSerializer(DjangoGeoJSONSerializer):
+    """
+    TopoJSON (https://github.com/topojson/topojson-specification)
+
+    Coordinates are quantized to integers (in steps of 10^-precision degrees)
+    from the bottom left of all the objects, and lines/rings are stored as
+    arcs of the differences between each point and the one before.
+    Each object has its own arcs, they aren't shared.
+
+    The features are in a GeometryCollection called object_name.
+    """
+    # Options are set up when serializing starts (like Django's serializers)
+    # pylint: disable=W0201
+    def _init_options(self):
+        super()._init_options()
+        precision = self.json_kwargs.pop("precision", DEFAULT_PRECISION)
+        self.scale = 10.0 ** -(DEFAULT_PRECISION if precision is None else precision)
+        self.object_name = self.json_kwargs.pop("object_name", "features")
+        self.json_kwargs.setdefault("separators", (",", ":"))
+
+    def start_serialization(self):
+        self._init_options()
+        self._cts = {}  # cache of CoordTransform's
+        # Nothing can be written until the extent of all the objects is known
+        self._features = []
+
+    def end_object(self, obj):
+        self._features.append(self.get_dump_object(obj))
+        self._current = None
+
+    def end_serialization(self):
+        positions = [positions for feature in self._features for positions in geometry_positions(feature['geometry'])]
+        translate = np.min(np.concatenate(positions), axis=0) if positions else np.zeros(2)
+        arcs = []
+        geometries = []
+        for feature in self._features:
+            geometry = self._topology_geometry(feature['geometry'], translate, arcs)
+            geometry['id'] = feature['id']
+            geometry['properties'] = feature['properties']
+            geometries.append(geometry)
+        topology = {
+            'type': 'Topology',
+            'transform': {'scale': [self.scale, self.scale], 'translate': translate.tolist()},
+            'objects': {self.object_name: {'type': 'GeometryCollection', 'geometries': geometries}},
+            'arcs': arcs,
+        }
+        json.dump(topology, self.stream, **self.json_kwargs)
+
+    def _quantize(self, positions, translate):
+        """
+        Convert positions (N x 2) to integers in steps of scale from translate
+        """
+        return np.rint((np.asarray(positions, dtype=np.float64)[..., :2] - translate) / self.scale).astype(np.int64)
+
+    def _arc(self, positions, translate, arcs):
+        """
+        Add the delta encoded arc for the positions, and return its index
+        """
+        quantized = self._quantize(positions, translate)
+        deltas = np.diff(quantized, axis=0)
+        # Points that are the same once quantized aren't needed, but a line needs 2 positions
+        moved = np.any(deltas != 0, axis=1)
+        if np.any(moved):
+            deltas = deltas[moved]
+        else:
+            deltas = deltas[:1]
+        arcs.append(np.concatenate((quantized[:1], deltas)).tolist())
+        return len(arcs) - 1
+
+    def _topology_geometry(self, geometry, translate, arcs):
+        """
+        Convert a GeoJSON geometry to a TopoJSON one, adding its arcs
+        """
+        # pylint: disable=R0911
+        if geometry is None:
+            return {'type': None}
+        geo_type = geometry['type']
+        if geo_type == 'GeometryCollection':
+            return {'type': geo_type, 'geometries': [self._topology_geometry(part, translate, arcs) for part in geometry['geometries']]}
+        coordinates = geometry['coordinates']
+        if geo_type in ('Point', 'MultiPoint'):
+            # Points aren't delta encoded
+            return {'type': geo_type, 'coordinates': self._quantize(coordinates, translate).tolist()}
+        if geo_type == 'LineString':
+            return {'type': geo_type, 'arcs': [self._arc(coordinates, translate, arcs)]}
+        if geo_type in ('MultiLineString', 'Polygon'):
+            return {'type': geo_type, 'arcs': [[self._arc(part, translate, arcs)] for part in coordinates]}
+        if geo_type == 'MultiPolygon':
+            return {'type': geo_type, 'arcs': [[[self._arc(ring, translate, arcs)] for ring in polygon] for polygon in coordinates]}
+        raise ValueError(f"Unknown geometry type {geo_type}")
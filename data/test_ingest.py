@@ -0,0 +1,53 @@
+"""
+Tests for writing asset positions in batches
+"""
+import threading
+
+from django.test import SimpleTestCase
+
+from .ingest import IngestFull, PositionWriter
+
+
+class PositionWriterTestCase(SimpleTestCase):
+    """
+    Test positions are queued and written in batches
+    """
+    def test_batches(self):
+        """
+        Test positions are written in batches of at most batch_size, and all are written when stopped
+        """
+        batches = []
+        writer = PositionWriter(batch_size=10, interval=1, write=batches.append)
+        for position in range(25):
+            writer.submit(position)
+        writer.stop()
+        self.assertEqual([position for batch in batches for position in batch], list(range(25)))
+        self.assertTrue(all(len(batch) <= 10 for batch in batches))
+        metrics = writer.metrics()
+        self.assertEqual((metrics['submitted'], metrics['written'], metrics['queued']), (25, 25, 0))
+        self.assertEqual(metrics['batches'], len(batches))
+
+    def test_full(self):
+        """
+        Test positions are rejected when the queue is full, and failed writes are counted
+        """
+        writing = threading.Event()
+        release = threading.Event()
+
+        def write(batch):
+            writing.set()
+            release.wait()
+            raise ValueError("Database is down")
+
+        writer = PositionWriter(batch_size=1, interval=0, max_queued=2, write=write)
+        writer.submit(1)
+        writing.wait()
+        # The writer is stuck on the first, so only two more fit
+        writer.submit(2)
+        writer.submit(3)
+        with self.assertRaises(IngestFull):
+            writer.submit(4, timeout=0.01)
+        release.set()
+        writer.stop()
+        metrics = writer.metrics()
+        self.assertEqual((metrics['submitted'], metrics['rejected'], metrics['failed'], metrics['written']), (3, 1, 3, 0))
@@ -0,0 +1,52 @@
+"""
+Tests for reading positions from NMEA sentences
+"""
+from django.test import SimpleTestCase
+
+from .nmea import make_rmc, parse_nmea
+
+
+class NMEATestCase(SimpleTestCase):
+    """
+    Test positions are read from RMC and GGA sentences
+    """
+    def test_rmc(self):
+        """
+        Test the position and heading are read from an RMC sentence
+        """
+        position = parse_nmea('$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A')
+        self.assertAlmostEqual(position['latitude'], 48.1173)
+        self.assertAlmostEqual(position['longitude'], 11.516667, places=6)
+        self.assertEqual(position['heading'], 84)
+        self.assertIsNone(position['altitude'])
+        position = parse_nmea(make_rmc(-43.5, -172.25, 359.8))
+        self.assertAlmostEqual(position['latitude'], -43.5)
+        self.assertAlmostEqual(position['longitude'], -172.25)
+        self.assertEqual(position['heading'], 0)
+        # Just under a whole degree is rounded up to it, not to 60 minutes
+        self.assertIn(',4400.0000,S,17300.0000,E,', make_rmc(-43.99999999, 172.99999999, 0))
+        position = parse_nmea(make_rmc(-43.99999999, 172.99999999, 0))
+        self.assertAlmostEqual(position['latitude'], -44)
+        self.assertAlmostEqual(position['longitude'], 173)
+
+    def test_gga(self):
+        """
+        Test the position and altitude are read from a GGA sentence
+        """
+        position = parse_nmea('$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47')
+        self.assertAlmostEqual(position['latitude'], 48.1173)
+        self.assertEqual(position['altitude'], 545.4)
+
+    def test_invalid(self):
+        """
+        Test sentences without a valid position are ignored
+        """
+        # Bad checksum
+        self.assertIsNone(parse_nmea('$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6B'))
+        # No fix
+        self.assertIsNone(parse_nmea('$GPRMC,123519,V,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W'))
+        self.assertIsNone(parse_nmea('$GPGGA,123519,4807.038,N,01131.000,E,0,08,0.9,545.4,M,46.9,M,,'))
+        # Not a position
+        self.assertIsNone(parse_nmea('$GPGSA,A,3,04,05,,09,12,,,24,,,,,2.5,1.3,2.1*39'))
+        self.assertIsNone(parse_nmea('not nmea'))
+        self.assertIsNone(parse_nmea('$GPRMC,123519,A,abc,N,01131.000,E,022.4,084.4,230394,003.1,W'))
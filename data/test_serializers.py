@@ -0,0 +1,82 @@
+"""
+Tests for the geojson/topojson sent to the map
+"""
+import json
+
+from django.test import Client
+from django.contrib.gis.geos import LineString, Point, Polygon
+
+from .models import GeoTimeLabel, UserPointTime
+from .tests import UserDataTestCase
+from .view_helpers import geojson_data, topojson_data
+
+
+def decode_arc(topology, arc):
+    """
+    Convert a (delta encoded) topojson arc back to lon/lat
+    """
+    scale, translate = topology['transform']['scale'], topology['transform']['translate']
+    x, y = 0, 0
+    positions = []
+    for delta_x, delta_y in topology['arcs'][arc]:
+        x, y = x + delta_x, y + delta_y
+        positions.append([x * scale[0] + translate[0], y * scale[1] + translate[1]])
+    return positions
+
+
+class SerializersTestCase(UserDataTestCase):
+    """
+    Test the precision and format of map data
+    """
+    def setUp(self):
+        super().setUp()
+        self.line = GeoTimeLabel.objects.create(geo=LineString((172.123456789, -43.987654321), (172.2, -43.9)), created_by=self.user,
+                                                label='Test Line', geo_type='line', mission=self.mission)
+        self.poi = GeoTimeLabel.objects.create(geo=Point(172.5, -43.5), created_by=self.user, label='Test Point', geo_type='poi', mission=self.mission)
+        self.polygon = GeoTimeLabel.objects.create(geo=Polygon(((172, -44), (172, -43), (173, -43), (172, -44))), created_by=self.user,
+                                                   label='Test Polygon', geo_type='polygon', mission=self.mission)
+
+    def test_geojson_precision(self):
+        """
+        Test coordinates are rounded to the configured number of decimal places
+        """
+        data = json.loads(geojson_data(GeoTimeLabel, [self.line]))
+        self.assertEqual(data['features'][0]['geometry']['coordinates'], [[172.123457, -43.987654], [172.2, -43.9]])
+        with self.settings(GEOJSON_PRECISION=2):
+            data = json.loads(geojson_data(GeoTimeLabel, [self.line]))
+        self.assertEqual(data['features'][0]['geometry']['coordinates'], [[172.12, -43.99], [172.2, -43.9]])
+        with self.settings(GEOJSON_PRECISION=None):
+            data = json.loads(geojson_data(GeoTimeLabel, [self.line]))
+        self.assertEqual(data['features'][0]['geometry']['coordinates'], [[172.123456789, -43.987654321], [172.2, -43.9]])
+
+    def test_topojson(self):
+        """
+        Test lines/polygons are delta encoded arcs, and points are quantized
+        """
+        topology = json.loads(topojson_data(GeoTimeLabel, [self.line, self.poi, self.polygon]))
+        self.assertEqual(topology['type'], 'Topology')
+        self.assertEqual(topology['transform']['translate'], [172.0, -44.0])
+        line, poi, polygon = topology['objects']['features']['geometries']
+        self.assertEqual(line['type'], 'LineString')
+        self.assertEqual(line['id'], self.line.pk)
+        self.assertEqual(line['properties']['label'], 'Test Line')
+        for decoded, expected in zip(decode_arc(topology, line['arcs'][0]), self.line.geo.coords):
+            self.assertAlmostEqual(decoded[0], expected[0], places=6)
+            self.assertAlmostEqual(decoded[1], expected[1], places=6)
+        self.assertEqual(poi['coordinates'], [500000, 500000])
+        self.assertEqual(polygon['type'], 'Polygon')
+        self.assertEqual(topology['arcs'][polygon['arcs'][0][0]], [[0, 0], [0, 1000000], [1000000, 0], [-1000000, -1000000]])
+
+    def test_track_topojson(self):
+        """
+        Test a track can be requested as topojson
+        """
+        for i in range(3):
+            UserPointTime.objects.create(geo=Point(172.5 + i / 1000, -43.5), user=self.user, created_by=self.user, mission=self.mission)
+        client = Client()
+        client.login(username='test', password='password')
+        url = f'/mission/{self.mission.pk}/data/user/{self.user.username}/position/history/'
+        topology = client.get(url, {'format': 'topojson', 'oldest': 'last'}).json()
+        points = topology['objects']['features']['geometries']
+        self.assertEqual([point['coordinates'] for point in points], [[0, 0], [1000, 0], [2000, 0]])
+        self.assertEqual(client.get(url).json()['type'], 'FeatureCollection')
@@ -5,20 +5,61 @@ The functions here should cover the logic associated with making
 views work.
 """
 
+from django.conf import settings
 from django.http import HttpResponse, HttpResponseNotFound, HttpResponseBadRequest
-from django.core.serializers import serialize
 from django.contrib.gis.geos import Point, Polygon, LineString, GEOSGeometry
 
 from .models import GeoTimeLabel
+from .serializers import GeoJSONSerializer, TopoJSONSerializer, DEFAULT_PRECISION
+
+
+def geojson_precision():
+    """
+    The number of decimal places to send coordinates with (None is full precision)
+    """
+    return getattr(settings, 'GEOJSON_PRECISION', DEFAULT_PRECISION)
+
+
+def geojson_data(objecttype, objects):
+    """
+    Convert a set of objects to geojson (as a string)
+    """
+    return GeoJSONSerializer().serialize(objects, geometry_field=objecttype.GEOFIELD, fields=objecttype.GEOJSON_FIELDS,
+                                         use_natural_foreign_keys=True, precision=geojson_precision())
+
+
+def topojson_data(objecttype, objects):
+    """
+    Convert a set of objects to topojson (as a string)
+
+    The objects are in a GeometryCollection called 'features'
+    """
+    return TopoJSONSerializer().serialize(objects, geometry_field=objecttype.GEOFIELD, fields=objecttype.GEOJSON_FIELDS,
+                                          use_natural_foreign_keys=True, precision=geojson_precision())
 
 
 def to_geojson(objecttype, objects):
     """
     Convert a set of objects to geojson and return them as an http response
     """
-    geojson_data = serialize('geojson', objects, geometry_field=objecttype.GEOFIELD,
-                             fields=objecttype.GEOJSON_FIELDS, use_natural_foreign_keys=True)
-    return HttpResponse(geojson_data, content_type='application/geo+json')
+    return HttpResponse(geojson_data(objecttype, objects), content_type='application/geo+json')
+
+
+def to_topojson(objecttype, objects):
+    """
+    Convert a set of objects to topojson and return them as an http response
+    """
+    return HttpResponse(topojson_data(objecttype, objects), content_type='application/json')
+
+
+def to_geojson_or_topojson(request, objecttype, objects):
+    """
+    Convert a set of objects to topojson (when asked for with format=topojson)
+    or geojson and return them as an http response
+    """
+    if request.GET.get('format') == 'topojson':
+        return to_topojson(objecttype, objects)
+    return to_geojson(objecttype, objects)
 
 
 def to_kml(objecttype, objects):
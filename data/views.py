@@ -28,7 +28,8 @@ from mission.models import Mission
 from .decorators import geotimelabel_from_type_id, geotimelabel_from_id, data_get_mission_id
 from .models import AssetPointTime, GeoTimeLabel, UserPointTime
 from .forms import UploadTyphoonData
-from .view_helpers import to_geojson, to_kml, point_label_make, user_polygon_make, user_line_make, geotimelabel_replace
+from .ingest import IngestFull, record_position
+from .view_helpers import to_geojson, to_geojson_or_topojson, to_kml, point_label_make, user_polygon_make, user_line_make, geotimelabel_replace
 
 
 def mission_get(mission_id):
@@ -119,7 +120,12 @@ def asset_record_position(request, asset):
     mission_asset = mission_asset_get(asset)
     if mission_asset is not None:
         if point:
-            AssetPointTime(asset=asset, geo=point, created_by=request.user, alt=alt, heading=heading, fix=fix, mission=mission_asset.mission).save()
+            try:
+                record_position(AssetPointTime(asset=asset, geo=point, created_by=request.user, alt=alt, heading=heading, fix=fix, mission_id=mission_asset.mission_id))
+            except IngestFull:
+                response = HttpResponse("Too busy, try again", status=503)
+                response['Retry-After'] = '1'
+                return response
         else:
             return HttpResponseBadRequest("Invalid lat/lon")
 
@@ -133,6 +139,7 @@ def asset_position_history(request, asset_id, mission=None, user=None, current_o
     Get the full track from an asset.
 
     When from is provided, only points after the timestamp from are considered.
+    With format=topojson the track is returned as topojson (which is much smaller).
     """
     oldest = 'first'
     since = None
@@ -158,7 +165,7 @@ def asset_position_history(request, asset_id, mission=None, user=None, current_o
     else:
         positions = positions.order_by('-created_at')
 
-    return to_geojson(AssetPointTime, positions)
+    return to_geojson_or_topojson(request, AssetPointTime, positions)
 
 
 @login_required
@@ -273,6 +280,7 @@ def user_position_history(request, user, mission=None, requesting_user=None, cur
     Get the full track from an asset.
 
     When from is provided, only points after the timestamp from are considered.
+    With format=topojson the track is returned as topojson (which is much smaller).
     """
     oldest = 'first'
     since = None
@@ -298,7 +306,7 @@ def user_position_history(request, user, mission=None, requesting_user=None, cur
     else:
         positions = positions.order_by('-created_at')
 
-    return to_geojson(UserPointTime, positions)
+    return to_geojson_or_topojson(request, UserPointTime, positions)
 
 
 @login_required
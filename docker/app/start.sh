@@ -20,5 +20,6 @@ else
     then
         ./manage.py createsuperuser --noinput
     fi
+    ./manage.py run_workers &
     ./manage.py runserver 0.0.0.0:8080
 fi
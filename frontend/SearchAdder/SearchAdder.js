@@ -12,6 +12,7 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
       break
     case 'line':
       searchSelection += '<option value="track-line">Track Line</option>'
+      searchSelection += '<option value="track-line-return">Track Line Return</option>'
       searchSelection += '<option value="shore-line">Shore Line</option>'
       searchSelection += '<option value="creeping-line">Creeping Line Ahead</option>'
       break
@@ -52,10 +53,16 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
       label: 'First Bearing',
       input_html: `<input class="form-control form-control-sm" type="number" id="SearchAdder-first-bearing-${RAND_NUM}" min="0" max="359" value="0" size="3"/>`
     },
-    { id: 'w', label: 'Width (across line)', input_html: `<input class="form-control form-control-sm" type="number" id="SearchAdder-width-${RAND_NUM}" min="0" size="4" />` }
+    { id: 'w', label: 'Width (across line)', input_html: `<input class="form-control form-control-sm" type="number" id="SearchAdder-width-${RAND_NUM}" min="0" size="4" />` },
+    {
+      id: 'or',
+      label: 'Orientation',
+      input_html: `<input class="form-control form-control-sm" type="text" id="SearchAdder-orientation-${RAND_NUM}" value="auto" size="4"/>`
+    }
   ])
 
   contents += [
+    `<div class="text-danger" id="SearchAdder-message-${RAND_NUM}"></div>`,
     `<div class="btn-group"><button class="btn btn-warning" id="SearchAdder-preview-${RAND_NUM}">Preview</button>`,
     `<button class="btn btn-primary" id="SearchAdder-create-${RAND_NUM}">Create</button>`,
     `<button class="btn btn-danger" id="SearchAdder-cancel-${RAND_NUM}">Cancel</button></div>`
@@ -69,6 +76,7 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
     const itElem = $(`#SearchAdder-i-${RAND_NUM}`)
     const fbElem = $(`#SearchAdder-fb-${RAND_NUM}`)
     const wdElem = $(`#SearchAdder-w-${RAND_NUM}`)
+    const orElem = $(`#SearchAdder-or-${RAND_NUM}`)
     if (selectedType === 'expanding-box') {
       itElem.show()
       fbElem.show()
@@ -81,6 +89,11 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
     } else {
       wdElem.hide()
     }
+    if (selectedType === 'creeping-line' && objectType === 'polygon') {
+      orElem.show()
+    } else {
+      orElem.hide()
+    }
   }
 
   changeSearchType()
@@ -96,6 +109,8 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
         return '/search/expandingbox/create/'
       case 'track-line':
         return '/search/trackline/create/'
+      case 'track-line-return':
+        return '/search/pattern/tracklinereturn/create/'
       case 'shore-line':
         return '/search/shoreline/create/'
       case 'creeping-line':
@@ -111,7 +126,8 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
       { name: 'asset_type_id', value: $(`#SearchAdder-asset-type-${RAND_NUM}`).val() },
       { name: 'iterations', value: $(`#SearchAdder-iterations-${RAND_NUM}`).val() },
       { name: 'first_bearing', value: $(`#SearchAdder-first-bearing-${RAND_NUM}`).val() },
-      { name: 'width', value: $(`#SearchAdder-width-${RAND_NUM}`).val() }
+      { name: 'width', value: $(`#SearchAdder-width-${RAND_NUM}`).val() },
+      { name: 'orientation', value: $(`#SearchAdder-orientation-${RAND_NUM}`).val() }
     ]
     switch (objectType) {
       case 'point':
@@ -122,6 +138,8 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
         break
       case 'polygon':
         data.push({ name: 'poly_id', value: objectID })
+        // Polygon searches can take a while to make, so they are made in the background
+        data.push({ name: 'background', value: 1 })
         break
     }
     if (includeCSRF) {
@@ -130,15 +148,43 @@ L.SearchAdder = function (map, csrftoken, objectType, objectID) {
     return data
   }
 
+  const showMessage = function (message) {
+    $(`#SearchAdder-message-${RAND_NUM}`).text(message)
+  }
+
+  // Wait for a background job (if there is one) to finish and pass on its result
+  const whenDone = function (data, callback) {
+    if (data.job === undefined) {
+      callback(data)
+      return
+    }
+    $.getJSON(data.status_url, function (job) {
+      if (job.status === 'done') {
+        callback(job.result)
+      } else if (job.status === 'failed') {
+        showMessage(`Making the search failed: ${job.error || 'unknown error'}`)
+      } else {
+        setTimeout(function () { whenDone(data, callback) }, 500)
+      }
+    }).fail(function () {
+      showMessage('Lost contact with the server while making the search, try again')
+    })
+  }
+
   let onMap = null
 
   $(`#SearchAdder-preview-${RAND_NUM}`).on('click', function () {
+    showMessage('')
     $.get(getUrl(), getData(), function (data) {
-      if (onMap !== null) {
-        onMap.remove()
-      }
-      onMap = L.geoJSON(data, { color: 'yellow' })
-      onMap.addTo(map)
+      whenDone(data, function (geojson) {
+        if (onMap !== null) {
+          onMap.remove()
+        }
+        onMap = L.geoJSON(geojson, { color: 'yellow' })
+        onMap.addTo(map)
+      })
+    }).fail(function (xhr) {
+      showMessage(`Couldn't preview the search: ${xhr.responseText || xhr.statusText}`)
     })
   })
 
@@ -0,0 +1,123 @@
+"""
+Sizes of icons, and a sprite sheet of all the icons
+
+Icons are shown on the map at ICON_SIZE pixels (and twice that on high
+DPI screens), so copies at those sizes are made once (next to the icon)
+rather than sending the full size icon to be shrunk by every browser.
+
+The sprite sheet has every icon (at one size) in a single image, with an
+index of where each is, so a map can get all its icons in one request.
+"""
+import hashlib
+import io
+import math
+import os
+
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache
+
+# The size icons are shown on the map (see frontend/asset/map.js)
+ICON_SIZE = 50
+ICON_SIZES = (ICON_SIZE, ICON_SIZE * 2)
+
+
+def icon_root():
+    """
+    The directory icons are stored in
+    """
+    return getattr(settings, 'ICON_ROOT', 'icons/images')
+
+
+def icon_path(icon, size=None):
+    """
+    Where the file of an icon (or a size of it) is stored
+    """
+    if size is None:
+        return os.path.join(icon_root(), str(icon.pk), icon.filename)
+    return os.path.join(icon_root(), str(icon.pk), f'{size}px.png')
+
+
+def icon_version(icon):
+    """
+    Changes when the file of an icon does (for ETags and caching)
+    """
+    stat = os.stat(icon_path(icon))
+    return f'{icon.pk}-{stat.st_mtime_ns}-{stat.st_size}'
+
+
+def _fit(image, size):
+    """
+    The image shrunk to fit in a size x size square, in the middle of it
+    """
+    image = image.convert('RGBA')
+    image.thumbnail((size, size))
+    square = Image.new('RGBA', (size, size))
+    square.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    return square
+
+
+def sized_icon_path(icon, size):
+    """
+    The path of an icon at size (one of ICON_SIZES), made if it hasn't been (or the icon has changed since)
+    """
+    original = icon_path(icon)
+    path = icon_path(icon, size)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(original):
+        with Image.open(original) as image:
+            sized = _fit(image, size)
+        # Write it somewhere else first, so a partly written file is never sent
+        partial = f'{path}.{os.getpid()}.partial'
+        sized.save(partial, 'PNG', optimize=True)
+        os.replace(partial, path)
+    return path
+
+
+def sprite_version(icons, size):
+    """
+    Changes when any of the icons do (or icons are added/removed)
+    """
+    versions = ','.join(icon_version(icon) for icon in icons)
+    return hashlib.sha256(f'{size}:{versions}'.encode()).hexdigest()[:16]
+
+
+def make_sprite(icons, size):
+    """
+    Make a sprite sheet of icons (each in a size x size square)
+
+    Returns the PNG, and the index of where each icon is in it:
+    {'size': size, 'icons': {id: {'name', 'x', 'y', 'width', 'height'}}}
+    """
+    columns = max(1, math.ceil(math.sqrt(len(icons))))
+    rows = max(1, math.ceil(len(icons) / columns))
+    sheet = Image.new('RGBA', (columns * size, rows * size))
+    index = {'size': size, 'icons': {}}
+    for position, icon in enumerate(icons):
+        x, y = (position % columns) * size, (position // columns) * size
+        with Image.open(sized_icon_path(icon, size)) as image:
+            sheet.paste(image, (x, y))
+        index['icons'][icon.pk] = {'name': icon.name, 'x': x, 'y': y, 'width': size, 'height': size}
+    output = io.BytesIO()
+    sheet.save(output, 'PNG', optimize=True)
+    return output.getvalue(), index
+
+
+def cached_sprite(icons, size):
+    """
+    The sprite sheet of icons (see make_sprite) and its version, from the cache if it's been made
+    Icons without a file are left out
+    """
+    icons = [icon for icon in icons if os.path.exists(icon_path(icon))]
+    version = sprite_version(icons, size)
+    sprite = sprite_by_version(version)
+    if sprite is None:
+        sprite = make_sprite(icons, size)
+        cache.set(f'icons:sprite:{version}', sprite, None)
+    return sprite, version
+
+
+def sprite_by_version(version):
+    """
+    A sprite sheet that has been made (see cached_sprite), or None if it isn't in the cache
+    """
+    return cache.get(f'icons:sprite:{version}')
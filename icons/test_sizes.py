@@ -0,0 +1,65 @@
+"""
+Tests for icon sizes and the sprite sheet
+"""
+import io
+import os
+import tempfile
+
+from PIL import Image
+from django.test import SimpleTestCase, override_settings
+
+from .models import Icon
+from .sizes import ICON_SIZE, cached_sprite, icon_path, make_sprite, sized_icon_path
+
+
+class IconSizesTestCase(SimpleTestCase):
+    """
+    Test icons are made in the sizes shown on the map, and put in a sprite sheet
+    """
+    def setUp(self):
+        # pylint: disable=R1732
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings = override_settings(ICON_ROOT=tmpdir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.icons = []
+        for pk, colour in enumerate(('red', 'green', 'blue', 'yellow', 'white'), start=1):
+            icon = Icon(pk=pk, name=colour, filename=f'{colour}.png')
+            os.makedirs(os.path.dirname(icon_path(icon)))
+            Image.new('RGB', (200, 100), colour).save(icon_path(icon))
+            self.icons.append(icon)
+
+    def test_sized(self):
+        """
+        Test icons are shrunk to fit a square, keeping their shape
+        """
+        path = sized_icon_path(self.icons[0], ICON_SIZE)
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (ICON_SIZE, ICON_SIZE))
+            # Above and below the (wide) icon is transparent
+            self.assertEqual(image.getpixel((ICON_SIZE // 2, 0))[3], 0)
+            self.assertEqual(image.getpixel((ICON_SIZE // 2, ICON_SIZE // 2)), (255, 0, 0, 255))
+        # Only made once
+        made = os.path.getmtime(path)
+        self.assertEqual(sized_icon_path(self.icons[0], ICON_SIZE), path)
+        self.assertEqual(os.path.getmtime(path), made)
+
+    def test_sprite(self):
+        """
+        Test the sprite sheet has every icon where its index says
+        """
+        sprite, index = make_sprite(self.icons, ICON_SIZE)
+        self.assertEqual(index['size'], ICON_SIZE)
+        with Image.open(io.BytesIO(sprite)) as image:
+            self.assertEqual(image.size, (3 * ICON_SIZE, 2 * ICON_SIZE))
+            for icon in self.icons:
+                place = index['icons'][icon.pk]
+                colour = image.getpixel((place['x'] + ICON_SIZE // 2, place['y'] + ICON_SIZE // 2))
+                self.assertEqual(colour[:3], Image.new('RGB', (1, 1), icon.name).getpixel((0, 0)))
+
+        # A changed icon changes the version of the sprite sheet
+        _, version = cached_sprite(self.icons, ICON_SIZE)
+        self.assertEqual(cached_sprite(self.icons, ICON_SIZE)[1], version)
+        os.remove(icon_path(self.icons[-1]))
+        self.assertNotEqual(cached_sprite(self.icons, ICON_SIZE)[1], version)
@@ -1,3 +1,62 @@
-from django.test import TestCase
+"""
+Tests for serving icons
+"""
+import io
+import os
+import tempfile
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+
+from .models import Icon
+from .sizes import ICON_SIZE, icon_path
+
+
+class IconViewTestCase(TestCase):
+    """
+    Test icons are sent so browsers can keep them
+    """
+    def setUp(self):
+        # pylint: disable=R1732
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings = override_settings(ICON_ROOT=tmpdir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        get_user_model().objects.create_user('test', password='password')
+        self.client = Client()
+        self.client.login(username='test', password='password')
+        self.icon = Icon.objects.create(name='Boat', filename='boat.png')
+        os.makedirs(os.path.dirname(icon_path(self.icon)))
+        Image.new('RGB', (200, 200), 'red').save(icon_path(self.icon))
+
+    def test_icon(self):
+        """
+        Test an icon has an ETag and can be cached, and isn't sent again when it hasn't changed
+        """
+        response = self.client.get(f'/icons/{self.icon.pk}.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=', response['Cache-Control'])
+        response = self.client.get(f'/icons/{self.icon.pk}.png', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(f'/icons/{self.icon.pk}.png?size={ICON_SIZE}')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (ICON_SIZE, ICON_SIZE))
+        self.assertEqual(self.client.get(f'/icons/{self.icon.pk}.png?size=7').status_code, 404)
+
+    def test_sprite(self):
+        """
+        Test the sprite sheet index has every icon
+        """
+        index = self.client.get(f'/icons/sprite.json?size={ICON_SIZE}').json()
+        self.assertEqual(index['icons'][str(self.icon.pk)]['x'], 0)
+        self.assertIn(f"v={index['version']}", index['url'])
+        response = self.client.get(index['url'])
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        # Without a version it can change, so is checked
+        response = self.client.get(f'/icons/sprite.png?size={ICON_SIZE}')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(f'/icons/sprite.png?size={ICON_SIZE}', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
@@ -5,9 +5,11 @@ These are linked in at /data/
 """
 
 from django.urls import re_path
-from .views import IconIndex, IconView
+from .views import IconIndex, IconSpriteView, IconView
 
 urlpatterns = [
     re_path(r'^(?P<icon_id>\d+).png$', IconView.as_view()),
+    re_path(r'^sprite.png$', IconSpriteView.as_view(), {'index_only': False}),
+    re_path(r'^sprite.json$', IconSpriteView.as_view(), {'index_only': True}),
     re_path(r'', IconIndex.as_view()),
 ]
@@ -1,10 +1,63 @@
-from django.http import JsonResponse, FileResponse
+"""
+Views for icons
+
+Icons rarely change, so browsers are told to keep them (and check with
+the ETag after a while), rather than fetching them on every map load.
+"""
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.views import View
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 
 from .models import Icon
+from .sizes import ICON_SIZE, ICON_SIZES, cached_sprite, icon_path, icon_version, sized_icon_path, sprite_by_version
+
+
+def icon_cache_max_age():
+    """
+    How long (seconds) browsers can use an icon without checking it has changed
+    """
+    return getattr(settings, 'ICON_CACHE_MAX_AGE', 24 * 60 * 60)
+
+
+def cached_response(request, etag, make_response):
+    """
+    Respond with make_response(), or not modified if the browser already has etag,
+    either way the browser can keep it for icon_cache_max_age()
+    """
+    etag = f'"{etag}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = make_response()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=icon_cache_max_age())
+    return response
+
+
+def immutable_response(response, etag):
+    """
+    A response that never changes (it has the version in its url), so the browser can keep it without checking
+    """
+    response['ETag'] = f'"{etag}"'
+    patch_cache_control(response, private=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
+
+
+def requested_size(request):
+    """
+    The size of icons asked for (?size=), one of ICON_SIZES
+    """
+    try:
+        size = int(request.GET.get('size', ICON_SIZE))
+    except ValueError as error:
+        raise Http404 from error
+    if size not in ICON_SIZES:
+        raise Http404
+    return size
 
 
 @method_decorator(login_required, name="dispatch")
@@ -23,7 +76,49 @@ class IconIndex(View):
 
 @method_decorator(login_required, name="dispatch")
 class IconView(View):
+    """
+    An icon, or (with ?size=) a copy of it sized for the map
+    """
     def get(self, request, icon_id):
+        """
+        Send the icon
+        """
         icon = get_object_or_404(Icon, pk=icon_id)
+        try:
+            version = icon_version(icon)
+        except FileNotFoundError as error:
+            raise Http404 from error
+        path = icon_path(icon)
+        if 'size' in request.GET:
+            size = requested_size(request)
+            path = sized_icon_path(icon, size)
+            version = f'{version}-{size}'
+
+        return cached_response(request, version, lambda: FileResponse(open(path, 'rb'), filename=f'icon-{icon.pk}-{icon.filename}'))  # pylint: disable=R1732
+
+
+@method_decorator(login_required, name="dispatch")
+class IconSpriteView(View):
+    """
+    All the icons in one image (?size= one of ICON_SIZES), or the index of where each icon is in it
 
-        return FileResponse(open(f'icons/images/{icon.id}/{icon.filename}', 'rb'), filename=f'icon-{icon.pk}-{icon.filename}')
+    The index gives the url of the sprite sheet with its version (&v=), so an
+    index always goes with the sheet it was made for, however long each is kept.
+    """
+    def get(self, request, index_only):
+        """
+        Send the sprite sheet, or its index
+        """
+        size = requested_size(request)
+        (sprite, index), version = cached_sprite(Icon.objects.order_by('pk'), size)
+        if index_only:
+            return cached_response(request, f'{version}-json', lambda: JsonResponse({**index, 'url': f'/icons/sprite.png?size={size}&v={version}', 'version': version}))
+        requested = request.GET.get('v')
+        if requested and requested != version:
+            # An older index, send the sheet it was made for when that's still around
+            old = sprite_by_version(requested)
+            if old is not None:
+                return immutable_response(HttpResponse(old[0], content_type='image/png'), requested)
+        if requested == version:
+            return immutable_response(HttpResponse(sprite, content_type='image/png'), version)
+        return cached_response(request, version, lambda: HttpResponse(sprite, content_type='image/png'))
@@ -0,0 +1,65 @@
+"""
+Benchmarks for making the smaller sizes of uploaded images
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test images --pattern="bench_*.py"
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from .derivatives import make_derivatives
+
+# A batch of 12MP photos
+PHOTOS = 8
+PHOTO_SIZE = (4000, 3000)
+
+
+def make_photo(path, seed):
+    """ Save a JPEG with enough detail to be like a photo """
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (PHOTO_SIZE[1] // 50, PHOTO_SIZE[0] // 50, 3), dtype=np.uint8)
+    image = Image.fromarray(coarse).resize(PHOTO_SIZE, Image.Resampling.BICUBIC)
+    noise = Image.fromarray(rng.integers(0, 32, (PHOTO_SIZE[1], PHOTO_SIZE[0], 3), dtype=np.uint8))
+    Image.blend(image, noise, 0.1).save(path, 'JPEG', quality=90)
+
+
+def derivatives_of(path, draft=True, sizes=None):
+    """ Make the derivatives of a photo next to it """
+    kwargs = {} if sizes is None else {'sizes': sizes}
+    return make_derivatives(path, 'jpeg', lambda size, webp: f"{path}.{size}.{'webp' if webp else 'jpeg'}", draft=draft, **kwargs)
+
+
+class BenchDerivatives(unittest.TestCase):
+    """ Time making the derivatives of a batch of photos """
+    def setUp(self):
+        # pylint: disable=R1732
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.photos = [os.path.join(self.tmpdir.name, f'{i}.data') for i in range(PHOTOS)]
+        for i, path in enumerate(self.photos):
+            make_photo(path, i)
+
+    def bench(self, description, func):
+        """ Print how long func takes for the batch """
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        print(f"{description}: {elapsed:.2f}s ({elapsed / PHOTOS * 1000:.0f} ms per photo)")
+
+    def test_derivatives(self):
+        """ The old single thumbnail, every size with and without draft, and in a pool of workers """
+        print()
+        print(f"{PHOTOS} photos of {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]}, {sum(os.path.getsize(path) for path in self.photos) / 1024 / 1024:.1f} MiB")
+        self.bench("Thumbnail only, full decode (as before)", lambda: [derivatives_of(path, draft=False, sizes=(('thumbnail', 128),)) for path in self.photos])
+        self.bench("All sizes, full decode", lambda: [derivatives_of(path, draft=False) for path in self.photos])
+        self.bench("All sizes, draft decode", lambda: [derivatives_of(path) for path in self.photos])
+        processes = min(4, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            self.bench(f"All sizes, draft decode, {processes} workers", lambda: list(pool.map(derivatives_of, self.photos)))
@@ -0,0 +1,58 @@
+"""
+Smaller copies (derivatives) of uploaded images
+
+Each image is made in these sizes (the longest side, in pixels),
+in the format it was uploaded in and as WebP:
+- screen: for viewing the image
+- preview: for showing on the map
+- thumbnail: for lists of images
+
+Photos from phones are often 12+ MP, so JPEGs are decoded at a reduced
+scale (see PIL.Image.draft) that is still bigger than the largest size,
+which is much faster than decoding the whole image and shrinking it.
+"""
+import math
+import os
+
+from PIL import Image
+
+# Largest first, each size is made from the one before
+SIZES = (
+    ('screen', 1600),
+    ('preview', 512),
+    ('thumbnail', 128),
+)
+WEBP_QUALITY = 80
+
+
+def _save(image, path, image_format, **params):
+    """
+    Save the image, so the file only appears once it is complete
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.{os.getpid()}.partial'
+    image.save(partial, image_format, **params)
+    os.replace(partial, path)
+
+
+def make_derivatives(path, image_format, destination, sizes=SIZES, draft=True):
+    # pylint: disable=R0913,R0917
+    """
+    Make the derivatives of the image at path (in image_format)
+    destination(size, webp) is the path to store each derivative in
+
+    Returns the names of the sizes that were made
+    """
+    made = []
+    with Image.open(path) as image:
+        if draft and image.format == 'JPEG':
+            # The smallest scale that keeps the longest side at least the largest size
+            scale = sizes[0][1] / max(image.size)
+            image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image.load()
+        for name, size in sizes:
+            image.thumbnail((size, size))
+            _save(image, destination(name, False), image_format)
+            _save(image, destination(name, True), 'WEBP', quality=WEBP_QUALITY)
+            made.append(name)
+    return made
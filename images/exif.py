@@ -0,0 +1,108 @@
+"""
+Read where and when a photo was taken from its EXIF
+
+Only the start of the file (the EXIF header) is read,
+the image itself isn't decoded.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from PIL import ExifTags, Image
+from django.utils import timezone
+
+# Exif IFD tags
+DATETIME_ORIGINAL = 0x9003
+OFFSET_TIME_ORIGINAL = 0x9011
+# GPS IFD tags
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+GPS_ALTITUDE_REF = 5
+GPS_ALTITUDE = 6
+GPS_TIMESTAMP = 7
+GPS_DATESTAMP = 29
+
+
+def _degrees(value, ref, negative):
+    """
+    Convert EXIF degrees, minutes, seconds (and N/S/E/W) to decimal degrees
+    """
+    degrees, minutes, seconds = (float(part) for part in value)
+    degrees = degrees + minutes / 60 + seconds / 3600
+    return -degrees if ref == negative else degrees
+
+
+def _position(gps):
+    """
+    The (longitude, latitude) in the GPS IFD, or None
+    """
+    try:
+        latitude = _degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF), 'S')
+        longitude = _degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF), 'W')
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    if not (math.isfinite(latitude) and math.isfinite(longitude)) or abs(latitude) > 90 or abs(longitude) > 180:
+        return None
+    return (longitude, latitude)
+
+
+def _altitude(gps):
+    """
+    The altitude (meters) in the GPS IFD, or None
+    """
+    try:
+        altitude = float(gps[GPS_ALTITUDE])
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    if not math.isfinite(altitude):
+        return None
+    # 1 is below sea level
+    return -altitude if gps.get(GPS_ALTITUDE_REF) in (1, b'\x01') else altitude
+
+
+def _taken_at(exif_ifd, gps):
+    """
+    When the photo was taken (timezone aware), or None
+
+    The original date/time is in the camera's local time, which is only
+    known if the offset was recorded too. Otherwise the GPS time (UTC) is
+    used, and failing that the camera time is assumed to be in the server's timezone.
+    """
+    taken_at = None
+    try:
+        taken_at = datetime.strptime(str(exif_ifd[DATETIME_ORIGINAL]).strip('\x00 '), '%Y:%m:%d %H:%M:%S')
+        offset = str(exif_ifd[OFFSET_TIME_ORIGINAL]).strip('\x00 ')
+        return taken_at.replace(tzinfo=datetime.strptime(offset, '%z').tzinfo)
+    except (KeyError, ValueError):
+        pass
+    try:
+        hours, minutes, seconds = (float(part) for part in gps[GPS_TIMESTAMP])
+        date = datetime.strptime(str(gps[GPS_DATESTAMP]).strip('\x00 '), '%Y:%m:%d')
+        return date.replace(tzinfo=dt_timezone.utc) + timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        pass
+    if taken_at is not None:
+        return timezone.make_aware(taken_at)
+    return None
+
+
+def read_exif(source):
+    """
+    Read where and when a photo (a path or file) was taken
+
+    Returns a dict of position (longitude, latitude), altitude (meters) and taken_at,
+    each of which is None when the photo doesn't have it
+    """
+    metadata = {'position': None, 'altitude': None, 'taken_at': None}
+    try:
+        with Image.open(source) as image:
+            exif = image.getexif()
+            gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+            exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    except (OSError, SyntaxError, ValueError):
+        return metadata
+    metadata['position'] = _position(gps)
+    metadata['altitude'] = _altitude(gps) if metadata['position'] is not None else None
+    metadata['taken_at'] = _taken_at(exif_ifd, gps)
+    return metadata
@@ -0,0 +1,165 @@
+"""
+Export the images in a mission as a zip file
+
+The zip file is made as it's sent (see zip_stream), a chunk of an image
+at a time, so the memory needed doesn't depend on how many (or how big)
+the images are. An index of the images (GeoJSON and KML) is added at the end,
+a feature/placemark at a time.
+"""
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from data.serializers import round_coordinates
+from data.view_helpers import geojson_precision
+from .storage import CHUNK_SIZE, original_path
+
+
+class _ZipOutput:
+    """
+    A (write only) file for zipfile to write to, the written data is taken out as it goes
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """
+        Keep the data until it's taken
+        """
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """
+        Nothing to flush
+        """
+
+    def take(self):
+        """
+        Take the data that has been written since the last take
+        """
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_stream(entries):
+    """
+    Yield a zip file of entries, as it's made
+
+    entries are (name in the zip, path of a file to store), (name, bytes to compress)
+    or (name, iterable of bytes to compress, written as they're made),
+    they can be a generator (i.e. the index can be made after the files)
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w') as archive:
+        for name, content in entries:
+            now = datetime.now().timetuple()[:6]
+            if isinstance(content, bytes):
+                archive.writestr(zipfile.ZipInfo(name, date_time=now), content, compress_type=zipfile.ZIP_DEFLATED)
+            elif not isinstance(content, str):
+                info = zipfile.ZipInfo(name, date_time=now)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, 'w') as destination:
+                    for chunk in content:
+                        destination.write(chunk)
+                        yield output.take()
+            else:
+                # Images are already compressed
+                info = zipfile.ZipInfo(name, date_time=now)
+                with open(content, 'rb') as source, archive.open(info, 'w', force_zip64=os.path.getsize(content) > zipfile.ZIP64_LIMIT) as destination:
+                    chunk = source.read(CHUNK_SIZE)
+                    while chunk:
+                        destination.write(chunk)
+                        yield output.take()
+                        chunk = source.read(CHUNK_SIZE)
+            yield output.take()
+    yield output.take()
+
+
+def image_filename(image):
+    """
+    The name of an image in the export
+    """
+    ext = 'jpg' if image.original_format.lower() == 'jpeg' else image.original_format.lower()
+    return f'images/{image.pk}.{ext}'
+
+
+def _geojson_feature(image, filename):
+    """
+    An image in the GeoJSON index
+    """
+    precision = geojson_precision()
+    coordinates = list(image.geo.coords)
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': coordinates if precision is None else round_coordinates(coordinates, precision)},
+        'properties': {
+            'pk': image.pk,
+            'description': image.description,
+            'priority': image.priority,
+            'created_at': image.created_at,
+            'created_by': image.created_by.username,
+            'file': filename,
+        },
+    }
+
+
+def _kml_placemark(image, filename):
+    """
+    An image in the KML index
+    """
+    description = f'{image.created_at.isoformat()} by {image.created_by.username}'
+    if filename:
+        description += f'<br/><img src="{filename}" width="400"/>'
+    return (f'\t\t<Placemark>\n\t\t\t<name><![CDATA[{image.description}]]></name>\n'
+            f'\t\t\t<description><![CDATA[{description}]]></description>\n'
+            f'{image.geo.kml}\n\t\t</Placemark>\n')
+
+
+def _geojson_index(images):
+    """
+    The GeoJSON index of images ((image, filename) pairs), a feature at a time
+    """
+    yield b'{"type": "FeatureCollection", "features": ['
+    separator = b''
+    for image, filename in images:
+        yield separator + json.dumps(_geojson_feature(image, filename), cls=DjangoJSONEncoder).encode()
+        separator = b', '
+    yield b']}'
+
+
+def _kml_index(images):
+    """
+    The KML index of images ((image, filename) pairs), a placemark at a time
+    """
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<kml xmlns="http://www.opengis.net/kml/2.2">\n\t<Document>\n'
+    for image, filename in images:
+        yield _kml_placemark(image, filename).encode()
+    yield b'\t</Document>\n</kml>\n'
+
+
+def _stored(images):
+    """
+    Each image (from the database a chunk at a time), and its name in the export (None if it has no stored file)
+    """
+    for image in images.iterator(chunk_size=500):
+        yield image, image_filename(image) if os.path.exists(original_path(image)) else None
+
+
+def export_entries(images):
+    """
+    The files (see zip_stream) of the export of images (a queryset)
+    Images that don't have a stored file are only in the index (with no file)
+
+    The images are read again for each index, rather than being kept from the first pass
+    """
+    images = images.select_related('created_by').order_by('created_at', 'pk')
+    for image, filename in _stored(images):
+        if filename:
+            yield filename, original_path(image)
+    yield 'index.geojson', _geojson_index(_stored(images))
+    yield 'index.kml', _kml_index(_stored(images))
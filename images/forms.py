@@ -11,3 +11,15 @@ class UploadImageForm(forms.Form):
     file = forms.ImageField()
     description = forms.CharField()
     priority = forms.BooleanField(required=False)
+
+
+class StartImageUploadForm(forms.Form):
+    """
+    Start uploading a geo-tagged image in parts
+    """
+    filename = forms.CharField(max_length=200)
+    size = forms.IntegerField(min_value=1)
+    sha256 = forms.RegexField(r'^[0-9a-fA-F]{64}$')
+    description = forms.CharField()
+    latitude = forms.FloatField(min_value=-90, max_value=90, required=False)
+    longitude = forms.FloatField(min_value=-180, max_value=180, required=False)
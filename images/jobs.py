@@ -0,0 +1,28 @@
+"""
+Background jobs for images (see jobs.models.Job)
+"""
+import os
+
+from .derivatives import make_derivatives, SIZES
+from .models import GeoImage
+from .storage import derivative_path, original_path
+
+
+def make_image_derivatives(image_id):
+    """
+    Create the smaller sizes (and WebP versions) of an uploaded image
+    """
+    image = GeoImage.objects.get(pk=image_id)
+    paths = [derivative_path(image, size, webp) for size, _ in SIZES for webp in (False, True)]
+    if all(os.path.exists(path) for path in paths):
+        # The same image has been uploaded before
+        made = [size for size, _ in SIZES]
+    else:
+        made = make_derivatives(original_path(image), image.original_format, lambda size, webp: derivative_path(image, size, webp))
+    # Only update the derivatives, so changes made while this was running aren't lost
+    GeoImage.objects.filter(pk=image.pk).update(derivatives=made)
+    return made
+
+
+# Jobs that were queued before there were multiple sizes
+make_thumbnail = make_image_derivatives
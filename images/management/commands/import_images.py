@@ -0,0 +1,142 @@
+"""
+Import a folder (or zip file) of geotagged photos, i.e. from a drone's SD card
+
+The photos are stored and have their EXIF read in a pool of worker
+processes, then they are added to the mission in batches.
+"""
+import functools
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.http import Http404
+
+from jobs.models import Job
+from mission.decorators import mission_user_get
+from tiles.models import TileLayerVersion
+from timeline.helpers import timeline_record_create_many
+from images.exif import read_exif
+from images.jobs import make_image_derivatives
+from images.models import GeoImage
+from images.storage import store_upload
+from images.view_helpers import image_from_exif, map_ext
+
+IMAGE_EXTENSIONS = ('jpg', 'jpeg', 'png', 'tif', 'tiff', 'webp')
+
+
+def photo_names(source):
+    """
+    The names of the photos in a folder (and its sub folders) or zip file
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    else:
+        names = [os.path.relpath(os.path.join(directory, filename), source) for directory, _, filenames in os.walk(source) for filename in filenames]
+    return sorted(name for name in names if name.split('.')[-1].lower() in IMAGE_EXTENSIONS)
+
+
+@functools.lru_cache(maxsize=1)
+def _archive(source):
+    """
+    The zip file being imported (opened once in each worker)
+    """
+    return zipfile.ZipFile(source)  # pylint: disable=R1732
+
+
+def store_photo(source, name, keep_unplaced):
+    """
+    Store a photo and read its EXIF (in a worker process)
+    Photos without a position are only stored when keep_unplaced (there's somewhere to put them)
+    Returns the name, hash of the contents (None when it wasn't stored) and the EXIF (see images.exif.read_exif)
+    """
+    if zipfile.is_zipfile(source):
+        content = _archive(source).read(name)
+    else:
+        with open(os.path.join(source, name), 'rb') as photo:
+            content = photo.read()
+    metadata = read_exif(io.BytesIO(content))
+    if metadata['position'] is None and not keep_unplaced:
+        return name, None, metadata
+    return name, store_upload(ContentFile(content)), metadata
+
+
+class Command(BaseCommand):
+    """
+    Import geotagged photos into a mission
+    """
+    help = 'Import a folder or zip file of geotagged photos into a mission'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mission', type=int, help='Mission id')
+        parser.add_argument('username', help='User to add the photos as (must be in the mission)')
+        parser.add_argument('source', help='Folder or zip file of photos')
+        parser.add_argument('--description', default='', help='Description of the photos (default: the file name)')
+        parser.add_argument('--latitude', type=float, help='Latitude of photos without a position in their EXIF (default: skip them)')
+        parser.add_argument('--longitude', type=float, help='Longitude of photos without a position in their EXIF')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: number of CPUs)')
+        parser.add_argument('--batch', type=int, default=100, help='Photos to add to the database at a time')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+            mission = mission_user_get(options['mission'], user).mission
+        except (get_user_model().DoesNotExist, Http404) as error:
+            raise CommandError("Unknown user, or they aren't in the mission") from error
+        if not os.path.exists(options['source']):
+            raise CommandError(f"{options['source']} does not exist")
+        default_point = None
+        if options['latitude'] is not None and options['longitude'] is not None:
+            default_point = Point(options['longitude'], options['latitude'])
+
+        names = photo_names(options['source'])
+        self.stdout.write(f"Importing {len(names)} photos")
+        imported = skipped = 0
+        batch = []
+        for name, content_hash, metadata in self.store_photos(options['source'], names, options['processes'], default_point is not None):
+            image = GeoImage(mission=mission, created_by=user, description=options['description'] or os.path.basename(name),
+                             geo=default_point, original_format=map_ext(name.split('.')[-1]).lower(), content_hash=content_hash)
+            image_from_exif(image, metadata)
+            if image.geo is None:
+                self.stderr.write(f"Skipped {name}, it has no position")
+                skipped += 1
+                continue
+            batch.append(image)
+            if len(batch) >= options['batch']:
+                imported += self.add_images(mission, user, batch)
+                batch = []
+        imported += self.add_images(mission, user, batch)
+        self.stdout.write(f"Imported {imported} photos, skipped {skipped}")
+
+    @staticmethod
+    def store_photos(source, names, processes, keep_unplaced):
+        """
+        Store the photos, and yield what store_photo found for each (in order)
+        """
+        if processes <= 1:
+            yield from map(store_photo, [source] * len(names), names, [keep_unplaced] * len(names))
+            return
+        # Start workers fresh (rather than forking), so they don't share this process's database connection
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup) as pool:
+            yield from pool.map(store_photo, [source] * len(names), names, [keep_unplaced] * len(names), chunksize=4)
+
+    @staticmethod
+    def add_images(mission, user, images):
+        """
+        Add a batch of images (and their timeline entries, and jobs to make their smaller sizes)
+        """
+        if not images:
+            return 0
+        images = GeoImage.objects.bulk_create(images)
+        timeline_record_create_many(mission, user, images)
+        Job.enqueue_many(make_image_derivatives, [(image.pk,) for image in images], mission=mission, created_by=user)
+        # Bulk creates don't send the signals that tiles are invalidated by
+        TileLayerVersion.invalidate(mission.pk, ['images'])
+        return len(images)
@@ -0,0 +1,29 @@
+"""
+Remove image uploads (see images.models.ImageUpload) that were never finished
+"""
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from images.models import ImageUpload
+from images.storage import upload_path
+
+
+class Command(BaseCommand):
+    """
+    Remove abandoned image uploads
+    """
+    help = 'Remove image uploads that were started but not finished'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Remove uploads started more than this many days ago (default: 7)')
+
+    def handle(self, *args, **options):
+        abandoned = ImageUpload.objects.filter(image__isnull=True, created_at__lt=timezone.now() - timedelta(days=options['days']))
+        for upload in abandoned:
+            if os.path.exists(upload_path(upload.pk)):
+                os.remove(upload_path(upload.pk))
+        count, _ = abandoned.delete()
+        self.stdout.write(f"Removed {count} uploads")
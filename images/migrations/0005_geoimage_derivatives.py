@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0004_alter_geoimage_created_by_alter_geoimage_deleted_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geoimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0005_geoimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geoimage',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
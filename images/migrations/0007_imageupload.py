@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:47
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0006_geoimage_content_hash'),
+        ('mission', '0010_missionorganization_permissions_organization_add_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('description', models.TextField()),
+                ('geo', django.contrib.gis.db.models.fields.PointField(geography=True, srid=4326)),
+                ('original_format', models.CharField(max_length=10)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('received', models.BigIntegerField(default=0)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+                ('image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='images.geoimage')),
+                ('mission', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='mission.mission')),
+            ],
+        ),
+    ]
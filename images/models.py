@@ -2,8 +2,11 @@
 Models for images
 """
 
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.contrib.gis.db import models
+from django.utils import timezone
 from data.models import GeoTime
+from mission.models import Mission
 
 
 class GeoImage(GeoTime):
@@ -16,9 +19,46 @@ class GeoImage(GeoTime):
     original_format = models.CharField(max_length=10)
     priority = models.BooleanField(default=False)
     replaced_by = models.ForeignKey("GeoImage", on_delete=models.SET_NULL, null=True, blank=True)
+    # SHA-256 of the uploaded file (see images.storage), blank for images stored by id
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # The sizes that have been made (see images.derivatives)
+    derivatives = models.JSONField(default=list, blank=True)
 
-    GEOJSON_FIELDS = ('pk', 'created_at', 'description', 'priority', )
+    GEOJSON_FIELDS = ('pk', 'created_at', 'description', 'priority', 'derivatives', )
 
     def __str__(self):
         # pylint: disable=E1136
         return f"Image ({self.description}) @ {self.geo[0]}, {self.geo[1]}"
+
+
+class ImageUpload(models.Model):
+    """
+    An image that is being uploaded in parts, so a dropped connection
+    only needs the rest of the file to be sent (see images.views.image_upload_start)
+
+    The parts are written to images.storage.upload_path until the whole
+    file has been received, then it's checked and becomes a GeoImage.
+    """
+    mission = models.ForeignKey(Mission, on_delete=models.PROTECT)
+    created_by = models.ForeignKey(get_user_model(), on_delete=models.PROTECT)
+    created_at = models.DateTimeField(default=timezone.now)
+    description = models.TextField()
+    # Where it was uploaded from (if the image doesn't have a position in its EXIF)
+    geo = models.PointField(geography=True, null=True, blank=True)
+    original_format = models.CharField(max_length=10)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    # Bytes from the start of the file that have been written
+    received = models.BigIntegerField(default=0)
+    image = models.ForeignKey(GeoImage, on_delete=models.SET_NULL, null=True, blank=True)
+
+    def as_object(self):
+        """
+        Convert the upload to an object that is suitable for returning via JsonResponse
+        """
+        return {
+            'id': self.pk,
+            'size': self.size,
+            'received': self.received,
+            'image': self.image_id,
+        }
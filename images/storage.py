@@ -0,0 +1,120 @@
+"""
+Storage of image files
+
+Uploaded images are stored by the SHA-256 of their contents, so the same
+image uploaded more than once is only stored (and has its smaller sizes
+made) once, and a stored file never changes. Files are spread over
+directories by the start of their hash (full/ab/cd/abcd...) so no
+directory gets too big.
+
+Images uploaded before this have no hash, and are stored by their id
+(full/<id>.data).
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+# Bytes to read/write at a time
+CHUNK_SIZE = 64 * 1024
+
+
+def image_root():
+    """
+    The directory images are stored in
+    """
+    return getattr(settings, 'IMAGE_ROOT', 'images')
+
+
+def _sharded(kind, content_hash, ext):
+    """
+    Where a file for content_hash is stored
+    """
+    return os.path.join(image_root(), kind, content_hash[:2], content_hash[2:4], f'{content_hash}.{ext}')
+
+
+def original_path(image):
+    """
+    Where the uploaded file of an image is stored
+    """
+    if image.content_hash:
+        return _sharded('full', image.content_hash, 'data')
+    return os.path.join(image_root(), 'full', f'{image.pk}.data')
+
+
+def derivative_path(image, size, webp=False):
+    """
+    Where a smaller size (see images.derivatives) of an image is stored
+    """
+    ext = 'webp' if webp else 'data'
+    if image.content_hash:
+        return _sharded(size, image.content_hash, ext)
+    return os.path.join(image_root(), size, f'{image.pk}.{ext}')
+
+
+def upload_path(upload_id):
+    """
+    Where the parts of an upload (see images.models.ImageUpload) are written
+    """
+    return os.path.join(image_root(), 'uploads', f'{upload_id}.partial')
+
+
+def write_part(upload_id, start, stream, length):
+    """
+    Write length bytes read from stream into an upload at start
+    (which must be no further than the end of what has been written)
+
+    Returns how many bytes were written, which is less than length if the stream ended early
+    """
+    path = upload_path(upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as destination:
+        destination.seek(start)
+        while written < length:
+            chunk = stream.read(min(CHUNK_SIZE, length - written))
+            if not chunk:
+                break
+            destination.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def file_hash(path):
+    """
+    The SHA-256 of the contents of a file
+    """
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def store_file(path, content_hash):
+    """
+    Move a complete file (with contents that hash to content_hash) into the store
+    """
+    stored = _sharded('full', content_hash, 'data')
+    if os.path.exists(stored):
+        # Already stored
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(stored), exist_ok=True)
+        os.replace(path, stored)
+    return content_hash
+
+
+def store_upload(file):
+    """
+    Store an uploaded file, and return the hash of its contents
+    """
+    tmpdir = os.path.join(image_root(), 'tmp')
+    os.makedirs(tmpdir, exist_ok=True)
+    content_hash = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=tmpdir, delete=False) as destination:
+        for chunk in file.chunks():
+            content_hash.update(chunk)
+            destination.write(chunk)
+    return store_file(destination.name, content_hash.hexdigest())
@@ -0,0 +1,81 @@
+"""
+Tests for making the smaller sizes of images
+"""
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from .derivatives import make_derivatives, SIZES
+
+
+def gradient(width, height):
+    """
+    An image that isn't all one color (so it's like a photo to compress)
+    """
+    image = Image.linear_gradient('L').resize((width, height))
+    return Image.merge('RGB', (image, image.transpose(Image.Transpose.FLIP_LEFT_RIGHT), image))
+
+
+class DerivativesTestCase(unittest.TestCase):
+    """
+    Test the sizes and formats of derivatives
+    """
+    def setUp(self):
+        # pylint: disable=R1732
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def destination(self, size, webp):
+        """
+        Store the derivatives in the temporary directory
+        """
+        return os.path.join(self.tmpdir.name, f"{size}.{'webp' if webp else 'data'}")
+
+    def test_jpeg(self):
+        """
+        Test a big JPEG is made in each size, as a JPEG and WebP
+        """
+        original = os.path.join(self.tmpdir.name, 'original.data')
+        gradient(4000, 3000).save(original, 'JPEG')
+        self.assertEqual(make_derivatives(original, 'jpeg', self.destination), [name for name, _ in SIZES])
+        for name, size in SIZES:
+            with Image.open(self.destination(name, False)) as image:
+                self.assertEqual(image.format, 'JPEG')
+                self.assertEqual(image.size, (size, size * 3 // 4))
+            with Image.open(self.destination(name, True)) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (size, size * 3 // 4))
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), sorted(
+            ['original.data'] + [f'{name}.{ext}' for name, _ in SIZES for ext in ('data', 'webp')]))
+
+    def test_draft(self):
+        """
+        Test decoding a JPEG at a reduced scale gives (nearly) the same image
+        """
+        original = os.path.join(self.tmpdir.name, 'original.data')
+        gradient(4000, 3000).save(original, 'JPEG')
+        make_derivatives(original, 'jpeg', self.destination, sizes=(('preview', 512),))
+        with Image.open(self.destination('preview', False)) as image:
+            drafted = list(image.convert('L').getdata())
+        make_derivatives(original, 'jpeg', self.destination, sizes=(('preview', 512),), draft=False)
+        with Image.open(self.destination('preview', False)) as image:
+            full = list(image.convert('L').getdata())
+        self.assertLess(max(abs(a - b) for a, b in zip(drafted, full)), 16)
+
+    def test_small_png(self):
+        """
+        Test images smaller than a size aren't made bigger, and transparency is kept
+        """
+        original = os.path.join(self.tmpdir.name, 'original.data')
+        image = gradient(300, 100)
+        image.putalpha(128)
+        image.save(original, 'PNG')
+        make_derivatives(original, 'png', self.destination)
+        with Image.open(self.destination('screen', False)) as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertEqual(image.size, (300, 100))
+        with Image.open(self.destination('thumbnail', True)) as image:
+            self.assertEqual(image.size, (128, 43))
+            self.assertEqual(image.mode, 'RGBA')
@@ -0,0 +1,72 @@
+"""
+Tests for reading where and when photos were taken
+"""
+import io
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from PIL import ExifTags, Image
+
+from .exif import read_exif
+
+
+def photo(gps=None, exif_ifd=None):
+    """
+    A small JPEG, with the GPS and Exif IFDs given
+    """
+    exif = Image.Exif()
+    if gps is not None:
+        exif[ExifTags.IFD.GPSInfo] = gps
+    if exif_ifd is not None:
+        exif[ExifTags.IFD.Exif] = exif_ifd
+    output = io.BytesIO()
+    Image.new('RGB', (16, 16)).save(output, 'JPEG', exif=exif)
+    return output.getvalue()
+
+
+GPS = {1: 'S', 2: (43.0, 30.0, 36.0), 3: 'E', 4: (172.0, 37.0, 12.0), 5: b'\x00', 6: 120.5, 7: (1.0, 2.0, 3.0), 29: '2024:05:06'}
+
+
+class ExifTestCase(unittest.TestCase):
+    """
+    Test the position and time are read from EXIF
+    """
+    def test_position(self):
+        # pylint: disable=E0633
+        """
+        Test degrees/minutes/seconds are converted, and S/W are negative
+        """
+        metadata = read_exif(io.BytesIO(photo(gps=GPS)))
+        longitude, latitude = metadata['position']
+        self.assertAlmostEqual(longitude, 172.62)
+        self.assertAlmostEqual(latitude, -43.51)
+        self.assertEqual(metadata['altitude'], 120.5)
+        metadata = read_exif(io.BytesIO(photo(gps={**GPS, 1: 'N', 3: 'W', 5: b'\x01'})))
+        longitude, latitude = metadata['position']
+        self.assertAlmostEqual(longitude, -172.62)
+        self.assertAlmostEqual(latitude, 43.51)
+        self.assertEqual(metadata['altitude'], -120.5)
+
+    def test_time(self):
+        """
+        Test the time is the original time with its offset, then the GPS time
+        """
+        metadata = read_exif(io.BytesIO(photo(gps=GPS, exif_ifd={0x9003: '2024:05:06 13:02:03', 0x9011: '+12:00'})))
+        self.assertEqual(metadata['taken_at'], datetime(2024, 5, 6, 1, 2, 3, tzinfo=timezone.utc))
+        self.assertEqual(metadata['taken_at'].utcoffset(), timedelta(hours=12))
+        metadata = read_exif(io.BytesIO(photo(gps=GPS, exif_ifd={0x9003: '2024:05:06 14:00:00'})))
+        self.assertEqual(metadata['taken_at'], datetime(2024, 5, 6, 1, 2, 3, tzinfo=timezone.utc))
+        metadata = read_exif(io.BytesIO(photo(exif_ifd={0x9003: '2024:05:06 14:00:00'})))
+        self.assertEqual(metadata['taken_at'].replace(tzinfo=None), datetime(2024, 5, 6, 14))
+        self.assertIsNotNone(metadata['taken_at'].tzinfo)
+        self.assertIsNone(metadata['position'])
+
+    def test_missing(self):
+        """
+        Test photos without EXIF (or that aren't photos) have nothing
+        """
+        empty = {'position': None, 'altitude': None, 'taken_at': None}
+        self.assertEqual(read_exif(io.BytesIO(photo())), empty)
+        self.assertEqual(read_exif(io.BytesIO(b'not a photo')), empty)
+        self.assertEqual(read_exif(io.BytesIO(photo(gps={1: 'S', 2: (43.0, 30.0, 36.0)}))), empty)
+        self.assertEqual(read_exif(io.BytesIO(photo(gps={**GPS, 2: (95.0, 0.0, 0.0)})))['position'], None)
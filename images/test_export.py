@@ -0,0 +1,79 @@
+"""
+Tests for streaming zip files of images
+"""
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from .export import _geojson_index, _kml_index, zip_stream
+from .models import GeoImage
+from .storage import CHUNK_SIZE
+
+
+class ZipStreamTestCase(SimpleTestCase):
+    """
+    Test zip files are made as they're sent
+    """
+    def test_zip_stream(self):
+        """
+        Test files are stored a chunk at a time, and the result is a valid zip file
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'photo.data')
+            content = os.urandom(CHUNK_SIZE * 5 + 10)
+            with open(path, 'wb') as photo:
+                photo.write(content)
+
+            def entries():
+                yield 'images/1.jpg', path
+                yield 'images/2.jpg', path
+                yield 'index.geojson', b'{"type": "FeatureCollection", "features": []}' * 100
+
+            chunks = list(zip_stream(entries()))
+
+        # Nothing near the size of a whole image is kept in memory
+        self.assertLess(max(len(chunk) for chunk in chunks), CHUNK_SIZE * 2)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), ['images/1.jpg', 'images/2.jpg', 'index.geojson'])
+            self.assertEqual(archive.read('images/2.jpg'), content)
+            self.assertEqual(archive.getinfo('images/1.jpg').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo('index.geojson').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_index_chunks(self):
+        """
+        Test the index is written to the zip as it's made, not made all at once first
+        """
+        user = get_user_model()(username='test')
+        made = []
+
+        def images():
+            for i in range(2000):
+                made.append(i)
+                image = GeoImage(pk=i, description=os.urandom(20).hex(), geo=Point(172.5, -43.5), created_at=timezone.now(), created_by=user)
+                yield image, f'images/{i}.jpg'
+
+        # How many images had been added to the index when each part of the zip was sent
+        sent_after = []
+        chunks = []
+        for chunk in zip_stream([('index.geojson', _geojson_index(images()))]):
+            if chunk:
+                sent_after.append(len(made))
+                chunks.append(chunk)
+
+        self.assertLess(sent_after[0], 2000)
+        self.assertGreater(len(chunks), 2)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            index = json.loads(archive.read('index.geojson'))
+            self.assertEqual(len(index['features']), 2000)
+            self.assertEqual(index['features'][1999]['properties']['file'], 'images/1999.jpg')
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(zip_stream([('index.kml', _kml_index(images()))])))) as archive:
+            self.assertEqual(archive.read('index.kml').decode().count('<Placemark>'), 2000)
@@ -0,0 +1,98 @@
+"""
+Tests for storing and serving image files
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .models import GeoImage
+from .storage import derivative_path, original_path, store_upload
+from .view_helpers import image_etag, image_file_response, parse_content_range
+
+
+class StorageTestCase(SimpleTestCase):
+    """
+    Test images are stored by their contents, and sent with the right headers
+    """
+    def setUp(self):
+        # pylint: disable=R1732
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        settings = override_settings(IMAGE_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.factory = RequestFactory()
+
+    def test_store(self):
+        """
+        Test uploads are stored by hash, in sharded directories, only once
+        """
+        content = b'not really a jpeg' * 1000
+        content_hash = store_upload(SimpleUploadedFile('test.jpg', content))
+        self.assertEqual(content_hash, hashlib.sha256(content).hexdigest())
+        image = GeoImage(pk=1, content_hash=content_hash)
+        path = original_path(image)
+        self.assertEqual(path, os.path.join(self.root, 'full', content_hash[:2], content_hash[2:4], f'{content_hash}.data'))
+        with open(path, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+        self.assertEqual(store_upload(SimpleUploadedFile('again.jpg', content)), content_hash)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [f'{content_hash}.data'])
+        self.assertEqual(os.listdir(os.path.join(self.root, 'tmp')), [])
+        self.assertEqual(derivative_path(image, 'thumbnail', webp=True),
+                         os.path.join(self.root, 'thumbnail', content_hash[:2], content_hash[2:4], f'{content_hash}.webp'))
+
+    def test_legacy(self):
+        """
+        Test images without a hash are found by their id
+        """
+        image = GeoImage(pk=12)
+        self.assertEqual(original_path(image), os.path.join(self.root, 'full', '12.data'))
+        self.assertEqual(derivative_path(image, 'thumbnail'), os.path.join(self.root, 'thumbnail', '12.data'))
+
+    def test_response(self):
+        """
+        Test the file is sent by django, or by the web server
+        """
+        content_hash = store_upload(SimpleUploadedFile('test.jpg', b'1234'))
+        image = GeoImage(pk=1, content_hash=content_hash)
+        etag = image_etag(image, 'full')
+        request = self.factory.get('/image/1/full/')
+
+        response = image_file_response(request, original_path(image), 'original-1.jpeg', etag)
+        self.assertEqual(b''.join(response.streaming_content), b'1234')
+        self.assertEqual(response['ETag'], f'"{content_hash}-full"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.settings(IMAGE_SENDFILE='x-sendfile'):
+            response = image_file_response(request, original_path(image), 'original-1.jpeg', etag)
+        self.assertEqual(response['X-Sendfile'], os.path.abspath(original_path(image)))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'')
+
+        with self.settings(IMAGE_SENDFILE='x-accel-redirect', IMAGE_ACCEL_REDIRECT_PREFIX='/internal/'):
+            response = image_file_response(request, original_path(image), 'original-1.jpeg', etag)
+        self.assertEqual(response['X-Accel-Redirect'], f'/internal/full/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.data')
+
+        response = image_file_response(self.factory.get('/image/1/full/', HTTP_IF_NONE_MATCH=etag), original_path(image), 'original-1.jpeg', etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = image_file_response(request, original_path(image), 'original-1.jpeg', etag, immutable=False)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        response.close()
+
+    def test_content_range(self):
+        """
+        Test the range of a part of an upload is read from Content-Range
+        """
+        self.assertEqual(parse_content_range('bytes 0-99/1000'), (0, 99, 1000))
+        self.assertEqual(parse_content_range('bytes 900-999/1000'), (900, 999, 1000))
+        for invalid in ('', 'bytes 0-99/*', 'bytes 100-99/1000', 'bytes 0-1000/1000', 'items 0-9/10'):
+            with self.assertRaises(ValueError):
+                parse_content_range(invalid)
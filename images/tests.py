@@ -0,0 +1,215 @@
+"""
+Tests for uploading images
+"""
+import hashlib
+import io
+import os
+import tempfile
+import json
+import zipfile
+from datetime import datetime, timezone
+
+from PIL import Image
+from django.contrib.gis.geos import Point
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+from data.tests import UserDataTestCase
+from jobs.models import Job
+from timeline.models import TimeLineEntry
+from .models import GeoImage, ImageUpload
+from .storage import original_path, store_upload
+from .test_exif import photo, GPS
+from .view_helpers import create_image
+
+
+def jpeg_bytes():
+    """
+    A small JPEG
+    """
+    output = io.BytesIO()
+    Image.linear_gradient('L').convert('RGB').save(output, 'JPEG')
+    return output.getvalue()
+
+
+class ImageUploadTestCase(UserDataTestCase):
+    """
+    Test uploading images in parts
+    """
+    def setUp(self):
+        super().setUp()
+        # pylint: disable=R1732
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings = override_settings(IMAGE_ROOT=tmpdir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = Client()
+        self.client.login(username='test', password='password')
+        self.content = jpeg_bytes()
+
+    def start(self, content=None, client=None, position=True):
+        """
+        Start an upload of content
+        """
+        content = self.content if content is None else content
+        data = {
+            'filename': 'photo.jpg',
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'description': 'Test Image',
+        }
+        if position:
+            data.update({'latitude': -43.5, 'longitude': 172.5})
+        return (client or self.client).post(f'/mission/{self.mission.pk}/image/upload/start/', data)
+
+    def put(self, upload_id, first, last):
+        """
+        Send the bytes first-last (inclusive) of the test image
+        """
+        return self.client.put(f'/image/upload/{upload_id}/', self.content[first:last + 1], content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {first}-{last}/{len(self.content)}')
+
+    def test_upload(self):
+        """
+        Test an image uploaded in parts (with a resend) becomes an image
+        """
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['id']
+        size = len(self.content)
+        half = size // 2
+        self.assertEqual(self.put(upload_id, 0, half - 1).json()['received'], half)
+        self.assertEqual(self.put(upload_id, half, half + 99).json()['received'], half + 100)
+        self.assertEqual(self.client.get(f'/image/upload/{upload_id}/').json()['received'], half + 100)
+        # Parts can overlap what has been received (i.e. resent after the connection dropped)
+        self.assertEqual(self.put(upload_id, half + 50, size - 1).json()['received'], size)
+
+        response = self.client.post(f'/image/upload/{upload_id}/finish/')
+        self.assertEqual(response.status_code, 200)
+        image = GeoImage.objects.get(pk=response.json()['image'])
+        self.assertEqual(image.description, 'Test Image')
+        self.assertEqual(image.original_format, 'jpeg')
+        self.assertEqual(image.mission, self.mission)
+        self.assertAlmostEqual(image.geo.x, 172.5)
+        with open(original_path(image), 'rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        # Finishing again gives the same image
+        self.assertEqual(self.client.post(f'/image/upload/{upload_id}/finish/').json()['image'], image.pk)
+
+    def test_gap(self):
+        """
+        Test parts can't leave a gap, and an upload can't be finished early
+        """
+        upload_id = self.start().json()['id']
+        response = self.put(upload_id, 100, 199)
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.json()['received'], 0)
+        self.put(upload_id, 0, 99)
+        self.assertEqual(self.client.post(f'/image/upload/{upload_id}/finish/').status_code, 400)
+        self.assertEqual(self.client.put(f'/image/upload/{upload_id}/', b'1234', content_type='application/octet-stream').status_code, 400)
+
+    def test_checksum(self):
+        """
+        Test a file that doesn't match its checksum is rejected, and has to be sent again
+        """
+        upload_id = self.start(content=self.content[:-1] + b'\0').json()['id']
+        self.put(upload_id, 0, len(self.content) - 1)
+        self.assertEqual(self.client.post(f'/image/upload/{upload_id}/finish/').status_code, 400)
+        self.assertEqual(ImageUpload.objects.get(pk=upload_id).received, 0)
+        self.assertFalse(GeoImage.objects.exists())
+
+    def test_not_allowed(self):
+        """
+        Test only mission members can upload, and only to their own uploads
+        """
+        other = Client()
+        other.login(username='test2', password='password')
+        self.assertEqual(self.start(client=other).status_code, 404)
+        upload_id = self.start().json()['id']
+        self.assertEqual(other.get(f'/image/upload/{upload_id}/').status_code, 404)
+        self.assertEqual(other.post(f'/image/upload/{upload_id}/finish/').status_code, 404)
+
+    def test_exif(self):
+        """
+        Test the position and time in an image's EXIF are used, and one is needed without a position
+        """
+        upload = SimpleUploadedFile('photo.jpg', photo(gps=GPS))
+        response = self.client.post(f'/mission/{self.mission.pk}/image/upload/', {'file': upload, 'description': 'EXIF'})
+        self.assertEqual(response.status_code, 302)
+        image = GeoImage.objects.get(description='EXIF')
+        self.assertAlmostEqual(image.geo.x, 172.62)
+        self.assertAlmostEqual(image.geo.y, -43.51)
+        self.assertEqual(image.alt, 120)
+        self.assertEqual(image.created_at, datetime(2024, 5, 6, 1, 2, 3, tzinfo=timezone.utc))
+
+        upload = SimpleUploadedFile('photo.jpg', self.content)
+        response = self.client.post(f'/mission/{self.mission.pk}/image/upload/', {'file': upload, 'description': 'No EXIF'})
+        self.assertEqual(response.status_code, 400)
+        # It isn't left in the store
+        self.assertFalse(os.path.exists(original_path(GeoImage(content_hash=hashlib.sha256(self.content).hexdigest()))))
+        upload_id = self.start(position=False).json()['id']
+        self.put(upload_id, 0, len(self.content) - 1)
+        self.assertEqual(self.client.post(f'/image/upload/{upload_id}/finish/').status_code, 400)
+        self.assertFalse(GeoImage.objects.filter(description__in=('No EXIF', 'Test Image')).exists())
+
+    def test_import(self):
+        """
+        Test importing a zip file of photos
+        """
+        # pylint: disable=R1732
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        source = os.path.join(tmpdir.name, 'photos.zip')
+        with zipfile.ZipFile(source, 'w') as archive:
+            archive.writestr('DCIM/0001.JPG', photo(gps=GPS))
+            archive.writestr('DCIM/0002.JPG', photo(gps={**GPS, 2: (43.0, 31.0, 0.0)}))
+            archive.writestr('DCIM/0003.JPG', self.content)
+            archive.writestr('DCIM/notes.txt', b'not a photo')
+        output = io.StringIO()
+        call_command('import_images', self.mission.pk, 'test', source, processes=1, batch=1, stdout=output, stderr=io.StringIO())
+        self.assertIn('Imported 2 photos, skipped 1', output.getvalue())
+        images = GeoImage.objects.filter(mission=self.mission).order_by('description')
+        self.assertEqual([image.description for image in images], ['0001.JPG', '0002.JPG'])
+        self.assertAlmostEqual(images[1].geo.y, -43.516667)
+        self.assertEqual(images[0].original_format, 'jpeg')
+        self.assertEqual(TimeLineEntry.objects.filter(mission=self.mission, event_type='add').count(), 2)
+        self.assertEqual(Job.objects.filter(mission=self.mission).count(), 2)
+        with open(original_path(images[0]), 'rb') as stored:
+            self.assertEqual(stored.read(), photo(gps=GPS))
+        # Skipped photos aren't stored
+        self.assertFalse(os.path.exists(original_path(GeoImage(content_hash=hashlib.sha256(self.content).hexdigest()))))
+
+        # Photos without a position can be put somewhere
+        call_command('import_images', self.mission.pk, 'test', source, processes=1, latitude=-43.5, longitude=172.5,
+                     description='Drone', stdout=output, stderr=io.StringIO())
+        self.assertEqual(GeoImage.objects.filter(description='Drone').count(), 3)
+
+    def test_export(self):
+        """
+        Test downloading the images in a mission as a zip file
+        """
+        content_hash = store_upload(SimpleUploadedFile('photo.jpg', self.content))
+        image = create_image(self.mission, self.user, 'Exported', Point(172.5, -43.5), 'jpeg', content_hash)
+        important = create_image(self.mission, self.user, 'Important', Point(172.6, -43.6), 'jpeg', content_hash)
+        important.priority = True
+        important.save()
+
+        response = self.client.get(f'/mission/{self.mission.pk}/image/export/all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.read(f'images/{image.pk}.jpg'), self.content)
+            index = json.loads(archive.read('index.geojson'))
+            self.assertEqual([feature['properties']['description'] for feature in index['features']], ['Exported', 'Important'])
+            self.assertEqual(index['features'][0]['geometry']['coordinates'], [172.5, -43.5])
+            self.assertIn('Exported', archive.read('index.kml').decode())
+
+        response = self.client.get(f'/mission/{self.mission.pk}/image/export/important/')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), [f'images/{important.pk}.jpg', 'index.geojson', 'index.kml'])
+
+        client = Client()
+        client.login(username='test2', password='password')
+        self.assertEqual(client.get(f'/mission/{self.mission.pk}/image/export/all/').status_code, 404)
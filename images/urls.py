@@ -9,10 +9,17 @@ from . import views
 
 urlpatterns = [
     re_path(r'^mission/(?P<mission_id>\d+)/image/upload/$', views.image_upload, name='image_upload'),
+    re_path(r'^mission/(?P<mission_id>\d+)/image/upload/start/$', views.image_upload_start, name='image_upload_start'),
+    re_path(r'^image/upload/(?P<upload_id>\d+)/$', views.image_upload_part, name='image_upload_part'),
+    re_path(r'^image/upload/(?P<upload_id>\d+)/finish/$', views.image_upload_finish, name='image_upload_finish'),
     re_path(r'^mission/(?P<mission_id>\d+)/image/list/all/$', views.images_list_all, name='images_list_all'),
     re_path(r'^mission/(?P<mission_id>\d+)/image/list/important/$', views.images_list_important, name='images_list_important'),
+    re_path(r'^mission/(?P<mission_id>\d+)/image/export/all/$', views.images_export, {'important': False}, name='images_export_all'),
+    re_path(r'^mission/(?P<mission_id>\d+)/image/export/important/$', views.images_export, {'important': True}, name='images_export_important'),
     re_path(r'^image/(?P<image_id>\d+)/full/$', views.image_get_full, name='image_get_full'),
-    re_path(r'^image/(?P<image_id>\d+)/thumbnail/$', views.image_get_thumbnail, name='image_get_thumbnail'),
+    re_path(r'^image/(?P<image_id>\d+)/thumbnail/$', views.image_get_derivative, {'size': 'thumbnail'}, name='image_get_thumbnail'),
+    re_path(r'^image/(?P<image_id>\d+)/preview/$', views.image_get_derivative, {'size': 'preview'}, name='image_get_preview'),
+    re_path(r'^image/(?P<image_id>\d+)/screen/$', views.image_get_derivative, {'size': 'screen'}, name='image_get_screen'),
     re_path(r'^image/(?P<image_id>\d+)/priority/set/$', views.image_priority_set, name='image_priority_set'),
     re_path(r'^image/(?P<image_id>\d+)/priority/unset/$', views.image_priority_unset, name='image_priority_unset'),
 
@@ -1,10 +1,23 @@
 """
 Helpers for dealing with views related to images
 """
+import mimetypes
+import os
+import re
 
-from PIL import Image
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
 
+from django.contrib.gis.geos import Point
+
+from jobs.models import Job
+
+from .exif import read_exif
+from .jobs import make_image_derivatives
 from .models import GeoImage
+from .storage import image_root, original_path, store_upload
 
 
 def map_ext(ext):
@@ -19,19 +32,95 @@ def map_ext(ext):
 def upload_image_file(mission_user, description, point, file):
     """
     Store an uploaded image file
+    Raises ValueError if there's no position for it (before it's stored)
     """
-    # Create an entry in the database for this file
     filename = file.name
     ext = map_ext(filename.split('.')[-1])
+    if point is None and read_exif(file)['position'] is None:
+        raise ValueError("The image has no position")
+
+    return create_image(mission_user.mission, mission_user.user, description, point, ext, store_upload(file))
+
 
-    image = GeoImage(mission=mission_user.mission, created_by=mission_user.user, description=description, geo=point, original_format=ext)
+def create_image(mission, user, description, point, ext, content_hash):
+    # pylint: disable=R0913,R0917
+    """
+    Create the image for a stored file
+
+    The position and time it was taken are used from its EXIF when it has them,
+    otherwise point (where it was uploaded from) and now.
+    Raises ValueError if there's no position for it at all
+    """
+    image = GeoImage(mission=mission, created_by=user, description=description, geo=point, original_format=ext, content_hash=content_hash)
+    image_from_exif(image, read_exif(original_path(image)))
+    if image.geo is None:
+        raise ValueError("The image has no position")
     image.save()
-    full_image = f'images/full/{image.pk}.data'
-    with open(full_image, 'wb') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
-    # Create a thumbnail of the image too
-    original = Image.open(full_image)
-    thumbnail = original.copy()
-    thumbnail.thumbnail((128, 128))
-    thumbnail.save(f'images/thumbnail/{image.pk}.data', ext)
+    # Create the smaller sizes in the background, so big images don't hold up the upload
+    Job.enqueue(make_image_derivatives, image.pk, mission=mission, created_by=user)
+    return image
+
+
+def image_from_exif(image, metadata):
+    """
+    Set the position/altitude and time of an image from what its EXIF had (see images.exif.read_exif)
+    """
+    if metadata['position'] is not None:
+        image.geo = Point(*metadata['position'])
+        image.alt = None if metadata['altitude'] is None else round(metadata['altitude'])
+    if metadata['taken_at'] is not None:
+        image.created_at = metadata['taken_at']
+    return image
+
+
+def parse_content_range(value):
+    """
+    Get (first byte, last byte, total size) from a Content-Range header (bytes first-last/total)
+    """
+    match = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+)', value.strip())
+    if match is None:
+        raise ValueError(f"Invalid Content-Range: {value}")
+    first, last, total = (int(group) for group in match.groups())
+    if first > last or last >= total:
+        raise ValueError(f"Invalid Content-Range: {value}")
+    return first, last, total
+
+
+def image_etag(image, variant):
+    """
+    The (strong) ETag of a variant (i.e. full or thumbnail-webp) of an image
+    """
+    return f'"{image.content_hash or image.pk}-{variant}"'
+
+
+def image_file_response(request, path, filename, etag, immutable=True):
+    """
+    Respond with a stored image file
+
+    The web server can be asked to send the file itself (settings.IMAGE_SENDFILE),
+    so a python worker isn't held up while it's sent:
+    - 'x-sendfile': Apache (mod_xsendfile) and lighttpd, with the full path of the file
+    - 'x-accel-redirect': nginx, with the path in settings.IMAGE_ACCEL_REDIRECT_PREFIX (an internal location for image_root())
+
+    The file for an immutable response never changes, so browsers can keep it
+    without asking again (the etag is used if they do)
+    """
+    sendfile = getattr(settings, 'IMAGE_SENDFILE', None)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    elif sendfile in ('x-sendfile', 'x-accel-redirect'):
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+        if sendfile == 'x-sendfile':
+            response['X-Sendfile'] = os.path.abspath(path)
+        else:
+            prefix = getattr(settings, 'IMAGE_ACCEL_REDIRECT_PREFIX', '/protected/images/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + os.path.relpath(path, image_root()).replace(os.sep, '/')
+    else:
+        response = FileResponse(open(path, 'rb'), filename=filename)  # pylint: disable=R1732
+    response['ETag'] = etag
+    if immutable:
+        patch_cache_control(response, private=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -2,26 +2,36 @@
 Views for dealing with images uploaded by users
 
 """
+import os
 
-from django.http import HttpResponseBadRequest, HttpResponseRedirect, FileResponse, HttpResponse, HttpResponseNotAllowed
+from PIL import Image
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.gis.geos import Point
+from django.utils.cache import patch_vary_headers
 
-from mission.decorators import mission_is_member, mission_is_member_no_variable
+from mission.decorators import mission_is_member, mission_is_member_no_variable, mission_user_get
 from data.decorators import data_get_mission_id
 from data.view_helpers import to_geojson
 from timeline.helpers import timeline_record_image_priority_changed
 
 from .decorators import image_from_id
-from .forms import UploadImageForm
-from .view_helpers import upload_image_file
-from .models import GeoImage
+from .exif import read_exif
+from .export import export_entries, zip_stream
+from .forms import StartImageUploadForm, UploadImageForm
+from .storage import derivative_path, file_hash, original_path, store_file, upload_path, write_part
+from .view_helpers import create_image, image_etag, image_file_response, map_ext, parse_content_range, upload_image_file
+from .models import GeoImage, ImageUpload
 
 
 @mission_is_member
 def image_upload(request, mission_user):
     """
     All users (probably an asset) to upload an image with a location (and description)
+    The location is optional when the image has one in its EXIF
     """
     if request.method == 'POST':
         form = UploadImageForm(request.POST, request.FILES)
@@ -29,17 +39,123 @@ def image_upload(request, mission_user):
             latitude = request.POST.get('latitude')
             longitude = request.POST.get('longitude')
             point = None
-            try:
-                point = Point(float(longitude), float(latitude))
-            except (ValueError, TypeError):
-                return HttpResponseBadRequest('Invalid lat/long')
+            if latitude or longitude:
+                try:
+                    point = Point(float(longitude), float(latitude))
+                except (ValueError, TypeError):
+                    return HttpResponseBadRequest('Invalid lat/long')
 
-            upload_image_file(mission_user, form.cleaned_data['description'], point, request.FILES['file'])
+            try:
+                upload_image_file(mission_user, form.cleaned_data['description'], point, request.FILES['file'])
+            except ValueError:
+                return HttpResponseBadRequest('No lat/long, and the image has no position')
             return HttpResponseRedirect(f'/mission/{mission_user.mission.pk}/map/')
 
     return HttpResponseNotAllowed(['POST'])
 
 
+@login_required
+@mission_is_member
+def image_upload_start(request, mission_user):
+    """
+    Start uploading an image in parts (for slow/unreliable connections)
+
+    POST the filename, size (bytes), sha256 (hex) of the whole file,
+    description, latitude and longitude (optional when the image has them in its EXIF). Then PUT each part to the upload
+    url with a Content-Range header (i.e. bytes 0-1048575/6000000),
+    GET the upload url to find out how much has been received (after the
+    connection drops), and POST to finish/ once it's all been sent.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    form = StartImageUploadForm(request.POST)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    if form.cleaned_data['size'] > getattr(settings, 'IMAGE_UPLOAD_MAX_SIZE', 100 * 1024 * 1024):
+        return HttpResponseBadRequest('Image is too big')
+    point = None
+    if form.cleaned_data['latitude'] is not None and form.cleaned_data['longitude'] is not None:
+        point = Point(form.cleaned_data['longitude'], form.cleaned_data['latitude'])
+    upload = ImageUpload.objects.create(
+        mission=mission_user.mission, created_by=request.user, description=form.cleaned_data['description'], geo=point,
+        original_format=map_ext(form.cleaned_data['filename'].split('.')[-1]),
+        size=form.cleaned_data['size'], sha256=form.cleaned_data['sha256'].lower())
+    return JsonResponse(upload.as_object(), status=201)
+
+
+@login_required
+def image_upload_part(request, upload_id):
+    # pylint: disable=R0911
+    """
+    Get the progress of an upload (GET), or add a part to it (PUT)
+
+    A part can start anywhere up to the end of what has been received,
+    if the connection drops part way through a part the bytes that arrived are kept
+    """
+    if request.method == 'GET':
+        return JsonResponse(get_object_or_404(ImageUpload, pk=upload_id, created_by=request.user).as_object())
+    if request.method != 'PUT':
+        return HttpResponseNotAllowed(['GET', 'PUT'])
+    try:
+        first, last, total = parse_content_range(request.headers.get('Content-Range', ''))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    upload = get_object_or_404(ImageUpload, pk=upload_id, created_by=request.user)
+    if upload.image_id is not None:
+        return JsonResponse(upload.as_object())
+    if total != upload.size:
+        return HttpResponseBadRequest('Size does not match the upload')
+    if first > upload.received:
+        # Parts must be sent in order, the client needs to send from received
+        return JsonResponse(upload.as_object(), status=416)
+    # Reading the part can take minutes on a slow connection, so it's written without
+    # holding a database connection in a transaction (or the upload locked)
+    written = write_part(upload.pk, first, request, last - first + 1)
+    with transaction.atomic():
+        upload = ImageUpload.objects.select_for_update().get(pk=upload.pk)
+        # Only count the part if it still follows on from what was received (i.e. a failed finish hasn't started the upload again)
+        if upload.image_id is None and first <= upload.received:
+            upload.received = max(upload.received, first + written)
+            upload.save(update_fields=['received'])
+    return JsonResponse(upload.as_object())
+
+
+@login_required
+def image_upload_finish(request, upload_id):
+    # pylint: disable=R0911
+    """
+    Finish an upload, once all of it has been received
+    The file is checked against the sha256 given when it started, then becomes an image
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    with transaction.atomic():
+        upload = get_object_or_404(ImageUpload.objects.select_for_update(), pk=upload_id, created_by=request.user)
+        if upload.image_id is not None:
+            # Already finished (the response to the last attempt was lost)
+            return JsonResponse(upload.as_object())
+        if upload.received < upload.size:
+            return JsonResponse(upload.as_object(), status=400)
+        mission_user = mission_user_get(upload.mission_id, request.user)
+        path = upload_path(upload.pk)
+        if file_hash(path) != upload.sha256:
+            os.remove(path)
+            upload.received = 0
+            upload.save(update_fields=['received'])
+            return HttpResponseBadRequest('Checksum does not match, upload the file again')
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except (OSError, SyntaxError):
+            return HttpResponseBadRequest('Not an image')
+        if upload.geo is None and read_exif(path)['position'] is None:
+            return HttpResponseBadRequest('No lat/long, and the image has no position')
+        upload.image = create_image(mission_user.mission, request.user, upload.description, upload.geo, upload.original_format,
+                                    store_file(path, upload.sha256))
+        upload.save(update_fields=['image'])
+    return JsonResponse(upload.as_object())
+
+
 @login_required
 @mission_is_member
 def images_list_all(request, mission_user):
@@ -82,6 +198,21 @@ def images_list_important_current(request):
     return to_geojson(GeoImage, GeoImage.all_current_user(request.user, current_only=True).exclude(priority=False))
 
 
+@login_required
+@mission_is_member
+def images_export(request, mission_user, important):
+    """
+    Download the current Images (or only the priority ones) as a zip file, with a GeoJSON and KML index
+    """
+    images = GeoImage.all_current(mission_user.mission)
+    if important:
+        images = images.exclude(priority=False)
+    response = StreamingHttpResponse(zip_stream(export_entries(images)), content_type='application/zip')
+    name = 'important-images' if important else 'images'
+    response['Content-Disposition'] = f'attachment; filename="mission-{mission_user.mission.pk}-{name}.zip"'
+    return response
+
+
 @login_required
 @image_from_id
 @data_get_mission_id(arg_name='image')
@@ -90,18 +221,33 @@ def image_get_full(request, image):
     """
     Return the full sized version of the image
     """
-    return FileResponse(open(f'images/full/{image.pk}.data', 'rb'), filename=f'original-{image.pk}.{image.original_format}')
+    return image_file_response(request, original_path(image), f'original-{image.pk}.{image.original_format}', image_etag(image, 'full'))
 
 
 @login_required
 @image_from_id
 @data_get_mission_id(arg_name='image')
 @mission_is_member_no_variable
-def image_get_thumbnail(request, image):
+def image_get_derivative(request, image, size):
     """
-    Return the thumbnail version of the image
+    Return a smaller version (size) of the image, as WebP if the browser accepts it
+    (or the full sized version, until the smaller versions have been made)
     """
-    return FileResponse(open(f'images/thumbnail/{image.pk}.data', 'rb'), filename=f'thumbnail-{image.pk}.{image.original_format}')
+    # Images from before WebP versions were made only have the original format
+    choices = [(False, image.original_format)]
+    if 'image/webp' in request.headers.get('Accept', ''):
+        choices.insert(0, (True, 'webp'))
+    for webp, ext in choices:
+        path = derivative_path(image, size, webp=webp)
+        if os.path.exists(path):
+            response = image_file_response(request, path, f'{size}-{image.pk}.{ext}', image_etag(image, f'{size}-{ext}'))
+            break
+    else:
+        # This changes once the smaller sizes have been made
+        response = image_file_response(request, original_path(image), f'original-{image.pk}.{image.original_format}',
+                                       image_etag(image, 'full'), immutable=False)
+    patch_vary_headers(response, ('Accept',))
+    return response
 
 
 @login_required
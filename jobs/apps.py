@@ -0,0 +1,13 @@
+"""
+App definition for jobs
+"""
+
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    """
+    Background Jobs App definition
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
@@ -0,0 +1,76 @@
+"""
+Run background jobs (see jobs.models.Job)
+
+This claims queued jobs and runs them in a pool of worker processes,
+more than one copy of this can be run (on one or more servers).
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.models import Job
+
+
+def worker_init():
+    """
+    Set up django in a new worker process
+    """
+    django.setup()
+
+
+def run_job(job_id):
+    """
+    Run a job in a worker process
+    """
+    try:
+        return Job.run_by_id(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Run background jobs
+    """
+    help = 'Run background jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: number of CPUs)')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait between checking for new jobs')
+        parser.add_argument('--stale', type=int, default=3600, help='Seconds a job can run for before it is assumed its worker died')
+        parser.add_argument('--once', action='store_true', help='Exit once there are no more queued jobs')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        # Start workers fresh (rather than forking), so they don't share this process's database connection
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'), initializer=worker_init) as pool:
+            running = {}
+            last_stale_check = 0
+            while True:
+                if time.monotonic() - last_stale_check > 60:
+                    Job.requeue_stale(options['stale'])
+                    last_stale_check = time.monotonic()
+
+                for job_id in Job.claim(limit=processes - len(running)) if len(running) < processes else []:
+                    running[pool.submit(run_job, job_id)] = job_id
+
+                if running:
+                    done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        try:
+                            self.stdout.write(f"Job {job_id}: {future.result()}")
+                        except BrokenProcessPool as error:
+                            # A worker process died, so the whole pool is unusable
+                            Job.retry_or_fail(Job.objects.filter(pk__in=[job_id] + list(running.values())), f"Worker died: {error}")
+                            raise CommandError(f"Worker died running job {job_id}") from error
+                elif options['once']:
+                    return
+                else:
+                    time.sleep(options['poll'])
@@ -0,0 +1,174 @@
+"""
+Models for background jobs
+
+A job is a function (and its arguments) that is run by a worker
+(./manage.py run_workers) instead of inside the request that wanted it.
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+of them can take jobs from the same table without getting the same one.
+"""
+import importlib
+import logging
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from mission.models import Mission
+
+logger = logging.getLogger(__name__)
+
+
+def job_name(func):
+    """
+    The name a job function is stored as (module:qualified.name)
+    """
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def job_function(name):
+    """
+    Find the function for a job name (see job_name)
+    """
+    module_name, qualname = name.split(':', 1)
+    func = importlib.import_module(module_name)
+    for attr in qualname.split('.'):
+        func = getattr(func, attr)
+    return func
+
+
+class Job(models.Model):
+    """
+    A function to be run in the background
+
+    The function is called with args and kwargs (which must be json
+    serializable, so pass primary keys rather than objects), and what it
+    returns (also json serializable) is stored as the result.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    # How many times a job is started before it's given up on
+    MAX_ATTEMPTS = 3
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(default='', blank=True)
+    attempts = models.IntegerField(default=0)
+    mission = models.ForeignKey(Mission, on_delete=models.PROTECT, null=True, blank=True)
+    created_by = models.ForeignKey(get_user_model(), on_delete=models.PROTECT, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.name}): {self.status}"
+
+    def as_object(self):
+        """
+        Convert job to an object that is suitable for returning via JsonResponse
+        """
+        return {
+            'id': self.pk,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error if self.status == self.FAILED else None,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    @classmethod
+    def enqueue(cls, func, *args, mission=None, created_by=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) to be run by a worker
+        """
+        return cls.objects.create(name=job_name(func), args=list(args), kwargs=kwargs, mission=mission, created_by=created_by)
+
+    @classmethod
+    def enqueue_many(cls, func, args_list, mission=None, created_by=None):
+        """
+        Queue func(*args) for each of args_list, in one query
+        """
+        return cls.objects.bulk_create([
+            cls(name=job_name(func), args=list(args), kwargs={}, mission=mission, created_by=created_by) for args in args_list
+        ])
+
+    @classmethod
+    def claim(cls, limit=1):
+        """
+        Take up to limit queued jobs (oldest first) and mark them as running
+        Jobs that another worker is claiming at the same time are skipped
+        """
+        with transaction.atomic():
+            jobs = list(cls.objects.select_for_update(skip_locked=True).filter(status=cls.QUEUED).order_by('pk')[:limit])
+            if jobs:
+                now = timezone.now()
+                cls.objects.filter(pk__in=[job.pk for job in jobs]).update(status=cls.RUNNING, started_at=now, attempts=F('attempts') + 1)
+        return [job.pk for job in jobs]
+
+    @classmethod
+    def retry_or_fail(cls, jobs, error):
+        """
+        Put running jobs back in the queue, or fail them if they've been tried too many times
+        """
+        jobs = jobs.filter(status=cls.RUNNING)
+        jobs.filter(attempts__gte=cls.MAX_ATTEMPTS).update(status=cls.FAILED, error=error, finished_at=timezone.now())
+        return jobs.filter(attempts__lt=cls.MAX_ATTEMPTS).update(status=cls.QUEUED)
+
+    @classmethod
+    def requeue_stale(cls, timeout):
+        """
+        Retry jobs that have been running for longer than timeout (seconds), i.e. the worker running them died
+        """
+        return cls.retry_or_fail(cls.objects.filter(started_at__lt=timezone.now() - timedelta(seconds=timeout)), 'Timed out')
+
+    @classmethod
+    def run_by_id(cls, job_id):
+        """
+        Run a claimed job, and store its result (or why it failed)
+        """
+        job = cls.objects.get(pk=job_id)
+        try:
+            result = job_function(job.name)(*job.args, **job.kwargs)
+        except Exception as error:  # pylint: disable=W0718
+            # Only the message is kept, as it's shown to the user, the traceback is logged
+            logger.exception("Job %s (%s) failed", job_id, job.name)
+            cls.objects.filter(pk=job_id).update(status=cls.FAILED, error=str(error) or type(error).__name__, finished_at=timezone.now())
+            return cls.FAILED
+        cls.objects.filter(pk=job_id).update(status=cls.DONE, result=result, finished_at=timezone.now())
+        return cls.DONE
+
+    @classmethod
+    def run_queued(cls):
+        """
+        Run all the queued jobs in this process (for tests, and running without workers)
+        """
+        count = 0
+        while True:
+            claimed = cls.claim()
+            if not claimed:
+                return count
+            cls.run_by_id(claimed[0])
+            count += 1
+
+    class Meta:
+        indexes = [
+            # Index for claim, only the queued jobs need to be in it
+            models.Index(fields=['id'], condition=Q(status='queued'), name='jobs_job_queued_idx'),
+            # Index for requeue_stale
+            models.Index(fields=['status', 'started_at']),
+            # Index for listing the jobs in a mission
+            models.Index(fields=['mission', 'created_by', '-created_at']),
+        ]
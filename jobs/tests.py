@@ -0,0 +1,121 @@
+"""
+Tests for background jobs
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from smm.tests import SMMTestUsers
+from mission.tests import MissionFunctions
+
+from .models import Job, job_name, job_function
+
+
+def add_numbers(first, second, negate=False):
+    """
+    A job for the tests
+    """
+    return -(first + second) if negate else first + second
+
+
+def fail():
+    """
+    A job that always fails
+    """
+    raise ValueError("Failed on purpose")
+
+
+class JobsTestCase(TestCase):
+    """
+    Tests for running jobs
+    """
+    def setUp(self):
+        self.smm = SMMTestUsers()
+        self.missions = MissionFunctions(self.smm)
+        self.mission1 = self.missions.create_mission('test mission')
+
+    def test_0001_job_name(self):
+        """
+        Test functions (and static methods) can be found from their job name
+        """
+        self.assertEqual(job_name(add_numbers), 'jobs.tests:add_numbers')
+        self.assertIs(job_function(job_name(add_numbers)), add_numbers)
+        self.assertEqual(job_function(job_name(Job.run_queued)), Job.run_queued)
+
+    def test_0002_run(self):
+        """
+        Test a job is run and its result is stored
+        """
+        job = Job.enqueue(add_numbers, 1, 2, negate=True, mission=self.mission1.get_object(), created_by=self.smm.user1)
+        self.assertEqual(job.status, Job.QUEUED)
+        response = self.smm.client1.get(f'/job/{job.pk}/')
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(Job.run_queued(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, -3)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+
+        response = self.smm.client1.get(f'/job/{job.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'done')
+        self.assertEqual(response.json()['result'], -3)
+        # Only the user that started the job can see it
+        self.assertEqual(self.smm.client2.get(f'/job/{job.pk}/').status_code, 404)
+
+    def test_0003_fail(self):
+        """
+        Test a job that raises an exception is failed, with the reason
+        """
+        job = Job.enqueue(fail, created_by=self.smm.user1)
+        with self.assertLogs('jobs.models', 'ERROR') as logs:
+            self.assertEqual(Job.run_queued(), 1)
+        self.assertIsNotNone(logs.records[0].exc_info)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        # Just the message, not the traceback
+        self.assertEqual(job.error, 'Failed on purpose')
+        self.assertIn('Failed on purpose', self.smm.client1.get(f'/job/{job.pk}/').json()['error'])
+
+    def test_0004_claim(self):
+        """
+        Test jobs are claimed oldest first, and only once
+        """
+        jobs = [Job.enqueue(add_numbers, i, i) for i in range(3)]
+        self.assertEqual(Job.claim(limit=2), [jobs[0].pk, jobs[1].pk])
+        self.assertEqual(Job.claim(limit=2), [jobs[2].pk])
+        self.assertEqual(Job.claim(), [])
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 3)
+
+    def test_0005_requeue_stale(self):
+        """
+        Test jobs whose worker died are retried, then given up on
+        """
+        job = Job.enqueue(add_numbers, 1, 2)
+        for attempt in range(1, Job.MAX_ATTEMPTS + 1):
+            self.assertEqual(Job.claim(), [job.pk])
+            self.assertEqual(Job.requeue_stale(60), 0)
+            Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=120))
+            self.assertEqual(Job.requeue_stale(60), 1 if attempt < Job.MAX_ATTEMPTS else 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, Job.MAX_ATTEMPTS)
+        self.assertEqual(Job.claim(), [])
+
+    def test_0006_list(self):
+        """
+        Test listing the jobs a user has started in a mission
+        """
+        mission = self.mission1.get_object()
+        first = Job.enqueue(add_numbers, 1, 2, mission=mission, created_by=self.smm.user1)
+        Job.run_queued()
+        second = Job.enqueue(add_numbers, 3, 4, mission=mission, created_by=self.smm.user1)
+        Job.enqueue(add_numbers, 5, 6, mission=mission, created_by=self.smm.user2)
+        url = f'/mission/{mission.pk}/job/list/'
+        response = self.smm.client1.get(url)
+        self.assertEqual([job['id'] for job in response.json()['jobs']], [second.pk])
+        response = self.smm.client1.get(url, data={'all': 1})
+        self.assertEqual([job['id'] for job in response.json()['jobs']], [second.pk, first.pk])
+        self.assertEqual(self.smm.client2.get(url).status_code, 404)
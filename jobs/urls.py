@@ -0,0 +1,13 @@
+"""
+URLs for background jobs
+
+This is mapped in at the top level
+"""
+
+from django.urls import re_path
+from . import views
+
+urlpatterns = [
+    re_path(r'^job/(?P<job_id>\d+)/$', views.job_status, name='job_status'),
+    re_path(r'^mission/(?P<mission_id>\d+)/job/list/$', views.job_list, name='job_list'),
+]
@@ -0,0 +1,32 @@
+"""
+Views for checking on background jobs
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from mission.decorators import mission_is_member
+from .models import Job
+
+
+@login_required
+def job_status(request, job_id):
+    """
+    Get the status (and result, once it's done) of a job the user started
+    """
+    job = get_object_or_404(Job, pk=job_id, created_by=request.user)
+    return JsonResponse(job.as_object())
+
+
+@login_required
+@mission_is_member
+def job_list(request, mission_user):
+    """
+    Get the status of the jobs the user has started in this mission (newest first)
+    Only unfinished jobs are included unless all is set
+    """
+    jobs = Job.objects.filter(mission=mission_user.mission, created_by=request.user).order_by('-created_at')
+    if not request.GET.get('all'):
+        jobs = jobs.filter(status__in=(Job.QUEUED, Job.RUNNING))
+    return JsonResponse({'jobs': [job.as_object() for job in jobs[:100]]})
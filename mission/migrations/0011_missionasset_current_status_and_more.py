@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def forward_func(apps, schema_editor):
+    # Point each mission asset at its most recent status
+    MissionAsset = apps.get_model('mission', 'missionasset')
+    MissionAssetStatus = apps.get_model('mission', 'missionassetstatus')
+    latest = MissionAssetStatus.objects.filter(mission_asset=OuterRef('pk')).order_by('-since', '-pk').values('pk')[:1]
+    MissionAsset.objects.update(current_status=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mission', '0010_missionorganization_permissions_organization_add_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='missionasset',
+            name='current_status',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='current_for', to='mission.missionassetstatus'),
+        ),
+        migrations.AddIndex(
+            model_name='missionassetstatus',
+            index=models.Index(fields=['mission_asset', '-since'], name='mission_mis_mission_cc7f29_idx'),
+        ),
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+    ]
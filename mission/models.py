@@ -2,7 +2,8 @@
 Models for missions (and mission membership)
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -121,6 +122,8 @@ class MissionAsset(models.Model):
     added = models.DateTimeField(default=timezone.now)
     remover = models.ForeignKey(get_user_model(), on_delete=models.PROTECT, related_name='remover%(app_label)s_%(class)s_related', null=True, blank=True)
     removed = models.DateTimeField(null=True, blank=True)
+    # The most recent MissionAssetStatus (kept up to date by MissionAssetStatus.save)
+    current_status = models.ForeignKey('MissionAssetStatus', on_delete=models.SET_NULL, null=True, blank=True, related_name='current_for')
 
 
 class MissionAssetType(models.Model):
@@ -187,20 +190,27 @@ class MissionAssetStatus(models.Model):
     def __str__(self):
         return f'{self.mission_asset.asset.name} is {self.status.name}'
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Only replace the current status with a newer one (another status may have been set at the same time)
+            updated = MissionAsset.objects.filter(pk=self.mission_asset_id).filter(Q(current_status__isnull=True) | Q(current_status__since__lte=self.since)) \
+                .update(current_status=self)
+        if updated and MissionAssetStatus.mission_asset.is_cached(self):
+            self.mission_asset.current_status = self
+
     @classmethod
     def current_for_asset(cls, mission_asset):
         """
         Get the most recent status for a mission asset
         """
-        try:
-            return cls.objects.filter(mission_asset=mission_asset).latest('since')
-        except cls.DoesNotExist:
-            return None
+        return cls.objects.filter(current_for=mission_asset).select_related('status').first()
 
     class Meta:
         indexes = [
             models.Index(fields=['mission_asset']),
             models.Index(fields=['since']),
+            models.Index(fields=['mission_asset', '-since']),
         ]
 
 
@@ -2,11 +2,15 @@
 Tests for mission asset status
 """
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from assets.models import Asset
 from assets.tests import AssetsHelpers
 
 from organization.tests import OrganizationFunctions
 
-from .models import MissionAssetStatusValue
+from .models import MissionAsset, MissionAssetStatus, MissionAssetStatusValue
 from .tests import MissionBaseTestCase
 
 
@@ -146,3 +150,33 @@ class MissionAssetsTestCase(MissionBaseTestCase):
         org.add_user(user=self.smm.user2, client=self.smm.client1, role='R')
         res = self.set_mission_asset_status(mission, self.asset, status_value1, client=self.smm.client2)
         self.assertEqual(res.status_code, 200)
+
+    def test_0020_check_asset_list_queries(self):
+        """
+        Check listing the assets in a mission doesn't query for each asset
+        """
+        mission = self.missions.create_mission('test asset list')
+        mission.add_asset(self.asset)
+        status_value1 = self.create_status_value('test1')
+        status_value2 = self.create_status_value('test2')
+        self.set_mission_asset_status(mission, self.asset, status_value1)
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = mission.get_asset_list(include_removed=True)
+            return len(queries), response.json()['assets']
+
+        queries, assets = list_queries()
+        self.assertEqual(assets[0]['status']['status'], status_value1.name)
+
+        assets = Asset.objects.bulk_create([Asset(name=f'asset-{i}', asset_type=self.asset_type, owner=self.smm.user1) for i in range(99)])
+        mission_assets = MissionAsset.objects.bulk_create([
+            MissionAsset(mission=mission.get_object(), asset=asset, creator=self.smm.user1) for asset in assets
+        ])
+        for mission_asset in mission_assets:
+            MissionAssetStatus.objects.create(mission_asset=mission_asset, status=status_value1)
+            MissionAssetStatus.objects.create(mission_asset=mission_asset, status=status_value2)
+        self.assertEqual(list_queries()[0], queries)
+        assets = list_queries()[1]
+        self.assertEqual(len(assets), 100)
+        self.assertEqual(sorted({asset['status']['status'] for asset in assets}), [status_value1.name, status_value2.name])
@@ -403,6 +403,7 @@ class MissionAssetsView(View):
             assets = MissionAsset.objects.filter(mission=mission_user.mission)
         else:
             assets = MissionAsset.objects.filter(mission=mission_user.mission, removed__isnull=True)
+        assets = assets.select_related('asset__icon', 'asset__asset_type__icon', 'current_status__status')
         assets_json = []
         for mission_asset in assets:
             asset_data = {
@@ -412,7 +413,9 @@ class MissionAssetsView(View):
                 'type_name': mission_asset.asset.asset_type.name,
                 'icon_url': mission_asset.asset.icon_url(),
             }
-            if asset_status := MissionAssetStatus.current_for_asset(mission_asset):
+            if asset_status := mission_asset.current_status:
+                # Already fetched
+                asset_status.mission_asset = mission_asset
                 asset_data['status'] = asset_status.as_object()
             assets_json.append(asset_data)
 
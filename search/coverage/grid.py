@@ -0,0 +1,177 @@
+#!/usr/bin/python3
+"""
+Functions for a grid of search coverage
+
+- Find the grid cells swept by a line (line_cells)
+- Accumulate coverage in a grid, kept in blocks of cells (CoverageGrid)
+- Convert coverage to probability of detection (pod)
+
+Coverage is the number of times a cell has been swept, one pass at the
+sweep width gives a coverage of 1. The probability of detection uses the
+exponential detection function, POD = 1 - e^-coverage.
+
+Cell (row, col) is cell_size meters square, covering
+col * cell_size <= x < (col + 1) * cell_size (and the same for row/y)
+in a local projection (see search.polygon.projection).
+"""
+import numpy as np
+
+# Limit the size of the arrays used when finding the cells for long lines
+CHUNK_CELLS = 1 << 22
+# Cells along each side of a block of the grid (how it's kept, and stored)
+BLOCK_SIZE = 256
+
+
+def pod(coverage):
+    """ Returns the probability of detection for coverage """
+    return 1 - np.exp(-np.asarray(coverage))
+
+
+def _split_line(pts, max_length):
+    """ Returns the start and end of each piece of the line (N x 2 each),
+    with long segments split into pieces no longer than max_length """
+    starts, ends = pts[:-1], pts[1:]
+    lengths = np.hypot(*(ends - starts).T)
+    pieces = np.maximum(np.ceil(lengths / max_length).astype(np.int64), 1)
+    segment = np.repeat(np.arange(len(starts)), pieces)
+    # Where each piece starts/ends along its segment (0 to 1)
+    offset = np.arange(len(segment)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    start_frac = (offset / pieces[segment])[:, np.newaxis]
+    end_frac = ((offset + 1) / pieces[segment])[:, np.newaxis]
+    direction = ends[segment] - starts[segment]
+    return starts[segment] + start_frac * direction, starts[segment] + end_frac * direction
+
+
+def line_cells(pts, radius, cell_size):
+    """ Returns the cells (K x 2 array of row, col) whose centers are within
+    radius of the line through pts (N x 2, in meters)
+
+    The radius is at least half a cell, so a line always marks a strip of
+    cells. Every piece of the line is checked against the same size window
+    of cells, so all of them are checked at once with numpy. """
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    if len(pts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    if len(pts) == 1:
+        pts = np.vstack((pts, pts))
+    radius = max(float(radius), cell_size / 2)
+    max_length = 4 * max(radius, cell_size)
+    starts, ends = _split_line(pts, max_length)
+
+    # The window of cells around each piece, with a spare cell each side for rounding
+    window = int(np.ceil((max_length + 2 * radius) / cell_size)) + 2
+    offsets = np.arange(window)
+    first_col = np.floor((np.minimum(starts[:, 0], ends[:, 0]) - radius) / cell_size - 0.5).astype(np.int64)
+    first_row = np.floor((np.minimum(starts[:, 1], ends[:, 1]) - radius) / cell_size - 0.5).astype(np.int64)
+
+    cells = []
+    chunk = max(1, CHUNK_CELLS // (window * window))
+    for i in range(0, len(starts), chunk):
+        start, end = starts[i:i + chunk], ends[i:i + chunk]
+        cols = first_col[i:i + chunk, np.newaxis] + offsets
+        rows = first_row[i:i + chunk, np.newaxis] + offsets
+        # Cell centers relative to the start of each piece (pieces x rows x cols)
+        rel_x = ((cols + 0.5) * cell_size - start[:, 0:1])[:, np.newaxis, :]
+        rel_y = ((rows + 0.5) * cell_size - start[:, 1:2])[:, :, np.newaxis]
+        direction = end - start
+        length_sq = np.sum(direction ** 2, axis=1)
+        safe_length_sq = np.where(length_sq > 0, length_sq, 1)[:, np.newaxis, np.newaxis]
+        along = (rel_x * direction[:, 0, np.newaxis, np.newaxis] + rel_y * direction[:, 1, np.newaxis, np.newaxis]) / safe_length_sq
+        along = np.clip(along, 0, 1)
+        dist_sq = (rel_x - along * direction[:, 0, np.newaxis, np.newaxis]) ** 2 + (rel_y - along * direction[:, 1, np.newaxis, np.newaxis]) ** 2
+        piece, row, col = np.nonzero(dist_sq <= radius * radius)
+        cells.append(np.column_stack((rows[piece, row], cols[piece, col])))
+    cells = np.concatenate(cells)
+    # Pack each cell into one integer, a 1d unique is much faster than unique rows
+    col_min = cells[:, 1].min()
+    col_span = cells[:, 1].max() - col_min + 1
+    keys = np.unique((cells[:, 0] - cells[:, 0].min()) * col_span + (cells[:, 1] - col_min))
+    return np.column_stack((keys // col_span + cells[:, 0].min(), keys % col_span + col_min))
+
+
+def _group(keys):
+    """ Returns each unique row of keys (K x 2), and the indexes of the rows with it """
+    low = keys.min(axis=0)
+    span = keys[:, 1].max() - low[1] + 1
+    packed = (keys[:, 0] - low[0]) * span + (keys[:, 1] - low[1])
+    unique, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+    return [((int(key // span + low[0]), int(key % span + low[1])), group) for key, group in zip(unique, groups)]
+
+
+def cell_blocks(cells):
+    """ Returns the blocks (row, col) that the cells (K x 2 array of row, col) are in """
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    if len(cells) == 0:
+        return []
+    return [key for key, _ in _group(cells // BLOCK_SIZE)]
+
+
+class CoverageGrid:
+    """
+    The cumulative coverage of a grid of cells
+
+    The cells are kept in blocks of BLOCK_SIZE x BLOCK_SIZE, block (row, col)
+    has the cells from (row * BLOCK_SIZE, col * BLOCK_SIZE). Only the blocks
+    that have had coverage added are kept, so searches far apart don't need
+    the (empty) cells between them.
+    """
+    def __init__(self, cell_size, blocks=None):
+        self.cell_size = cell_size
+        self.blocks = {} if blocks is None else blocks
+
+    def copy(self):
+        """ Returns a copy of this grid """
+        return CoverageGrid(self.cell_size, {key: block.copy() for key, block in self.blocks.items()})
+
+    def add(self, cells, coverage=1.0):
+        """ Add coverage to each of the cells (K x 2 array of row, col)
+        Returns the blocks (row, col) that were changed """
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        if len(cells) == 0:
+            return []
+        changed = []
+        for key, group in _group(cells // BLOCK_SIZE):
+            block = self.blocks.get(key)
+            if block is None:
+                block = self.blocks[key] = np.zeros((BLOCK_SIZE, BLOCK_SIZE), dtype=np.float32)
+            np.add.at(block, (cells[group, 0] % BLOCK_SIZE, cells[group, 1] % BLOCK_SIZE), coverage)
+            changed.append(key)
+        return changed
+
+    def at(self, x, y):
+        """ Returns the coverage at each of the points (x, y arrays, in meters) """
+        rows = np.floor(np.asarray(y) / self.cell_size).astype(np.int64)
+        cols = np.floor(np.asarray(x) / self.cell_size).astype(np.int64)
+        values = np.zeros(rows.shape, dtype=np.float32)
+        if rows.size == 0 or not self.blocks:
+            return values
+        cells = np.column_stack((rows.ravel(), cols.ravel()))
+        flat = values.reshape(-1)
+        for key, group in _group(cells // BLOCK_SIZE):
+            block = self.blocks.get(key)
+            if block is not None:
+                flat[group] = block[cells[group, 0] % BLOCK_SIZE, cells[group, 1] % BLOCK_SIZE]
+        return values
+
+    def cells(self):
+        """ Returns the row, col and coverage of each cell with coverage """
+        found = [(np.nonzero(block), key, block) for key, block in self.blocks.items()]
+        rows = [row + key[0] * BLOCK_SIZE for (row, _), key, _ in found]
+        cols = [col + key[1] * BLOCK_SIZE for (_, col), key, _ in found]
+        values = [block[row, col] for (row, col), _, block in found]
+        if not found:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+    def max(self):
+        """ Returns the most coverage of any cell """
+        return max((float(block.max()) for block in self.blocks.values()), default=0.0)
+
+    def extent(self):
+        """ Returns (xmin, ymin, xmax, ymax) in meters of the cells with coverage """
+        rows, cols, _ = self.cells()
+        if len(rows) == 0:
+            return (0, 0, 0, 0)
+        return (int(cols.min()) * self.cell_size, int(rows.min()) * self.cell_size,
+                (int(cols.max()) + 1) * self.cell_size, (int(rows.max()) + 1) * self.cell_size)
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""
+Functions to show a coverage grid on a map
+
+- The lon/lat bounds of a grid (grid_bounds)
+- The local bounds of a lon/lat area (local_bounds)
+- GeoJSON of the covered cells (coverage_geojson)
+- A PNG image of the probability of detection (coverage_png)
+- A PNG web map tile of the probability of detection (coverage_tile_png)
+- A transparent PNG for tiles with no coverage (empty_tile_png)
+"""
+import io
+import numpy as np
+from PIL import Image
+from search.coverage.grid import pod
+from search.polygon.projection import local_to_lonlat, lonlat_to_local
+from tiles.mercator import tile_bounds, tile_lat
+
+# Largest width/height of the PNG overlay
+MAX_PNG_SIZE = 2048
+# Pixels between the points that are projected exactly
+PNG_STEP = 16
+# Opacity of the overlay where the POD is 1
+MAX_ALPHA = 220
+# Width/height of a web map tile
+TILE_SIZE = 256
+
+
+def _edges(xmin, ymin, xmax, ymax):
+    """ Returns points along the edges of a rectangle """
+    steps = np.linspace(0, 1, 17)
+    return np.concatenate((
+        np.column_stack((xmin + (xmax - xmin) * steps, np.full_like(steps, ymin))),
+        np.column_stack((xmin + (xmax - xmin) * steps, np.full_like(steps, ymax))),
+        np.column_stack((np.full_like(steps, xmin), ymin + (ymax - ymin) * steps)),
+        np.column_stack((np.full_like(steps, xmax), ymin + (ymax - ymin) * steps))))
+
+
+def grid_bounds(grid, center):
+    """ Returns (west, south, east, north) of the grid on a projection centered on center (lon, lat) """
+    # The edges of the grid can bulge out, so check along them not just the corners
+    lonlat = local_to_lonlat(_edges(*grid.extent()), center)
+    return (float(lonlat[:, 0].min()), float(lonlat[:, 1].min()),
+            float(lonlat[:, 0].max()), float(lonlat[:, 1].max()))
+
+
+def local_bounds(bounds, center):
+    """ Returns (xmin, ymin, xmax, ymax) in meters on a projection centered on center (lon, lat)
+    of bounds (west, south, east, north) """
+    local = lonlat_to_local(_edges(*bounds), center)
+    return (float(local[:, 0].min()), float(local[:, 1].min()),
+            float(local[:, 0].max()), float(local[:, 1].max()))
+
+
+def coverage_geojson(grid, center, step=1):
+    """ Returns a GeoJSON FeatureCollection (dict) of the cells with coverage,
+    step x step cells are combined (using their average coverage) to make fewer features """
+    row, col, values = grid.cells()
+    if step > 1 and len(values):
+        # Average over all step x step cells, including the ones without coverage
+        combined = np.column_stack((row // step, col // step))
+        combined, inverse = np.unique(combined, axis=0, return_inverse=True)
+        values = (np.bincount(inverse.ravel(), weights=values) / (step * step)).astype(np.float32)
+        row, col = combined[:, 0], combined[:, 1]
+    size = grid.cell_size * step
+    corners = np.stack((
+        np.column_stack((col * size, row * size)),
+        np.column_stack(((col + 1) * size, row * size)),
+        np.column_stack(((col + 1) * size, (row + 1) * size)),
+        np.column_stack((col * size, (row + 1) * size))), axis=1)
+    corners = np.round(local_to_lonlat(corners.reshape(-1, 2), center).reshape(-1, 4, 2), 6)
+
+    features = [{
+        'type': 'Feature',
+        'properties': {'coverage': round(float(value), 3), 'pod': round(float(pod(value)), 3)},
+        'geometry': {'type': 'Polygon', 'coordinates': [cell.tolist() + [cell[0].tolist()]]},
+    } for cell, value in zip(corners, values)]
+    collection = {'type': 'FeatureCollection', 'features': features}
+    if len(values):
+        collection['bbox'] = grid_bounds(grid, center)
+    return collection
+
+
+def coverage_png(grid, center, color=(0, 160, 0)):
+    # pylint: disable=R0914
+    """ Returns a PNG (bytes) of the probability of detection, the image
+    covers grid_bounds in lon/lat (i.e. for use as an image overlay)
+
+    Cells with no coverage are transparent, the opacity increases with the POD. """
+    west, south, east, north = grid_bounds(grid, center)
+    # About one pixel per cell
+    meters_per_degree = np.pi * 6371008.8 / 180
+    width = int(np.clip((east - west) * meters_per_degree * np.cos(np.radians((north + south) / 2)) / grid.cell_size, 1, MAX_PNG_SIZE))
+    height = int(np.clip((north - south) * meters_per_degree / grid.cell_size, 1, MAX_PNG_SIZE))
+
+    # Project every PNG_STEP'th pixel and interpolate between them, the projection
+    # is smooth enough that this is well under a cell out
+    pixel_x = np.arange(width) + 0.5
+    pixel_y = np.arange(height) + 0.5
+    sample_x = np.append(np.arange(0, width, PNG_STEP), width) + 0.5
+    sample_y = np.append(np.arange(0, height, PNG_STEP), height) + 0.5
+    lon, lat = np.meshgrid(west + sample_x * (east - west) / width, north - sample_y * (north - south) / height)
+    local = lonlat_to_local(np.column_stack((lon.ravel(), lat.ravel())), center).reshape(len(sample_y), len(sample_x), 2)
+    # Interpolate along the sampled rows, then between them
+    col = np.minimum(np.floor(pixel_x / PNG_STEP).astype(np.int64), len(sample_x) - 2)
+    frac_x = ((pixel_x - sample_x[col]) / (sample_x[col + 1] - sample_x[col]))[np.newaxis, :, np.newaxis]
+    local = local[:, col] + (local[:, col + 1] - local[:, col]) * frac_x
+    row = np.minimum(np.floor(pixel_y / PNG_STEP).astype(np.int64), len(sample_y) - 2)
+    frac_y = ((pixel_y - sample_y[row]) / (sample_y[row + 1] - sample_y[row]))[:, np.newaxis, np.newaxis]
+    pts = local[row] + (local[row + 1] - local[row]) * frac_y
+    alpha = np.round(pod(grid.at(pts[:, :, 0], pts[:, :, 1])) * MAX_ALPHA).astype(np.uint8)
+
+    return _alpha_png(alpha, color)
+
+
+def _alpha_png(alpha, color):
+    """ Returns a PNG (bytes) of color, with the opacity of each pixel from alpha (0 to MAX_ALPHA) """
+    # A palette image with the alpha as the index is a quarter the size of RGBA to encode
+    image = Image.fromarray(alpha)
+    image.putpalette(list(color) * (MAX_ALPHA + 1))
+    output = io.BytesIO()
+    image.save(output, format='PNG', transparency=bytes(range(MAX_ALPHA + 1)))
+    return output.getvalue()
+
+
+def coverage_tile_png(grid, center, z, x, y, color=(0, 160, 0)):
+    # pylint: disable=R0913,R0917
+    """ Returns a PNG (bytes) web map tile (z/x/y) of the probability of detection,
+    or None when the grid doesn't reach the tile """
+    west, south, east, north = tile_bounds(z, x, y)
+    grid_west, grid_south, grid_east, grid_north = grid_bounds(grid, center)
+    if west > grid_east or east < grid_west or south > grid_north or north < grid_south:
+        return None
+    # The center of each pixel, latitude isn't linear down a web mercator tile
+    pixels = np.arange(TILE_SIZE) + 0.5
+    lon = west + pixels * (east - west) / TILE_SIZE
+    lat = tile_lat(z, y + pixels / TILE_SIZE)
+    lon, lat = np.meshgrid(lon, lat)
+    pts = lonlat_to_local(np.column_stack((lon.ravel(), lat.ravel())), center)
+    alpha = np.round(pod(grid.at(pts[:, 0], pts[:, 1])) * MAX_ALPHA).astype(np.uint8).reshape(TILE_SIZE, TILE_SIZE)
+    if not alpha.any():
+        return None
+    return _alpha_png(alpha, color)
+
+
+def empty_tile_png():
+    """ Returns a transparent PNG (bytes) for a tile with nothing on it """
+    return _alpha_png(np.zeros((1, 1), dtype=np.uint8), (0, 0, 0))
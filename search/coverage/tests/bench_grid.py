@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the coverage grid module
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.coverage.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+import numpy as np
+from django.contrib.gis.geos import LinearRing
+from search.coverage.grid import BLOCK_SIZE, line_cells, cell_blocks, CoverageGrid
+from search.coverage.overlay import coverage_png
+from search.polygon.convex import creep_line_points
+
+
+class BenchGrid(unittest.TestCase):
+    """ Benchmark adding searches to a coverage grid """
+    def bench(self, func, number=3):
+        """ Return the best time (in seconds) to run func """
+        return min(timeit.repeat(func, number=1, repeat=number))
+
+    def test_mission_300_searches(self):
+        """ Compare rebuilding the coverage of 300 searches with adding one more """
+        rng = np.random.default_rng(1234)
+        searches = []
+        # 5km x 5km creeping line searches, 200m sweep width, spread over 100km x 100km
+        for corner in rng.uniform(-50000, 45000, (300, 2)):
+            x, y = corner
+            lrng = LinearRing(((x, y), (x, y + 5000), (x + 5000, y + 5000), (x + 5000, y), (x, y)))
+            searches.append(creep_line_points(lrng, 200))
+
+        def rebuild():
+            grid = CoverageGrid(50)
+            for pts in searches:
+                grid.add(line_cells(pts, 100, 50))
+            return grid
+
+        grid = rebuild()
+        stored = {key: block.astype('<f4').tobytes() for key, block in grid.blocks.items()}
+
+        def add_one():
+            # As SearchCoverage.add_searches does: load the blocks the search covers, add the cells, store the changed blocks
+            cells = line_cells(searches[0], 100, 50)
+            updated = CoverageGrid(50, {
+                key: np.frombuffer(stored[key], dtype='<f4').reshape(BLOCK_SIZE, BLOCK_SIZE).copy()
+                for key in cell_blocks(cells) if key in stored
+            })
+            return {key: updated.blocks[key].astype('<f4').tobytes() for key in updated.add(cells)}
+
+        print()
+        print(f"grid {len(grid.blocks)} blocks of {BLOCK_SIZE} x {BLOCK_SIZE} cells")
+        print(f"{'rebuild 300 searches':>22} {self.bench(rebuild) * 1000:>10.2f} ms")
+        print(f"{'add 1 search':>22} {self.bench(add_one) * 1000:>10.2f} ms")
+        print(f"{'png overlay':>22} {self.bench(lambda: coverage_png(grid, (172.5, -43.5))) * 1000:>10.2f} ms")
@@ -0,0 +1,33 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the track coverage module
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.coverage.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+import numpy as np
+from django.contrib.gis.geos import LinearRing
+from search.coverage.track import track_coverage
+from search.polygon.convex import creep_line_points
+
+
+class BenchTrack(unittest.TestCase):
+    """ Benchmark comparing a planned search with the track flown """
+    def test_hour_at_1hz(self):
+        """ A 5km x 5km creeping line search, flown for an hour reporting every second """
+        sweep_width = 200
+        lrng = LinearRing(((0, 0), (0, 5000), (5000, 5000), (5000, 0), (0, 0)))
+        planned = np.asarray(creep_line_points(lrng, sweep_width), dtype=np.float64)
+        lengths = np.hypot(*np.diff(planned, axis=0).T)
+        # 3600 positions, at ~36m/s covers the whole search
+        along = np.linspace(0, lengths.sum(), 3600)
+        track = np.column_stack([np.interp(along, np.concatenate(([0], np.cumsum(lengths))), planned[:, i]) for i in range(2)])
+        track += np.random.default_rng(1234).normal(0, 10, track.shape)
+
+        coverage = track_coverage(planned, track, sweep_width)
+        best = min(timeit.repeat(lambda: track_coverage(planned, track, sweep_width), number=1, repeat=5))
+        print()
+        print(f"{len(track)} positions, {coverage * 100:.1f}% covered in {best * 1000:.2f} ms")
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+UnitTests for the coverage grid module
+"""
+
+import io
+import unittest
+import numpy as np
+from PIL import Image
+from search.coverage.grid import pod, cell_blocks, line_cells, CoverageGrid
+from search.coverage.overlay import grid_bounds, coverage_geojson, coverage_png, coverage_tile_png, MAX_ALPHA, TILE_SIZE
+from tiles.mercator import tile_bounds
+
+
+def brute_force_cells(pts, radius, cell_size, extent):
+    """ Check every cell center in extent against every segment """
+    pts = np.asarray(pts, dtype=np.float64)
+    radius = max(radius, cell_size / 2)
+    cells = set()
+    for row in range(extent[0], extent[1]):
+        for col in range(extent[2], extent[3]):
+            center = np.array(((col + 0.5) * cell_size, (row + 0.5) * cell_size))
+            for start, end in zip(pts[:-1], pts[1:]):
+                direction = end - start
+                along = 0 if not direction.any() else np.clip(np.dot(center - start, direction) / np.dot(direction, direction), 0, 1)
+                if np.hypot(*(center - start - along * direction)) <= radius:
+                    cells.add((row, col))
+                    break
+    return cells
+
+
+class TestGrid(unittest.TestCase):
+    """ Test the coverage grid """
+    def test_pod(self):
+        """ Test the probability of detection """
+        self.assertEqual(pod(0), 0)
+        self.assertAlmostEqual(float(pod(1)), 0.632, places=3)
+        self.assertAlmostEqual(float(pod(2)), 0.865, places=3)
+
+    def test_line_cells_straight(self):
+        """ Test a horizontal line marks a strip of cells """
+        cells = line_cells([(0, 0), (1000, 0)], 100, 50)
+        self.assertEqual(set(cells[:, 0].tolist()), {-2, -1, 0, 1})
+        # 20 columns along the line, plus the rounded ends
+        self.assertEqual(len(cells), 4 * 20 + 2 * (4 + 2))
+
+    def test_line_cells_brute_force(self):
+        """ Test the cells match checking every cell against every segment """
+        rng = np.random.default_rng(1234)
+        for _ in range(5):
+            pts = rng.uniform(-2000, 2000, (6, 2))
+            radius = rng.uniform(10, 300)
+            expected = brute_force_cells(pts, radius, 50, (-50, 50, -50, 50))
+            self.assertEqual(set(map(tuple, line_cells(pts, radius, 50).tolist())), expected)
+
+    def test_line_cells_small_radius(self):
+        """ Test a line narrower than a cell still marks a strip of cells """
+        cells = line_cells([(0, 25), (1000, 25)], 1, 50)
+        self.assertEqual(cells.tolist(), [[0, col] for col in range(-1, 21)])
+        self.assertEqual(len(line_cells([(10, 10)], 1, 50)), 1)
+
+    def test_grid_add(self):
+        """ Test adding coverage keeps the blocks it's added to """
+        grid = CoverageGrid(50)
+        self.assertEqual(grid.add([(0, 0), (0, 1)]), [(0, 0)])
+        self.assertEqual(sorted(grid.add([(-2, 1), (0, 1), (0, 1)])), [(-1, 0), (0, 0)])
+        self.assertEqual(sorted(grid.blocks), [(-1, 0), (0, 0)])
+        self.assertEqual(sorted(cell_blocks([(-2, 1), (0, 1), (0, 300)])), [(-1, 0), (0, 0), (0, 1)])
+        self.assertEqual(grid.at(np.array([10, 60, 60, 500]), np.array([10, 10, -90, 10])).tolist(), [1, 3, 1, 0])
+        self.assertEqual(grid.extent(), (0, -100, 100, 50))
+        rows, cols, values = grid.cells()
+        self.assertEqual(sorted(zip(rows.tolist(), cols.tolist(), values.tolist())), [(-2, 1, 1), (0, 0, 1), (0, 1, 3)])
+        self.assertEqual(grid.max(), 3)
+        copy = grid.copy()
+        copy.add([(0, 0)])
+        self.assertEqual(grid.at(np.array([10]), np.array([10])).tolist(), [1])
+
+    def test_grid_far_apart(self):
+        """ Test coverage far apart only keeps the blocks with coverage """
+        grid = CoverageGrid(50)
+        # 500km apart
+        grid.add(line_cells([(0, 0), (1000, 0)], 100, 50))
+        grid.add(line_cells([(500000, 0), (501000, 0)], 100, 50))
+        self.assertEqual(len(grid.blocks), 6)
+        self.assertEqual(grid.extent()[2], 501100)
+        self.assertEqual(grid.at(np.array([500, 250000, 500500]), np.array([0, 0, 0])).tolist(), [1, 0, 1])
+
+    def test_overlay(self):
+        """ Test the GeoJSON and PNG overlays """
+        center = (172.5, -43.5)
+        grid = CoverageGrid(50)
+        grid.add(line_cells([(0, 0), (1000, 0)], 100, 50))
+        grid.add(line_cells([(500, -500), (500, 500)], 100, 50))
+        west, south, east, _ = grid_bounds(grid, center)
+        self.assertLess(west, 172.5)
+        self.assertGreater(east, 172.5 + 1000 / 80000)
+        self.assertLess(south, -43.5 - 500 / 111195)
+
+        geojson = coverage_geojson(grid, center)
+        self.assertEqual(len(geojson['features']), len(grid.cells()[2]))
+        self.assertEqual(max(feature['properties']['coverage'] for feature in geojson['features']), 2)
+        self.assertLess(len(coverage_geojson(grid, center, step=4)['features']), len(geojson['features']))
+        self.assertEqual(coverage_geojson(CoverageGrid(50), center)['features'], [])
+
+        image = Image.open(io.BytesIO(coverage_png(grid, center)))
+        rgba = np.asarray(image.convert('RGBA'))
+        self.assertEqual(rgba[:, :, :3].max(axis=(0, 1)).tolist(), [0, 160, 0])
+        alpha = rgba[:, :, 3]
+        self.assertEqual(alpha[0, 0], 0)
+        self.assertEqual(alpha.max(), round(float(pod(2)) * MAX_ALPHA))
+
+    def test_tile(self):
+        """ Test a PNG tile of the coverage """
+        center = (172.5, -43.5)
+        grid = CoverageGrid(50)
+        grid.add(line_cells([(0, 0), (1000, 0)], 100, 50))
+        # The zoom 14 tile with the center in it
+        z = 14
+        x = int((center[0] + 180) / 360 * 2 ** z)
+        y = int((1 - np.arcsinh(np.tan(np.radians(center[1]))) / np.pi) / 2 * 2 ** z)
+        west, south, east, north = tile_bounds(z, x, y)
+        self.assertTrue(west <= center[0] < east and south <= center[1] < north)
+        image = Image.open(io.BytesIO(coverage_tile_png(grid, center, z, x, y)))
+        self.assertEqual(image.size, (TILE_SIZE, TILE_SIZE))
+        alpha = np.asarray(image.convert('RGBA'))[:, :, 3]
+        self.assertEqual(alpha.max(), round(float(pod(1)) * MAX_ALPHA))
+        # The covered strip is 200m tall, and the tile is ~1.8km
+        covered_rows = np.count_nonzero(alpha.max(axis=1))
+        self.assertAlmostEqual(covered_rows / TILE_SIZE, 200 / ((north - south) * 111195), delta=0.02)
+        # Tiles away from the coverage are empty
+        self.assertIsNone(coverage_tile_png(grid, center, z, x + 10, y))
+        self.assertIsNone(coverage_tile_png(CoverageGrid(50), center, z, x, y))
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""
+UnitTests for the track coverage module
+"""
+
+import unittest
+import numpy as np
+from search.coverage.track import track_coverage
+
+
+class TestTrack(unittest.TestCase):
+    """ Test comparing the planned search with the actual track """
+    def setUp(self):
+        # A creeping line, 5 legs of 1km, 200m apart
+        self.planned = np.array([(0, 0), (1000, 0), (1000, 200), (0, 200), (0, 400), (1000, 400), (1000, 600), (0, 600), (0, 800), (1000, 800)], dtype=np.float64)
+
+    def test_same_track(self):
+        """ Test flying exactly the planned line sweeps all of it """
+        self.assertEqual(track_coverage(self.planned, self.planned, 200), 1)
+
+    def test_noisy_track(self):
+        """ Test a track reported every second with some GPS error still sweeps nearly all of it """
+        rng = np.random.default_rng(1234)
+        lengths = np.hypot(*np.diff(self.planned, axis=0).T)
+        along = np.arange(0, lengths.sum(), 30.0)
+        track = np.column_stack([np.interp(along, np.concatenate(([0], np.cumsum(lengths))), self.planned[:, i]) for i in range(2)])
+        track += rng.normal(0, 5, track.shape)
+        self.assertGreater(track_coverage(self.planned, track, 200), 0.95)
+
+    def test_partial_track(self):
+        """ Test stopping part way sweeps part of the search """
+        # The first 2 of 5 legs (and the turn between them)
+        coverage = track_coverage(self.planned, self.planned[:4], 200)
+        self.assertGreater(coverage, 0.35)
+        self.assertLess(coverage, 0.5)
+
+    def test_missed(self):
+        """ Test a track somewhere else sweeps none of the search """
+        self.assertEqual(track_coverage(self.planned, self.planned + (5000, 0), 200), 0)
+        self.assertEqual(track_coverage(self.planned, np.zeros((0, 2)), 200), 0)
+        # A single position only sweeps around it
+        self.assertLess(track_coverage(self.planned, np.array([(500, 0)]), 200), 0.05)
+
+    def test_narrow_sweep(self):
+        """ Test a narrow sweep width needs the track to be closer """
+        offset = self.planned + (0, 15)
+        self.assertLess(track_coverage(self.planned, offset, 20), 0.6)
+        self.assertGreater(track_coverage(self.planned, offset, 200), 0.9)
@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""
+Functions to compare where a search was planned with where the asset went
+
+- How much of the planned search the actual track swept (track_coverage)
+
+Both the planned line and the track are swept sweep_width wide (i.e. buffered
+by half the sweep width each side) on a grid of cells (see
+search.coverage.grid), the coverage is the fraction of planned cells that the
+track also swept.
+"""
+import numpy as np
+from search.coverage.grid import line_cells
+
+# Cells are a quarter of the sweep width, but no smaller than this (in meters)
+MIN_CELL_SIZE = 5
+
+
+def _cell_keys(cells, row0, col0, cols):
+    """ Returns a single integer for each cell (row, col) """
+    return (cells[:, 0] - row0) * cols + (cells[:, 1] - col0)
+
+
+def track_coverage(planned, track, sweep_width):
+    """ Returns the fraction (0 to 1) of the planned line (N x 2, in meters)
+    swept by the track (M x 2, in meters) when both are sweep_width wide """
+    cell_size = max(sweep_width / 4, MIN_CELL_SIZE)
+    planned_cells = line_cells(planned, sweep_width / 2, cell_size)
+    if len(planned_cells) == 0 or len(track) == 0:
+        return 0.0
+    track_cells = line_cells(track, sweep_width / 2, cell_size)
+    row0, col0 = np.minimum(planned_cells.min(axis=0), track_cells.min(axis=0))
+    cols = max(planned_cells[:, 1].max(), track_cells[:, 1].max()) - col0 + 1
+    swept = np.isin(_cell_keys(planned_cells, row0, col0, cols), _cell_keys(track_cells, row0, col0, cols), assume_unique=True)
+    return float(np.count_nonzero(swept)) / len(planned_cells)
@@ -0,0 +1,39 @@
+"""
+Background jobs for searches (see jobs.models.Job)
+"""
+import json
+
+from django.contrib.auth import get_user_model
+
+from assets.models import AssetType
+from data.models import GeoTimeLabel
+from data.view_helpers import geojson_data
+from .models import Search, SearchCoverage
+from .patterns.library import get_pattern
+
+
+def create_search(pattern_name, datum_id, asset_type_id, user_id, sweep_width, values, save):
+    # pylint: disable=R0913,R0917
+    """
+    Create a search from a pattern (see search.patterns), returns the search as geojson
+    (with fallback set if the pattern did something simpler than asked)
+    """
+    datum = GeoTimeLabel.objects.get(pk=datum_id)
+    asset_type = AssetType.objects.get(pk=asset_type_id)
+    user = get_user_model().objects.get(pk=user_id)
+    pattern = get_pattern(pattern_name)(sweep_width, **values)
+    search = Search.create_from_pattern(pattern, datum, user, asset_type, save=save)
+    result = json.loads(geojson_data(Search, [search]))
+    if search.fallback:
+        result['fallback'] = search.fallback
+    return result
+
+
+def update_track_coverage(search_id):
+    """
+    Work out how much of a finished search the asset actually swept,
+    and add any other finished searches that are missing from the mission coverage
+    """
+    search = Search.objects.get(pk=search_id)
+    SearchCoverage.add_missing(search.mission)
+    return search.update_track_coverage()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0027_search_inprogress_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="search",
+            name="orientation",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="search",
+            name="path_length",
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:06
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0028_search_orientation_path_length"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="search",
+            name="start_point",
+            field=django.contrib.gis.db.models.fields.PointField(
+                geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.RunSQL(
+            sql="UPDATE search_search SET start_point = ST_StartPoint(geo::geometry)::geography WHERE start_point IS NULL",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:08
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0029_search_start_point"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="search",
+            name="bbox",
+            field=django.contrib.gis.db.models.fields.PolygonField(
+                null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name="search",
+            name="end_point",
+            field=django.contrib.gis.db.models.fields.PointField(
+                geography=True, null=True, srid=4326
+            ),
+        ),
+        migrations.AlterField(
+            model_name="search",
+            name="path_length",
+            field=models.FloatField(db_index=True, null=True),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "UPDATE search_search SET path_length = ST_Length(geo, false) WHERE path_length IS NULL",
+                "UPDATE search_search SET end_point = ST_EndPoint(geo::geometry)::geography WHERE end_point IS NULL",
+                "UPDATE search_search SET bbox = ST_MakeEnvelope(ST_XMin(geo::geometry), ST_YMin(geo::geometry), ST_XMax(geo::geometry), ST_YMax(geo::geometry), 4326) WHERE bbox IS NULL",
+            ],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
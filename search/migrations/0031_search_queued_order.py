@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0030_search_shape"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="search",
+            name="queued_order",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
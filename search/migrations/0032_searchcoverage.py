@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mission", "0010_missionorganization_permissions_organization_add_and_more"),
+        ("search", "0031_search_queued_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchCoverage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "center",
+                    django.contrib.gis.db.models.fields.PointField(
+                        geography=True, srid=4326
+                    ),
+                ),
+                ("cell_size", models.IntegerField(default=50)),
+                ("row0", models.IntegerField(default=0)),
+                ("col0", models.IntegerField(default=0)),
+                ("rows", models.IntegerField(default=0)),
+                ("cols", models.IntegerField(default=0)),
+                ("coverage", models.BinaryField(default=bytes)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "mission",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="mission.mission",
+                    ),
+                ),
+                (
+                    "searches",
+                    models.ManyToManyField(related_name="coverage", to="search.search"),
+                ),
+            ],
+        ),
+    ]
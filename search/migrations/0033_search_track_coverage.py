@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0032_searchcoverage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="search",
+            name="track_coverage",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+# search.coverage.grid.BLOCK_SIZE when this was written
+BLOCK_SIZE = 256
+
+
+def forward_func(apps, schema_editor):
+    # Split each dense coverage grid into the blocks that have any coverage
+    SearchCoverage = apps.get_model('search', 'searchcoverage')
+    SearchCoverageBlock = apps.get_model('search', 'searchcoverageblock')
+    for coverage in SearchCoverage.objects.filter(rows__gt=0, cols__gt=0):
+        cells = np.frombuffer(bytes(coverage.coverage), dtype='<f4').reshape(coverage.rows, coverage.cols)
+        blocks = {}
+        for row in range(coverage.row0 // BLOCK_SIZE, (coverage.row0 + coverage.rows - 1) // BLOCK_SIZE + 1):
+            for col in range(coverage.col0 // BLOCK_SIZE, (coverage.col0 + coverage.cols - 1) // BLOCK_SIZE + 1):
+                # The part of the grid in this block
+                top, left = max(row * BLOCK_SIZE, coverage.row0), max(col * BLOCK_SIZE, coverage.col0)
+                bottom = min((row + 1) * BLOCK_SIZE, coverage.row0 + coverage.rows)
+                right = min((col + 1) * BLOCK_SIZE, coverage.col0 + coverage.cols)
+                part = cells[top - coverage.row0:bottom - coverage.row0, left - coverage.col0:right - coverage.col0]
+                if part.any():
+                    block = np.zeros((BLOCK_SIZE, BLOCK_SIZE), dtype='<f4')
+                    block[top - row * BLOCK_SIZE:bottom - row * BLOCK_SIZE, left - col * BLOCK_SIZE:right - col * BLOCK_SIZE] = part
+                    blocks[row, col] = block
+        SearchCoverageBlock.objects.bulk_create([
+            SearchCoverageBlock(coverage=coverage, row=row, col=col, cells=block.tobytes())
+            for (row, col), block in blocks.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0033_search_track_coverage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchCoverageBlock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.IntegerField()),
+                ('col', models.IntegerField()),
+                ('cells', models.BinaryField()),
+                ('coverage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='search.searchcoverage')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('coverage', 'row', 'col'), name='search_coverage_block_unique')],
+            },
+        ),
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='searchcoverage',
+            name='col0',
+        ),
+        migrations.RemoveField(
+            model_name='searchcoverage',
+            name='cols',
+        ),
+        migrations.RemoveField(
+            model_name='searchcoverage',
+            name='coverage',
+        ),
+        migrations.RemoveField(
+            model_name='searchcoverage',
+            name='row0',
+        ),
+        migrations.RemoveField(
+            model_name='searchcoverage',
+            name='rows',
+        ),
+    ]
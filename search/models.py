@@ -4,91 +4,61 @@ Models for types of searches
 Each search type has a model to represent it,
 all inherting from the abstract model (SearchPath)
 """
+import functools
 import math
+import operator
 
-from django.db import models, connection as dbconn
-from django.db.models import Func, Q
-from django.contrib.gis.db.models.functions import Distance
-from django.contrib.auth import get_user_model
-from django.contrib.gis.geos import GEOSGeometry, LineString
+import numpy as np
+
+from django.db import connection as dbconn, transaction
+from django.contrib.gis.db import models
+from django.db.models import F, Func, Q, Value
+from django.contrib.gis.geos import Point, Polygon
 from django.utils import timezone
+from haversine import haversine, Unit
 
-from data.models import GeoTime, GeoTimeLabel
+from data.models import GeoTime, GeoTimeLabel, AssetPointTime
 from assets.models import AssetType, Asset
-from search.polygon.convex import creep_line_concave as polygon_creep_line
-from search.polygon.convex import conv_lonlat_to_meters, conv_meters_to_lonlat
+from mission.models import Mission
+from search.patterns.geodesy import geometry_points
+from search.polygon.convex import linestring_from_points, lonlat_path_length, points_from_linestring
+from search.polygon.projection import lonlat_to_local
+from search.planning.assign import assign_searches
+from search.planning.route import plan_route
+from search.coverage.grid import BLOCK_SIZE, CoverageGrid, cell_blocks, line_cells
+from search.coverage.overlay import local_bounds
+from search.coverage.track import track_coverage
 from timeline.helpers import timeline_record_search_queue, timeline_record_search_begin
 
 
-def dictfetchall(cursor):
-    "Return all rows from a cursor as a dict"
-    columns = [col[0] for col in cursor.description]
-    return [
-        dict(zip(columns, row))
-        for row in cursor.fetchall()
-    ]
-
-
-class SearchParams():
+class StartPointDistance(Func):
     """
-    Basic parameters for a search
+    Calculates the distance from a given point to the stored start point of the search
     """
-    def __init__(self, from_geo, asset_type, creator, sweep_width):
-        self._from_geo = from_geo
-        if not isinstance(asset_type, AssetType):
-            raise TypeError("asset_type is not an AssetType")
-        self._asset_type = asset_type
-        if not isinstance(creator, get_user_model()):
-            raise TypeError("creator is not a User")
-        self._creator = creator
-        self._sweep_width = int(sweep_width)
-        if self._sweep_width < 0:
-            raise ValueError("Sweep width must be positive")
-
-    def from_geo(self):
-        """
-        Return the base user geometry used as a reference for the search
-        """
-        return self._from_geo
-
-    def asset_type(self):
-        """
-        Return the asset type that this search applies to
-        """
-        return self._asset_type
+    # pylint: disable=W0223
+    template = "ST_Distance(%(expressions)s, ST_Point(%(x)s,%(y)s,4326)::geography)"
+    output_field = models.FloatField()
 
-    def creator(self):
-        """
-        Return the user who is creating this search
-        """
-        return self._creator
+    def __init__(self, point, **extra):
+        super().__init__(F('start_point'), x=float(point.x), y=float(point.y), **extra)
 
-    def sweep_width(self):
-        """
-        Return the sweep width in meters for this search
-        """
-        return self._sweep_width
 
-
-class FirstPointDistance(Func):
+class StartPointKNN(StartPointDistance):
     """
-    Calculates the distance from a given point to the first point on the search line
+    The KNN (<->) distance from a given point to the stored start point of the search
+
+    Ordering by this lets PostGIS walk the GiST index on start_point
+    instead of calculating the distance to every search.
     """
     # pylint: disable=W0223
-    function = 'ST_Distance'
-
-    def as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
-        # pylint: disable=R0913,R0917
-        point_sql = f"ST_Point({self.extra['point'].x},{self.extra['point'].y},4326)::geography"
-        return super().as_sql(compiler, connection, function='ST_Distance', template="%(function)s(ST_PointN(geo::geometry,1)::geography, " + point_sql + ")",
-                              arg_joiner=arg_joiner, extra_context=extra_context)
+    template = "%(expressions)s <-> ST_Point(%(x)s,%(y)s,4326)::geography"
 
 
 class Search(GeoTime):
     """
     A search that an asset can undertake and complete.
 
-    There are a variety of search types we can handle, each one has it's own create function.
+    There are a variety of search types we can handle, each one is created by a pattern (see search.patterns).
     """
     created_for = models.ForeignKey(AssetType, on_delete=models.PROTECT)
     sweep_width = models.IntegerField()
@@ -99,6 +69,8 @@ class Search(GeoTime):
 
     queued_at = models.DateTimeField(null=True, blank=True)
     queued_for_asset = models.ForeignKey(Asset, on_delete=models.PROTECT, null=True, blank=True, related_name='queued_for_assettype%(app_label)s_%(class)s_related')
+    # Position in the planned route of queued_for_asset (see plan_route_for_asset)
+    queued_order = models.IntegerField(null=True, blank=True)
 
     datum = models.ForeignKey(GeoTimeLabel, on_delete=models.PROTECT)
 
@@ -106,6 +78,14 @@ class Search(GeoTime):
     iterations = models.IntegerField(null=True)
     first_bearing = models.IntegerField(null=True)
     width = models.IntegerField(null=True)
+    orientation = models.IntegerField(null=True)
+    # Searches don't change shape once created, so these are calculated on save
+    path_length = models.FloatField(null=True, db_index=True)
+    start_point = models.PointField(geography=True, null=True)
+    end_point = models.PointField(geography=True, null=True)
+    bbox = models.PolygonField(null=True)
+    # Percentage of this search swept by the track the asset actually flew (see update_track_coverage)
+    track_coverage = models.FloatField(null=True, blank=True)
 
     GEOJSON_FIELDS = (
         'pk',
@@ -127,14 +107,73 @@ class Search(GeoTime):
         'search_type',
         'iterations',
         'first_bearing',
-        'width', )
+        'width',
+        'orientation',
+        'path_length',
+        'start_point',
+        'end_point',
+        'bbox',
+        'track_coverage', )
 
     def distance_from(self, point):
         """
         Calculate the distance (in m) from a point to the start of this search
         """
-        annotated_self = self.__class__.objects.annotate(distance=FirstPointDistance('geo', output_field=models.FloatField(), point=point)).get(pk=self.pk)
-        return annotated_self.distance
+        return haversine((point.y, point.x), (self.start_point.y, self.start_point.x), unit=Unit.METERS)
+
+    def length(self):
+        """
+        The total length (in m) of this search
+        """
+        if self.path_length is None:
+            return super().length()
+        return self.path_length
+
+    def save(self, *args, **kwargs):
+        if self.start_point is None:
+            self.start_point = Point(self.geo[0], srid=4326)
+            self.end_point = Point(self.geo[-1], srid=4326)
+            self.bbox = Polygon.from_bbox(self.geo.extent)
+            self.bbox.srid = 4326
+        if self.path_length is None:
+            self.path_length = lonlat_path_length(self.geo)
+        super().save(*args, **kwargs)
+
+    def actual_track(self):
+        """
+        The positions (N x 2 array of lon, lat) reported by the asset while it was doing this search
+        """
+        asset = self.completed_by or self.inprogress_by
+        if asset is None or self.inprogress_at is None:
+            return np.zeros((0, 2))
+        with dbconn.cursor() as cursor:
+            cursor.execute(
+                "SELECT ST_X(geo::geometry), ST_Y(geo::geometry) FROM data_assetpointtime"
+                " WHERE mission_id = %s AND asset_id = %s AND created_at >= %s AND created_at <= %s"
+                " ORDER BY created_at",
+                [self.mission_id, asset.pk, self.inprogress_at, self.completed_at or timezone.now()])
+            return np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, 2)
+
+    def update_track_coverage(self):
+        """
+        Work out how much (as a percentage) of this search the asset actually swept
+        """
+        center = self.start_point.coords
+        planned = lonlat_to_local(points_from_linestring(self.geo), center)
+        track = lonlat_to_local(self.actual_track(), center)
+        self.track_coverage = 100 * track_coverage(planned, track, self.sweep_width)
+        Search.objects.filter(pk=self.pk).update(track_coverage=self.track_coverage)
+        return self.track_coverage
+
+    @staticmethod
+    def annotate_dispatch(objects, point):
+        """
+        Include the distance (in m) from point to the start of each search (start_distance)
+        and the length (in m) of each search (line_length)
+        """
+        return objects.annotate(
+            start_distance=StartPointDistance(point),
+            line_length=F('path_length'))
 
     @classmethod
     def all_waiting(cls, mission):
@@ -184,31 +223,94 @@ class Search(GeoTime):
         """
         Find the search with the closest starting point
         Only searches that haven't been started or deleted and are for the right asset type are considered
+        The distance and length are included (see annotate_dispatch)
         """
-        try:
-            possibles = cls.all_waiting(mission).filter(created_for=asset_type)
-            return possibles.annotate(distance=Distance('geo', point)).order_by(
-                'distance'
-            )[0]
-        except IndexError:
-            return None
+        possibles = cls.all_waiting(mission).filter(created_for=asset_type)
+        return cls.annotate_dispatch(possibles, point).order_by(StartPointKNN(point)).first()
+
+    @classmethod
+    def find_next(cls, mission, asset, point):
+        """
+        Find the next search for this asset in a single query
+        Order of preference:
+        - Current in progress search for this specific asset
+        - Oldest queued search for this specific asset
+        - Oldest queued search for this asset type
+        - Search for this asset type with the closest starting point
+        Each of these is a LIMIT 1 query (so uses its own index), combined with UNION ALL
+        The distance and length are included (see annotate_dispatch)
+        """
+        waiting = cls.all_waiting(mission)
+        choices = (
+            cls.objects.filter(inprogress_by=asset, mission=mission, completed_at__isnull=True).order_by('pk'),
+            waiting.filter(queued_for_asset=asset, queued_at__isnull=False).order_by(F('queued_order').asc(nulls_last=True), 'queued_at'),
+            waiting.filter(queued_for_asset__isnull=True, created_for_id=asset.asset_type_id, queued_at__isnull=False).order_by('queued_at'),
+            waiting.filter(created_for_id=asset.asset_type_id).order_by(StartPointKNN(point)),
+        )
+        choices = [cls.annotate_dispatch(choice, point).annotate(dispatch_priority=Value(priority))[:1] for priority, choice in enumerate(choices)]
+        return choices[0].union(*choices[1:], all=True).order_by('dispatch_priority').first()
+
+    @classmethod
+    def plan_assignments(cls, mission, asset_type, endurance=None, capacity=1):
+        """
+        Plan which of the waiting searches for asset_type each available asset should do,
+        so the total transit distance (from the last position of each asset) is the smallest
+        Only searches that haven't been queued are considered, assets that are in the mission,
+        have reported a position and don't have a search in progress are available
+
+        Returns a list of (asset, search, transit distance in m)
+        """
+        busy = cls.objects.filter(mission=mission, inprogress_by__isnull=False, completed_at__isnull=True).values('inprogress_by')
+        assets = Asset.objects.filter(missionasset__mission=mission, missionasset__removed__isnull=True, asset_type=asset_type).exclude(pk__in=busy)
+        positions = list(AssetPointTime.objects.filter(mission=mission, asset__in=assets).order_by('asset', '-created_at').distinct('asset').select_related('asset'))
+        searches = list(cls.all_waiting(mission).filter(created_for=asset_type, queued_at__isnull=True))
+
+        assignment = assign_searches(
+            [position.geo.coords for position in positions],
+            [search.start_point.coords for search in searches],
+            search_lengths=[search.path_length for search in searches],
+            endurance=endurance,
+            capacity=capacity)
+        return [(positions[asset].asset, searches[search], transit) for asset, search, transit in assignment]
 
     @classmethod
     def oldest_queued_for_asset(cls, mission, asset):
         """
         Find the oldest queued search for this asset
         Only entries that haven't already been started/deleted are considered
+        Searches in the planned route (see plan_route_for_asset) come first, in route order
         """
         try:
             return (
                 cls.all_waiting(mission)
                 .filter(queued_for_asset=asset)
                 .filter(queued_at__isnull=False)
-                .order_by('queued_at')[0]
+                .order_by(F('queued_order').asc(nulls_last=True), 'queued_at')[0]
             )
         except IndexError:
             return None
 
+    @classmethod
+    def plan_route_for_asset(cls, mission, asset, point, save=False):
+        """
+        Plan the order for this asset to do the searches queued for it, starting from point,
+        so the total transit (from the end of each search to the start of the next) is short
+        When save is True the order is stored so oldest_queued_for_asset follows it
+
+        Returns a list of (search, transit distance in m before starting it)
+        """
+        searches = list(cls.all_waiting(mission).filter(queued_for_asset=asset, queued_at__isnull=False))
+        order, legs = plan_route(
+            point.coords,
+            [search.start_point.coords for search in searches],
+            [search.end_point.coords for search in searches])
+        route = [(searches[index], float(leg)) for index, leg in zip(order, legs)]
+        if save:
+            for position, (search, _) in enumerate(route):
+                search.queued_order = position
+            cls.objects.bulk_update([search for search, _ in route], ['queued_order'])
+        return route
+
     @classmethod
     def oldest_queued_for_asset_type(cls, mission, asset_type):
         """
@@ -267,237 +369,25 @@ class Search(GeoTime):
         return self.check_and_record_delete(time)
 
     @staticmethod
-    def create_sector_search(params, save=False):
-        """
-        Create a sector search centered on the given point
-
-        Sector searches are good for finding something when you knew it was at the datum
-        very recently (with a few minutes of the search starting).
-        A series of equilateral triangles with sides of length no greater than 3x sweep width.
-        Each of the triangles has one point on the datum and the other 2 points on a circle
-        centered on the datum.
-        Each triangle starts 30 degress from the previous one, but they are run in an order
-        such that (where possible) the line that connects to the datum continues to start a
-        new triangle on the opposite side.
-        There are 3 sets of 3 triangles that make up the full set. The first triangles have
-        courses (position on clock face)
-        000 (12 o'clock)
-        120 (2 o'clock)
-        240 (datum)
-        240 (8 o'clock)
-        000 (10 o'clock)
-        120 (datum)
-        120 (4 o'clock)
-        240 (6 o'clock)
-        000 (datum)
-        The next set start offset 30 degrees (030, 150, 270, etc)
-        """
-        # calculate the points on the outside of a circle
-        # that are sweep_width * 3 from the poi
-        # with angles: 30,60,90,120,150,180,210,240,270,300,330,360
-        # this order makes the points in clock-order
-        query = "SELECT geo"
-        for deg in (30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330, 0):
-            query += ", ST_Project(geo, {sw}, radians({deg})) AS deg_{deg}".format(**{'sw': params.sweep_width() * 3, 'deg': deg})
-        query += f" FROM data_geotimelabel WHERE id = {params.from_geo().pk}"
-        cursor = dbconn.cursor()
-        cursor.execute(query)
-        reference_points = cursor.fetchone()
-
-        # Create a SectorSector
-        points_order = [0, 12, 2, 8, 10, 4, 6, 0, 1, 3, 9, 11, 5, 7, 0, 2, 4, 10, 12, 6, 8, 0]
-        points = [GEOSGeometry(reference_points[point]) for point in points_order]
-        search = Search(
-            geo=LineString(points),
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            mission=params.from_geo().mission,
-            search_type='Sector')
-        if save:
-            search.save()
-
-        return search
-
-    @staticmethod
-    def create_expanding_box_search(params, save=False):
-        """
-        An expanding box search from a given point (datum).
-
-        Expanding box searches are good for finding something when you know it was at the datum
-        recently (within the last hour)
-
-        A series of straight lines that form a continuous path that expands outwards
-        from the datum.
-        Each pair of perpendicular lines are n*sweep width (where n is whole number
-        that increases every second direction change)
-        If the search starts 000 and the sweep width is 100m then it would have lines:
-        course (length)
-        000 (100m)
-        090 (100m)
-        180 (200m)
-        270 (200m)
-        000 (300m)
-        090 (300m)
-        180 (400m)
-        270 (400m)
-        And so on, for as many iterations as required (iterations here are groups of 4 lines)
-
-        Expanding boxes have a mathematical property that makes it easy to calculate the
-        ends of any line without knowing all the previous ones.
-        The first point (b) is 1 sweep width in the starting direction from the datum (a).
-        Now all subsequent points expand outwards on a 45 degree angle from either a or b.
-        The second, third, forth line all end (start direction +) 45, 135, 225 degrees from
-        a, and the fifth line ends (start direction +) 315 degrees, all sqrt(2) * i * sweep
-        width (where i is the iteration number) from the reference point (a or b respectively).
-        """
-        query = "SELECT p.geo, p.first"
-        for i in range(1, params.iterations() + 1):
-            dist = math.sqrt(2) * i * params.sweep_width()
-            query += f", ST_Project(p.geo, {dist}, radians({45 + params.first_bearing()}))"
-            query += f", ST_Project(p.geo, {dist}, radians({135 + params.first_bearing()}))"
-            query += f", ST_Project(p.geo, {dist}, radians({225 + params.first_bearing()}))"
-            query += f", ST_Project(p.first, {dist}, radians({315 + params.first_bearing()}))"
-
-        query += f" FROM (SELECT geo, ST_Project(geo, {params.sweep_width()}, radians({params.first_bearing()})) AS first FROM data_geotimelabel WHERE id = {params.from_geo().pk}) AS p"
-
-        cursor = dbconn.cursor()
-        cursor.execute(query)
-        points = [GEOSGeometry(p) for p in cursor.fetchone()]
-
-        search = Search(
-            geo=LineString(points),
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            iterations=params.iterations(),
-            first_bearing=params.first_bearing(),
-            mission=params.from_geo().mission,
-            search_type='Expanding Box')
-        if save:
-            search.save()
-
-        return search
-
-    @staticmethod
-    def create_track_line_search(params, save=False):
-        """
-        A track line search following a line.
-
-        Track line searches are useful for checking a path known to be travelled.
-        No math required, the search has exactly the same points as the reference line.
-        """
-        search = Search(
-            geo=params.from_geo().geo,
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            mission=params.from_geo().mission,
-            search_type='Track Line')
-        if save:
-            search.save()
-        return search
-
-    @staticmethod
-    def create_shore_line_search(params, save=False):
-        """
-        A shore line search following a line.
-
-        Shore line searches are useful for checking a shore line.
-        No math required, the search has exactly the same points as the reference line.
-        """
-        search = Search(
-            geo=params.from_geo().geo,
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            mission=params.from_geo().mission,
-            search_type='Shore Line')
-        if save:
-            search.save()
-        return search
-
-    @staticmethod
-    def create_track_line_creeping_search(params, save=False):
-        """
-        A creeping line ahead search following a line.
-
-        A creeping line ahead search (also called a parallel track search) is useful
-        for searching a large area methodically.
-        This specific implementation centers the search on a line and runs the search
-        perpendicular to the line so that runs half the width either side of the line,
-        and steps sweep width along the line for each each pass.
-        """
-        segment_query = \
-            "SELECT ST_PointN(geo::geometry, pos)::geography AS start, ST_PointN(geo::geometry, pos + 1)::geography AS end" \
-            f" FROM data_geotimelabel, generate_series(1, ST_NPoints(geo::geometry) - 1) AS pos WHERE id = {params.from_geo().pk}"
-
-        line_data_query = \
-            f"SELECT segment.start AS start, ST_Azimuth(segment.start::geometry, segment.end::geometry) AS direction, ST_Distance(segment.start, segment.end) AS distance FROM ({segment_query}) AS segment"
-        line_points_query = \
-            f"SELECT direction AS direction, ST_Project(linedata.start, {params.sweep_width()} * i, direction) AS point"\
-            f" FROM ({line_data_query}) AS linedata, generate_series(0, (linedata.distance/{params.sweep_width()})::integer) AS i"
-        query = \
-            f"SELECT ST_Project(point, {params.width()}, direction + PI()/2) AS A, ST_Project(point, {params.width()}, direction - PI()/2) AS B FROM ({line_points_query}) AS linepoints;"
-
-        cursor = dbconn.cursor()
-        cursor.execute(query)
-        db_points = dictfetchall(cursor)
-
-        points = []
-        reverse = False
-        for segment in db_points:
-            if reverse:
-                points.extend((GEOSGeometry(segment['b']), GEOSGeometry(segment['a'])))
-                reverse = False
-            else:
-                points.extend((GEOSGeometry(segment['a']), GEOSGeometry(segment['b'])))
-                reverse = True
-
-        search = Search(
-            geo=LineString(points),
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            width=params.width(),
-            mission=params.from_geo().mission,
-            search_type='Creeping Line')
-        if save:
-            search.save()
-
-        return search
-
-    @staticmethod
-    def create_polygon_creeping_line_search(params, save=False):
+    def create_from_pattern(pattern, datum, creator, asset_type, save=False):
         """
-        A polygon search for a given area (LinearRing).
+        Create a search from datum (a GeoTimeLabel) with a pattern (see search.patterns)
 
-        Creates a search that sweeps across a polygon
+        The search's fallback is set when the pattern couldn't make the search
+        as asked (and did something simpler), otherwise it's None.
         """
-        poly = params.from_geo().geo
-        lrng_lonlat = poly[0]
-
-        skew_point = lrng_lonlat[0]
-        lrng_meters = conv_lonlat_to_meters(lrng_lonlat)
-
-        sweep_width = params.sweep_width()
-
-        line_meters = polygon_creep_line(lrng_meters, sweep_width)
-        line_lonlat = conv_meters_to_lonlat(line_meters, skew_point)
-
+        geo = linestring_from_points(pattern.points(geometry_points(datum.geo)), srid=4326)
         search = Search(
-            geo=line_lonlat,
-            created_by=params.creator(),
-            datum=params.from_geo(),
-            created_for=params.asset_type(),
-            sweep_width=params.sweep_width(),
-            mission=params.from_geo().mission,
-            search_type='Parallel Line')
+            geo=geo,
+            created_by=creator,
+            datum=datum,
+            created_for=asset_type,
+            sweep_width=pattern.sweep_width,
+            path_length=lonlat_path_length(geo),
+            mission=datum.mission,
+            search_type=pattern.search_type,
+            **pattern.search_fields())
+        search.fallback = pattern.fallback
         if save:
             search.save()
         return search
@@ -521,47 +411,135 @@ class Search(GeoTime):
         ]
 
 
-class ExpandingBoxSearchParams(SearchParams):
+class SearchCoverage(models.Model):
     """
-    Parameters for an expanding box search
+    The coverage of the completed searches in a mission
+
+    Stored as a grid (see search.coverage.grid) on a projection centered on
+    the first search that was added, a block of cells at a time (see
+    SearchCoverageBlock). Each search is added once (when it's finished) so
+    only the blocks that search covers are updated, and only the blocks in
+    the area that's asked for (i.e. a map tile) are read.
     """
-    def __init__(self, from_geo, asset_type, creator, sweep_width, iterations, first_bearing):
-        # pylint: disable=R0913,R0917
-        super().__init__(from_geo, asset_type, creator, sweep_width)
-        self._iterations = int(iterations)
-        if self._iterations < 1:
-            raise ValueError("Iterations must be at least 1")
-        self._first_bearing = int(first_bearing)
-        if self._first_bearing < 0 or self._first_bearing > 360:
-            raise ValueError("First bearing must be between 0 and 360")
+    mission = models.OneToOneField(Mission, on_delete=models.PROTECT)
+    center = models.PointField(geography=True)
+    cell_size = models.IntegerField(default=50)
+    searches = models.ManyToManyField(Search, related_name='coverage')
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def grid(self, area=None, blocks=None):
+        """
+        The coverage grid, only the blocks in area (xmin, ymin, xmax, ymax in meters on the projection)
+        or only blocks (a list of (row, col)) when given
+        """
+        stored = self.blocks.all()
+        if area is not None:
+            xmin, ymin, xmax, ymax = (math.floor(value / (self.cell_size * BLOCK_SIZE)) for value in area)
+            stored = stored.filter(row__gte=ymin, row__lte=ymax, col__gte=xmin, col__lte=xmax)
+        if blocks is not None:
+            if not blocks:
+                return CoverageGrid(self.cell_size)
+            stored = stored.filter(functools.reduce(operator.or_, (Q(row=row, col=col) for row, col in blocks)))
+        return CoverageGrid(self.cell_size, {
+            (block.row, block.col): np.frombuffer(bytes(block.cells), dtype='<f4').reshape(BLOCK_SIZE, BLOCK_SIZE).copy()
+            for block in stored
+        })
+
+    def save_blocks(self, grid, blocks):
+        """
+        Store the blocks (a list of (row, col)) of the coverage grid
+        """
+        SearchCoverageBlock.objects.bulk_create([
+            SearchCoverageBlock(coverage=self, row=row, col=col, cells=grid.blocks[row, col].astype('<f4').tobytes())
+            for row, col in blocks
+        ], update_conflicts=True, unique_fields=['coverage', 'row', 'col'], update_fields=['cells'])
 
-    def iterations(self):
+    @staticmethod
+    def search_cells(search, center, cell_size):
         """
-        Return the number of complete squares to perform for this search
+        The cells swept by a search (sweep_width wide along the search)
         """
-        return self._iterations
+        pts = lonlat_to_local(points_from_linestring(search.geo), center)
+        return line_cells(pts, search.sweep_width / 2, cell_size)
+
+    @classmethod
+    def add_searches(cls, mission, searches):
+        """
+        Add the coverage of finished searches to the mission coverage
+        Searches that have already been added are skipped
+        """
+        searches = list(searches)
+        if not searches:
+            return cls.objects.filter(mission=mission).first()
+        with transaction.atomic():
+            coverage, _ = cls.objects.select_for_update().get_or_create(mission=mission, defaults={'center': searches[0].start_point})
+            added = set(coverage.searches.filter(pk__in=[search.pk for search in searches]).values_list('pk', flat=True))
+            searches = [search for search in searches if search.pk not in added]
+            if searches:
+                cells = [cls.search_cells(search, coverage.center.coords, coverage.cell_size) for search in searches]
+                # Only the blocks the searches cover are read and written
+                grid = coverage.grid(blocks=cell_blocks(np.concatenate(cells)))
+                changed = set()
+                for search_cells in cells:
+                    changed.update(grid.add(search_cells))
+                coverage.save_blocks(grid, sorted(changed))
+                coverage.updated_at = timezone.now()
+                coverage.save()
+                coverage.searches.add(*searches)
+        return coverage
 
-    def first_bearing(self):
+    @classmethod
+    def add_missing(cls, mission):
         """
-        Return the course from the datum to the first point
+        Add any finished searches that are missing from the mission coverage
+        (i.e. finished before coverage was kept, or when adding them failed)
         """
-        return self._first_bearing
+        missing = Search.all_current(mission, started=True, finished=True).exclude(coverage__mission=mission)
+        return cls.add_searches(mission, missing)
 
+    @classmethod
+    def for_mission(cls, mission, include_inprogress=False, bounds=None):
+        """
+        Get the coverage grid for a mission, and the center (lon, lat) of its projection
+        Only the part in bounds (west, south, east, north) is included when given
+        In progress searches are optionally included (but not stored)
+
+        Returns (None, None) if there is nothing to show
+        """
+        coverage = cls.objects.filter(mission=mission).first()
+        inprogress = list(Search.all_current(mission, started=True, finished=False)) if include_inprogress else []
+        if coverage is not None:
+            center = coverage.center.coords
+            area = None
+            if bounds is not None:
+                xmin, ymin, xmax, ymax = local_bounds(bounds, center)
+                # The edges are only projected at some points, so allow for them bulging out between
+                margin = 0.05 * max(xmax - xmin, ymax - ymin)
+                area = (xmin - margin, ymin - margin, xmax + margin, ymax + margin)
+            grid = coverage.grid(area=area)
+        elif inprogress:
+            grid = CoverageGrid(cls._meta.get_field('cell_size').default)
+            center = inprogress[0].start_point.coords
+        else:
+            return None, None
+        for search in inprogress:
+            grid.add(cls.search_cells(search, center, grid.cell_size))
+        return grid, center
 
-class TrackLineCreepingSearchParams(SearchParams):
+
+class SearchCoverageBlock(models.Model):
     """
-    Parameters for a track line creeping search
+    A block of the cells of a mission's coverage grid (see search.coverage.grid.CoverageGrid)
+
+    Block (row, col) has the BLOCK_SIZE x BLOCK_SIZE cells from (row * BLOCK_SIZE, col * BLOCK_SIZE),
+    as little endian float32s
     """
-    def __init__(self, from_geo, asset_type, creator, sweep_width, width):
-        # pylint: disable=R0913,R0917
-        super().__init__(from_geo, asset_type, creator, sweep_width)
-        self._width = int(width)
-        if self._width < 0:
-            raise ValueError("Width must be positive")
+    coverage = models.ForeignKey(SearchCoverage, on_delete=models.CASCADE, related_name='blocks')
+    row = models.IntegerField()
+    col = models.IntegerField()
+    cells = models.BinaryField()
 
-    def width(self):
-        """
-        Return the width across the track to search
-        (searching will occur width/2 either side of the track)
-        """
-        return self._width
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['coverage', 'row', 'col'], name='search_coverage_block_unique'),
+        ]
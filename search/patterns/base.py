@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""
+The base of all search patterns
+
+A pattern takes a sweep width and its own parameters (checked when it's
+created), then turns the points of a datum (a POI, line or polygon) into
+the points of a search. Patterns only deal with arrays of points, saving
+the search is up to Search.create_from_pattern.
+"""
+
+
+class Parameter:
+    """
+    A whole number parameter of a pattern
+
+    choices maps strings that have a special meaning to their value
+    (i.e. 'auto' for an orientation that should be worked out), field is the
+    Search field the value is stored in (if any).
+    """
+    def __init__(self, name, label, minimum=None, maximum=None, default=None, choices=None, field=None):
+        # pylint: disable=R0913,R0917
+        self.name = name
+        self.label = label
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self.choices = choices or {}
+        self.field = field
+
+    def clean(self, value):
+        """
+        Returns value converted to the parameter's type
+        Raises ValueError when the value isn't valid
+        """
+        if value is None or value == '':
+            if self.default is None:
+                raise ValueError(f"{self.label} is required")
+            return self.default
+        if value in self.choices:
+            return self.choices[value]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{self.label} must be a whole number") from None
+        too_small = self.minimum is not None and value < self.minimum
+        too_big = self.maximum is not None and value > self.maximum
+        if self.minimum is not None and self.maximum is not None and (too_small or too_big):
+            raise ValueError(f"{self.label} must be between {self.minimum} and {self.maximum}")
+        if too_small:
+            raise ValueError(f"{self.label} must be at least {self.minimum}")
+        if too_big:
+            raise ValueError(f"{self.label} must be at most {self.maximum}")
+        return value
+
+    def as_object(self):
+        """
+        Convert parameter to an object that is suitable for returning via JsonResponse
+        """
+        return {
+            'name': self.name,
+            'label': self.label,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'default': self.default,
+            'choices': list(self.choices),
+        }
+
+
+SWEEP_WIDTH = Parameter('sweep_width', 'Sweep width', minimum=1)
+
+
+class Pattern:
+    """
+    A search pattern
+
+    Subclasses set:
+    - name: how the pattern is referred to (i.e. in urls)
+    - search_type: what's stored in Search.search_type
+    - datum_type: the geo_type of the GeoTimeLabel the search starts from
+    - parameters: the Parameters it needs (as well as the sweep width)
+    and implement points()
+    """
+    name = None
+    search_type = None
+    datum_type = None
+    parameters = ()
+
+    def __init__(self, sweep_width, **values):
+        self.sweep_width = SWEEP_WIDTH.clean(sweep_width)
+        self.values = {parameter.name: parameter.clean(values.get(parameter.name)) for parameter in self.parameters}
+        # Set (to a description) when the search couldn't be made as asked, and something simpler was used
+        self.fallback = None
+
+    def points(self, datum):
+        """
+        Returns the points (N x 2 array of lon, lat) of the search
+        from the points of the datum (M x 2 array of lon, lat)
+        """
+        raise NotImplementedError
+
+    def search_fields(self):
+        """
+        The values to store on the Search (by field name)
+        """
+        return {parameter.field: self.values[parameter.name] for parameter in self.parameters if parameter.field}
+
+    @classmethod
+    def as_object(cls):
+        """
+        Convert the pattern to an object that is suitable for returning via JsonResponse
+        """
+        return {
+            'name': cls.name,
+            'search_type': cls.search_type,
+            'datum_type': cls.datum_type,
+            'parameters': [SWEEP_WIDTH.as_object()] + [parameter.as_object() for parameter in cls.parameters],
+        }
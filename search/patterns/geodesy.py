@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Geodesy for search patterns, on a sphere and vectorized with numpy
+
+- The point a distance along a bearing from another (destination)
+- The initial bearing from one point to another (initial_bearing)
+- The distance between points (distance)
+- The points of a geometry as an array (geometry_points)
+
+Points are arrays of (lon, lat) in degrees, distances are in meters and
+bearings are in degrees clockwise from north. Arguments broadcast against
+each other, so one call can project many points/distances/bearings.
+"""
+import numpy as np
+from django.contrib.gis.geos import Point, Polygon
+from search.polygon.convex import points_from_linestring
+from search.polygon.projection import EARTH_RADIUS
+
+
+def destination(lonlat, length, bearing):
+    """ Returns the points (... x 2) length meters along bearing from lonlat """
+    lonlat = np.radians(np.asarray(lonlat, dtype=np.float64))
+    lon, lat = lonlat[..., 0], lonlat[..., 1]
+    ang = np.asarray(length, dtype=np.float64) / EARTH_RADIUS
+    theta = np.radians(bearing)
+    sin_lat = np.sin(lat) * np.cos(ang) + np.cos(lat) * np.sin(ang) * np.cos(theta)
+    lat2 = np.arcsin(np.clip(sin_lat, -1, 1))
+    lon2 = lon + np.arctan2(np.sin(theta) * np.sin(ang) * np.cos(lat), np.cos(ang) - np.sin(lat) * sin_lat)
+    lon2 = (lon2 + np.pi) % (2 * np.pi) - np.pi
+    return np.degrees(np.stack(np.broadcast_arrays(lon2, lat2), axis=-1))
+
+
+def initial_bearing(from_lonlat, to_lonlat):
+    """ Returns the bearing (degrees, 0-360) to start along to get from from_lonlat to to_lonlat """
+    from_lonlat = np.radians(np.asarray(from_lonlat, dtype=np.float64))
+    to_lonlat = np.radians(np.asarray(to_lonlat, dtype=np.float64))
+    lat1, lat2 = from_lonlat[..., 1], to_lonlat[..., 1]
+    d_lon = to_lonlat[..., 0] - from_lonlat[..., 0]
+    east = np.sin(d_lon) * np.cos(lat2)
+    north = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(d_lon)
+    return np.degrees(np.arctan2(east, north)) % 360
+
+
+def distance(from_lonlat, to_lonlat):
+    """ Returns the great circle distance (in meters) between the points """
+    from_lonlat = np.radians(np.asarray(from_lonlat, dtype=np.float64))
+    to_lonlat = np.radians(np.asarray(to_lonlat, dtype=np.float64))
+    d_lon = to_lonlat[..., 0] - from_lonlat[..., 0]
+    d_lat = to_lonlat[..., 1] - from_lonlat[..., 1]
+    hav = np.sin(d_lat / 2) ** 2 + np.cos(from_lonlat[..., 1]) * np.cos(to_lonlat[..., 1]) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(hav, 0, 1)))
+
+
+def geometry_points(geometry):
+    """ Returns the points (N x 2) of a Point, LineString or Polygon (its outside ring) """
+    if isinstance(geometry, Point):
+        return np.array([geometry.coords[:2]], dtype=np.float64)
+    if isinstance(geometry, Polygon):
+        geometry = geometry[0]
+    return np.array(points_from_linestring(geometry))
@@ -0,0 +1,261 @@
+#!/usr/bin/python3
+"""
+The search patterns that can be created
+
+- Sector (SectorPattern)
+- Expanding Box (ExpandingBoxPattern)
+- Track Line (TrackLinePattern)
+- Track Line Return (TrackLineReturnPattern)
+- Shore Line (ShoreLinePattern)
+- Creeping Line along a track (TrackCreepingLinePattern)
+- Parallel Line across a polygon (PolygonCreepingLinePattern)
+
+New patterns are added with register_pattern, and found by name with get_pattern.
+"""
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.geos import LinearRing, Polygon
+
+from search.polygon.budget import creep_line_with_budget, DEFAULT_TIME_BUDGET
+from search.polygon.projection import local_to_lonlat, lonlat_to_local
+from .base import Parameter, Pattern
+from .geodesy import destination, distance, initial_bearing
+
+PATTERNS = {}
+
+
+def register_pattern(cls):
+    """
+    Make a pattern available (by its name), can be used as a class decorator
+    """
+    PATTERNS[cls.name] = cls
+    return cls
+
+
+def get_pattern(name):
+    """
+    Returns the pattern class called name
+    Raises KeyError if there isn't one
+    """
+    return PATTERNS[name]
+
+
+@register_pattern
+class SectorPattern(Pattern):
+    """
+    A sector search centered on a point
+
+    Sector searches are good for finding something when you knew it was at the datum
+    very recently (with a few minutes of the search starting).
+    A series of equilateral triangles with sides of length no greater than 3x sweep width.
+    Each of the triangles has one point on the datum and the other 2 points on a circle
+    centered on the datum.
+    Each triangle starts 30 degress from the previous one, but they are run in an order
+    such that (where possible) the line that connects to the datum continues to start a
+    new triangle on the opposite side.
+    There are 3 sets of 3 triangles that make up the full set. The first triangles have
+    courses (position on clock face)
+    000 (12 o'clock)
+    120 (2 o'clock)
+    240 (datum)
+    240 (8 o'clock)
+    000 (10 o'clock)
+    120 (datum)
+    120 (4 o'clock)
+    240 (6 o'clock)
+    000 (datum)
+    The next set start offset 30 degrees (030, 150, 270, etc)
+    """
+    name = 'sector'
+    search_type = 'Sector'
+    datum_type = 'poi'
+
+    # 0 is the datum, 1-12 are the points on the circle (in clock order)
+    ORDER = [0, 12, 2, 8, 10, 4, 6, 0, 1, 3, 9, 11, 5, 7, 0, 2, 4, 10, 12, 6, 8, 0]
+
+    def points(self, datum):
+        circle = destination(datum[0], self.sweep_width * 3, np.arange(30, 361, 30))
+        return np.concatenate((datum[:1], circle))[self.ORDER]
+
+
+@register_pattern
+class ExpandingBoxPattern(Pattern):
+    """
+    An expanding box search from a point (datum)
+
+    Expanding box searches are good for finding something when you know it was at the datum
+    recently (within the last hour)
+
+    A series of straight lines that form a continuous path that expands outwards
+    from the datum.
+    Each pair of perpendicular lines are n*sweep width (where n is whole number
+    that increases every second direction change)
+    If the search starts 000 and the sweep width is 100m then it would have lines:
+    course (length)
+    000 (100m)
+    090 (100m)
+    180 (200m)
+    270 (200m)
+    000 (300m)
+    090 (300m)
+    180 (400m)
+    270 (400m)
+    And so on, for as many iterations as required (iterations here are groups of 4 lines)
+
+    Expanding boxes have a mathematical property that makes it easy to calculate the
+    ends of any line without knowing all the previous ones.
+    The first point (b) is 1 sweep width in the starting direction from the datum (a).
+    Now all subsequent points expand outwards on a 45 degree angle from either a or b.
+    The second, third, forth line all end (start direction +) 45, 135, 225 degrees from
+    a, and the fifth line ends (start direction +) 315 degrees, all sqrt(2) * i * sweep
+    width (where i is the iteration number) from the reference point (a or b respectively).
+    """
+    name = 'expandingbox'
+    search_type = 'Expanding Box'
+    datum_type = 'poi'
+    parameters = (
+        Parameter('iterations', 'Iterations', minimum=1, field='iterations'),
+        Parameter('first_bearing', 'First bearing', minimum=0, maximum=360, default=0, field='first_bearing'),
+    )
+
+    def points(self, datum):
+        first_bearing = self.values['first_bearing']
+        first = destination(datum[0], self.sweep_width, first_bearing)
+        iterations = np.arange(1, self.values['iterations'] + 1)[:, np.newaxis]
+        origins = np.array([datum[0], datum[0], datum[0], first])
+        corners = destination(origins, np.sqrt(2) * iterations * self.sweep_width, first_bearing + np.array([45, 135, 225, 315]))
+        return np.concatenate((datum[:1], first[np.newaxis], corners.reshape(-1, 2)))
+
+
+@register_pattern
+class TrackLinePattern(Pattern):
+    """
+    A track line search following a line
+
+    Track line searches are useful for checking a path known to be travelled.
+    No math required, the search has exactly the same points as the reference line.
+    """
+    name = 'trackline'
+    search_type = 'Track Line'
+    datum_type = 'line'
+
+    def points(self, datum):
+        return datum
+
+
+@register_pattern
+class TrackLineReturnPattern(Pattern):
+    """
+    A track line search that goes along a line and comes back
+
+    The search runs half a sweep width to the right of the line on the
+    way out, and half a sweep width to the left on the way back, so the
+    two passes sweep either side of the track without overlapping.
+    """
+    name = 'tracklinereturn'
+    search_type = 'Track Line Return'
+    datum_type = 'line'
+
+    def points(self, datum):
+        # Repeated points don't have a direction
+        keep = np.concatenate(([True], np.any(np.diff(datum, axis=0) != 0, axis=1)))
+        center = datum[0]
+        pts = lonlat_to_local(datum[keep], center)
+        segments = np.diff(pts, axis=0)
+        segments /= np.hypot(segments[:, 0], segments[:, 1])[:, np.newaxis]
+        # Unit normals to the right of each segment
+        normals = np.column_stack((segments[:, 1], -segments[:, 0]))
+        before = np.concatenate((normals[:1], normals))
+        after = np.concatenate((normals, normals[-1:]))
+        # Offset each corner along the bisector of its segments (a miter),
+        # far enough that both segments are offset by the full distance.
+        # Sharp turns are limited to 10x the offset, rather than heading off towards infinity.
+        cos_half = (1 + np.sum(before * after, axis=1)) / 2
+        miter = (before + after) / (2 * np.maximum(cos_half, 0.01))[:, np.newaxis]
+        offset = miter * (self.sweep_width / 2)
+        out = local_to_lonlat(pts + offset, center)
+        back = local_to_lonlat(pts - offset, center)[::-1]
+        return np.concatenate((out, back))
+
+
+@register_pattern
+class ShoreLinePattern(Pattern):
+    """
+    A shore line search following a line
+
+    Shore line searches are useful for checking a shore line.
+    No math required, the search has exactly the same points as the reference line.
+    """
+    name = 'shoreline'
+    search_type = 'Shore Line'
+    datum_type = 'line'
+
+    def points(self, datum):
+        return datum
+
+
+@register_pattern
+class TrackCreepingLinePattern(Pattern):
+    """
+    A creeping line ahead search following a line
+
+    A creeping line ahead search (also called a parallel track search) is useful
+    for searching a large area methodically.
+    This specific implementation centers the search on a line and runs the search
+    perpendicular to the line, width either side of the line, and steps sweep
+    width along the line for each each pass.
+    """
+    name = 'creepingline-track'
+    search_type = 'Creeping Line'
+    datum_type = 'line'
+    parameters = (
+        Parameter('width', 'Width', minimum=0, field='width'),
+    )
+
+    def points(self, datum):
+        starts, ends = datum[:-1], datum[1:]
+        bearings = initial_bearing(starts, ends)
+        steps = np.floor(distance(starts, ends) / self.sweep_width + 0.5).astype(int) + 1
+        # Which segment each pass is on, and how many sweep widths along it
+        segment = np.repeat(np.arange(len(starts)), steps)
+        along = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+        bearings = bearings[segment]
+        centers = destination(starts[segment], along * self.sweep_width, bearings)
+        sides = destination(centers[:, np.newaxis], self.values['width'], bearings[:, np.newaxis] + np.array([90, -90]))
+        # Every other pass goes back the other way
+        sides[1::2] = sides[1::2, ::-1]
+        return sides.reshape(-1, 2)
+
+
+@register_pattern
+class PolygonCreepingLinePattern(Pattern):
+    """
+    A creeping line (parallel line) search across a polygon
+
+    The passes are at right angles to the orientation (the direction the
+    search progresses in), when no orientation is given the one with the
+    fewest turns is found.
+
+    The search is planned in meters on a projection centered on the
+    polygon, so the sweep width holds across large areas.
+
+    Planning is done in another process, limited to
+    settings.SEARCH_POLYGON_TIME_BUDGET seconds. If it takes longer
+    the search covers the convex hull of the polygon instead, and
+    fallback is set to 'convex hull'.
+    """
+    name = 'creepingline-polygon'
+    search_type = 'Parallel Line'
+    datum_type = 'polygon'
+    parameters = (
+        Parameter('orientation', 'Orientation', minimum=0, maximum=360, default=0, choices={'auto': None}, field='orientation'),
+    )
+
+    def points(self, datum):
+        center = Polygon(LinearRing(datum)).centroid.coords
+        budget = getattr(settings, 'SEARCH_POLYGON_TIME_BUDGET', DEFAULT_TIME_BUDGET)
+        line, orientation, over_budget = creep_line_with_budget(lonlat_to_local(datum, center), self.sweep_width, angle=self.values['orientation'], budget=budget)
+        self.values['orientation'] = orientation
+        if over_budget:
+            self.fallback = 'convex hull'
+        return local_to_lonlat(line, center)
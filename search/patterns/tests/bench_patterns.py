@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the search patterns
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.patterns.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+import numpy as np
+from search.patterns.geodesy import destination
+from search.patterns.library import (SectorPattern,
+                                     ExpandingBoxPattern,
+                                     TrackLinePattern,
+                                     TrackLineReturnPattern,
+                                     TrackCreepingLinePattern,
+                                     PolygonCreepingLinePattern)
+
+DATUM = np.array([(172.5, -43.5)])
+
+
+def wandering_line(length, points):
+    """ A line (points x 2) that wanders roughly east for length meters """
+    bearings = 90 + np.random.default_rng(1234).normal(0, 30, points - 1)
+    line = [DATUM[0]]
+    for bearing in bearings:
+        line.append(destination(line[-1], length / (points - 1), bearing))
+    return np.array(line)
+
+
+def square(size):
+    """ A polygon (points) that is size meters across """
+    corners = destination(DATUM[0], size / np.sqrt(2), [315, 45, 135, 225])
+    return np.concatenate((corners, corners[:1]))
+
+
+class BenchPatterns(unittest.TestCase):
+    """ Benchmark making each pattern, at a realistic size and an extreme one """
+    def bench(self, description, pattern, datum):
+        """ Print how long making the pattern takes """
+        points = pattern.points(datum)
+        best = min(timeit.repeat(lambda: pattern.points(datum), number=1, repeat=5))
+        print(f"{description}: {len(points)} points in {best * 1000:.2f} ms")
+
+    def test_sector(self):
+        """ Sector searches are always the same size """
+        print()
+        self.bench("Sector", SectorPattern(200), DATUM)
+
+    def test_expanding_box(self):
+        """ 10 iterations is a big search, 10000 a silly one """
+        print()
+        self.bench("Expanding box (10 iterations)", ExpandingBoxPattern(200, iterations=10), DATUM)
+        self.bench("Expanding box (10000 iterations)", ExpandingBoxPattern(200, iterations=10000), DATUM)
+
+    def test_track_lines(self):
+        """ A 50km track with 50 points, and a 1000km track with 100000 points """
+        print()
+        for points, length in ((50, 50000), (100000, 1000000)):
+            line = wandering_line(length, points)
+            self.bench(f"Track line ({points} point line)", TrackLinePattern(200), line)
+            self.bench(f"Track line return ({points} point line)", TrackLineReturnPattern(200), line)
+
+    def test_track_creeping_line(self):
+        """ A 20km track with a 200m sweep width, and a 1000km track with a 10m sweep width """
+        print()
+        self.bench("Creeping line (20km, 200m sweep)", TrackCreepingLinePattern(200, width=2000), wandering_line(20000, 20))
+        self.bench("Creeping line (1000km, 10m sweep)", TrackCreepingLinePattern(10, width=2000), wandering_line(1000000, 1000))
+
+    def test_polygon_creeping_line(self):
+        """ A 5km square with a 200m sweep width, and a 100km square with a 20m sweep width """
+        print()
+        self.bench("Parallel line (5km, 200m sweep)", PolygonCreepingLinePattern(200), square(5000))
+        self.bench("Parallel line (100km, 20m sweep)", PolygonCreepingLinePattern(20), square(100000))
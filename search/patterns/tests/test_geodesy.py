@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+UnitTests for the search pattern geodesy module
+"""
+
+import unittest
+import numpy as np
+from haversine import haversine_vector, Unit
+from django.contrib.gis.geos import LinearRing, LineString, Point, Polygon
+from search.patterns.geodesy import destination, distance, initial_bearing, geometry_points
+
+
+class TestGeodesy(unittest.TestCase):
+    """ Test projecting points, and finding bearings/distances between them """
+    def test_destination(self):
+        """ Test points are projected the right distance in the right direction """
+        start = (172.5, -43.5)
+        north, east, south, west = destination(start, 1000, [0, 90, 180, 270])
+        self.assertAlmostEqual(north[0], start[0])
+        self.assertGreater(north[1], start[1])
+        self.assertGreater(east[0], start[0])
+        self.assertAlmostEqual(south[0], start[0])
+        self.assertLess(south[1], start[1])
+        self.assertLess(west[0], start[0])
+        ends = np.array([north, east, south, west])
+        lengths = haversine_vector(np.array([start[::-1]] * 4), ends[:, ::-1], Unit.METERS)
+        np.testing.assert_allclose(lengths, 1000, rtol=1e-6)
+
+    def test_broadcast(self):
+        """ Test many points, distances and bearings can be projected at once """
+        starts = np.array([(172.5, -43.5), (0, 0), (-70, 60)])
+        ends = destination(starts[:, np.newaxis, np.newaxis], np.array([[100], [1000]]), np.array([0, 45, 90]))
+        self.assertEqual(ends.shape, (3, 2, 3, 2))
+        np.testing.assert_allclose(distance(starts[:, np.newaxis, np.newaxis], ends), np.broadcast_to([[100], [1000]], (3, 2, 3)), rtol=1e-9)
+
+    def test_round_trip(self):
+        """ Test the bearing and distance to a projected point are what it was projected by """
+        rng = np.random.default_rng(1234)
+        starts = np.column_stack((rng.uniform(-180, 180, 100), rng.uniform(-80, 80, 100)))
+        bearings = rng.uniform(0, 360, 100)
+        lengths = rng.uniform(1, 100000, 100)
+        ends = destination(starts, lengths, bearings)
+        np.testing.assert_allclose(distance(starts, ends), lengths, rtol=1e-6)
+        error = (initial_bearing(starts, ends) - bearings + 180) % 360 - 180
+        np.testing.assert_allclose(error, 0, atol=1e-6)
+
+    def test_antimeridian(self):
+        """ Test longitudes stay between -180 and 180 """
+        end = destination((179.999, 0), 1000, 90)
+        self.assertLess(end[0], -179.99)
+        self.assertAlmostEqual(initial_bearing((179.999, 0), end), 90)
+
+    def test_geometry_points(self):
+        """ Test the points of each type of datum """
+        np.testing.assert_array_equal(geometry_points(Point(172.5, -43.5)), [(172.5, -43.5)])
+        line = ((172.5, -43.5), (172.6, -43.6), (172.7, -43.5))
+        np.testing.assert_array_equal(geometry_points(LineString(line)), line)
+        ring = line + line[:1]
+        np.testing.assert_array_equal(geometry_points(Polygon(LinearRing(ring))), ring)
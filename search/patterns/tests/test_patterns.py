@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+"""
+UnitTests for the search patterns
+"""
+
+import unittest
+import numpy as np
+from search.patterns.base import Parameter, Pattern
+from search.patterns.geodesy import destination, distance, initial_bearing
+from search.patterns.library import (PATTERNS, get_pattern, register_pattern,
+                                     SectorPattern,
+                                     ExpandingBoxPattern,
+                                     TrackLinePattern,
+                                     TrackLineReturnPattern,
+                                     TrackCreepingLinePattern,
+                                     PolygonCreepingLinePattern)
+from search.polygon.projection import lonlat_to_local
+
+DATUM = np.array([(172.5, -43.5)])
+LINE = np.array([(172.5, -43.5), (172.52, -43.5), (172.52, -43.52)])
+
+
+class TestParameter(unittest.TestCase):
+    """ Test checking the parameters of a pattern """
+    def test_clean(self):
+        """ Test values are converted, and checked against their limits """
+        parameter = Parameter('angle', 'Angle', minimum=0, maximum=360, default=0, choices={'auto': None})
+        self.assertEqual(parameter.clean('90'), 90)
+        self.assertEqual(parameter.clean(None), 0)
+        self.assertEqual(parameter.clean(''), 0)
+        self.assertIsNone(parameter.clean('auto'))
+        with self.assertRaisesRegex(ValueError, 'Angle must be between 0 and 360'):
+            parameter.clean('400')
+        with self.assertRaisesRegex(ValueError, 'Angle must be a whole number'):
+            parameter.clean('north')
+
+    def test_required(self):
+        """ Test parameters without a default have to be given """
+        parameter = Parameter('count', 'Count', minimum=1)
+        with self.assertRaisesRegex(ValueError, 'Count is required'):
+            parameter.clean(None)
+        with self.assertRaisesRegex(ValueError, 'Count must be at least 1'):
+            parameter.clean(0)
+
+    def test_pattern(self):
+        """ Test patterns check the sweep width and their parameters when created """
+        with self.assertRaisesRegex(ValueError, 'Sweep width must be at least 1'):
+            SectorPattern(0)
+        with self.assertRaisesRegex(ValueError, 'Iterations is required'):
+            ExpandingBoxPattern(100)
+        pattern = ExpandingBoxPattern('100', iterations='3')
+        self.assertEqual(pattern.sweep_width, 100)
+        self.assertEqual(pattern.search_fields(), {'iterations': 3, 'first_bearing': 0})
+
+
+class TestRegistry(unittest.TestCase):
+    """ Test finding patterns by name """
+    def test_get_pattern(self):
+        """ Test every pattern can be found by its name """
+        for name, pattern in PATTERNS.items():
+            self.assertIs(get_pattern(name), pattern)
+            self.assertEqual(pattern.as_object()['name'], name)
+        with self.assertRaises(KeyError):
+            get_pattern('unknown')
+
+    def test_register(self):
+        """ Test new patterns can be added """
+        @register_pattern
+        class ReversePattern(Pattern):  # pylint: disable=W0612
+            """ A test pattern """
+            name = 'test-reverse'
+            search_type = 'Reverse'
+            datum_type = 'line'
+
+            def points(self, datum):
+                return datum[::-1]
+        try:
+            np.testing.assert_array_equal(get_pattern('test-reverse')(100).points(LINE), LINE[::-1])
+        finally:
+            del PATTERNS['test-reverse']
+
+
+class TestPatterns(unittest.TestCase):
+    """ Test the points of each pattern """
+    def test_sector(self):
+        """ Test a sector search returns to the datum and stays on its circle """
+        points = SectorPattern(100).points(DATUM)
+        self.assertEqual(len(points), 22)
+        datum = np.all(points == DATUM[0], axis=1)
+        self.assertEqual(np.flatnonzero(datum).tolist(), [0, 7, 14, 21])
+        np.testing.assert_allclose(distance(DATUM[0], points[~datum]), 300, rtol=1e-9)
+        # The first leg heads north
+        self.assertAlmostEqual(initial_bearing(DATUM[0], points[1]), 0, places=6)
+
+    def test_expanding_box(self):
+        """ Test each leg of an expanding box is a sweep width longer every second turn """
+        points = ExpandingBoxPattern(100, iterations=3, first_bearing=90).points(DATUM)
+        self.assertEqual(len(points), 2 + 3 * 4)
+        legs = distance(points[:-1], points[1:])
+        np.testing.assert_allclose(legs, 100 * (np.arange(len(legs)) // 2 + 1), rtol=1e-3)
+        bearings = initial_bearing(points[:-1], points[1:])
+        error = (bearings - (90 + 90 * np.arange(len(legs))) + 180) % 360 - 180
+        np.testing.assert_allclose(error, 0, atol=0.1)
+
+    def test_track_line(self):
+        """ Test a track line search is the line """
+        np.testing.assert_array_equal(TrackLinePattern(100).points(LINE), LINE)
+
+    def test_track_line_return(self):
+        """ Test a track line return goes out on the right of the line, and back on the left """
+        points = TrackLineReturnPattern(100).points(LINE)
+        self.assertEqual(len(points), 2 * len(LINE))
+        local = lonlat_to_local(points, LINE[0])
+        # Out heading east (so south of the line), then south (so west of the line)
+        np.testing.assert_allclose(local[0], (0, -50), atol=0.1)
+        np.testing.assert_allclose(local[1:3, 0] - lonlat_to_local(LINE[1:], LINE[0])[:, 0], -50, atol=0.1)
+        # Back on the other side
+        np.testing.assert_allclose(local[3:5, 0] - lonlat_to_local(LINE[:0:-1], LINE[0])[:, 0], 50, atol=0.1)
+        np.testing.assert_allclose(local[-1], (0, 50), atol=0.1)
+
+    def test_track_line_return_repeated(self):
+        """ Test repeated points on the line don't stop a track line return being made """
+        line = np.array([LINE[0], LINE[1], LINE[1], LINE[2]])
+        points = TrackLineReturnPattern(100).points(line)
+        self.assertTrue(np.all(np.isfinite(points)))
+        self.assertEqual(len(points), 2 * len(LINE))
+
+    def test_track_creeping_line(self):
+        """ Test a creeping line along a line crosses it every sweep width """
+        line = LINE[:2]
+        points = TrackCreepingLinePattern(100, width=500).points(line)
+        # The line is ~1615m long, so there are 17 passes
+        length = distance(line[0], line[1])
+        passes = int(np.floor(length / 100 + 0.5)) + 1
+        self.assertEqual(len(points), 2 * passes)
+        # Each pass is 2x width long, and they alternate direction
+        np.testing.assert_allclose(distance(points[0::2], points[1::2]), 1000, rtol=1e-6)
+        local = lonlat_to_local(points, line[0])
+        # Heading east, so the first pass starts south of the line
+        crossing = np.diff(local[:, 1].reshape(-1, 2), axis=1)
+        self.assertTrue(np.all(crossing[0::2] > 0))
+        self.assertTrue(np.all(crossing[1::2] < 0))
+        # The middle of each pass is on the line, a sweep width on from the last
+        centers = local.reshape(-1, 2, 2).mean(axis=1)
+        np.testing.assert_allclose(np.diff(centers[:, 0]), 100, rtol=1e-3)
+        np.testing.assert_allclose(centers[:, 1], 0, atol=0.5)
+
+    def test_track_creeping_line_segments(self):
+        """ Test each segment of the line starts its own passes """
+        points = TrackCreepingLinePattern(200, width=100).points(LINE)
+        first = destination(LINE[1], 100, initial_bearing(LINE[1], LINE[2]) + np.array([90, -90]))
+        passes = int(np.floor(distance(LINE[0], LINE[1]) / 200 + 0.5)) + 1
+        start = points[2 * passes:2 * passes + 2]
+        # Whichever way the pass goes
+        if passes % 2:
+            start = start[::-1]
+        np.testing.assert_allclose(start, first)
+
+    def test_polygon_creeping_line(self):
+        """ Test a polygon creeping line stores the orientation that was used """
+        square = np.array([(172.5, -43.5), (172.5, -43.52), (172.52, -43.52), (172.52, -43.5), (172.5, -43.5)])
+        pattern = PolygonCreepingLinePattern(200, orientation='auto')
+        points = pattern.points(square)
+        self.assertGreater(len(points), 2)
+        self.assertIn(pattern.search_fields()['orientation'], (0, 90, 180, 270))
+        self.assertIsNone(pattern.fallback)
+        pattern = PolygonCreepingLinePattern(200)
+        pattern.points(square)
+        self.assertEqual(pattern.search_fields(), {'orientation': 0})
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""
+Functions for assigning searches to assets
+
+- Calculate the distances between sets of lon/lat points (distance_matrix)
+- Solve the assignment problem for a cost matrix (linear_assignment)
+- Assign waiting searches to assets to minimize transit (assign_searches)
+"""
+import numpy as np
+from haversine import haversine_vector, Unit
+
+
+def distance_matrix(from_lonlat, to_lonlat):
+    """ Returns the distance (in meters) from each of the from points (N x 2)
+    to each of the to points (M x 2) as an N x M array """
+    from_latlon = np.asarray(from_lonlat, dtype=np.float64).reshape(-1, 2)[:, ::-1]
+    to_latlon = np.asarray(to_lonlat, dtype=np.float64).reshape(-1, 2)[:, ::-1]
+    if len(from_latlon) == 0 or len(to_latlon) == 0:
+        return np.zeros((len(from_latlon), len(to_latlon)))
+    return haversine_vector(to_latlon, from_latlon, Unit.METERS, comb=True)
+
+
+def _hungarian(cost):
+    # pylint: disable=R0914
+    """ Returns the column assigned to each row of a finite cost matrix
+    with no more rows than columns (shortest augmenting path, O(n^2 m))
+
+    The loop over columns of the textbook algorithm is done with numpy,
+    so only the loops over rows and augmenting steps are in python. """
+    n, m = cost.shape
+    # Index 0 is a dummy column/row, as in the textbook version
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        col = 0
+        min_v = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[col] = True
+            row = row_of[col]
+            free = ~used
+            reduced = cost[row - 1] - u[row] - v[1:]
+            better = free[1:] & (reduced < min_v[1:])
+            min_v[1:][better] = reduced[better]
+            way[1:][better] = col
+            candidates = np.where(free, min_v, np.inf)
+            candidates[0] = np.inf
+            next_col = int(np.argmin(candidates))
+            delta = candidates[next_col]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_v[free] -= delta
+            col = next_col
+            if row_of[col] == 0:
+                break
+        while col:
+            prev_col = way[col]
+            row_of[col] = row_of[prev_col]
+            col = prev_col
+
+    col_of = np.full(n, -1, dtype=np.int64)
+    assigned = np.nonzero(row_of[1:])[0]
+    col_of[row_of[1:][assigned] - 1] = assigned
+    return col_of
+
+
+def linear_assignment(cost):
+    """ Returns (rows, cols) of the assignment with the lowest total cost
+
+    Each row is assigned to at most one column (and the reverse), as many
+    rows/columns as possible are assigned. Entries that are inf (or nan)
+    are never assigned, so some rows/columns may be left out.
+    This matches scipy.optimize.linear_sum_assignment for finite costs. """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+
+    allowed = np.isfinite(cost)
+    if not allowed.all():
+        # Any assignment avoiding a disallowed pair costs less than one that doesn't
+        finite = np.abs(cost[allowed])
+        big = (finite.max() + 1) * (min(cost.shape) + 1) if len(finite) else 1
+        cost = np.where(allowed, cost, big)
+
+    rows = np.arange(cost.shape[0])
+    cols = _hungarian(cost)
+    keep = allowed[rows, cols]
+    rows, cols = rows[keep], cols[keep]
+
+    if transposed:
+        rows, cols = cols, rows
+        order = np.argsort(rows)
+        rows, cols = rows[order], cols[order]
+    return rows, cols
+
+
+def assign_searches(asset_lonlat, search_lonlat, search_lengths=None, endurance=None, capacity=1):
+    # pylint: disable=R0913,R0917
+    """ Assign searches to assets so the total transit distance is smallest
+
+    asset_lonlat is the position of each asset (N x 2), search_lonlat is
+    the start of each search (M x 2).
+    When endurance (in meters) is given an asset won't be assigned a
+    search if the transit plus the search length would be further.
+    Each asset can be assigned up to capacity searches, transit for
+    each is measured from the current position of the asset.
+
+    Returns a list of (asset index, search index, transit distance) """
+    transit = distance_matrix(asset_lonlat, search_lonlat)
+    cost = transit.copy()
+    if endurance is not None:
+        lengths = np.zeros(transit.shape[1]) if search_lengths is None else np.asarray(search_lengths, dtype=np.float64)
+        cost[transit + lengths > endurance] = np.inf
+
+    # No asset can be given more searches than there are
+    capacity = max(1, min(capacity, transit.shape[1]))
+    rows, cols = linear_assignment(np.repeat(cost, capacity, axis=0))
+    assets = rows // capacity
+    return [(int(asset), int(search), float(transit[asset, search])) for asset, search in zip(assets, cols)]
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+Functions for ordering the searches an asset has to do
+
+- Total transit for doing the searches in an order (route_transit)
+- Nearest neighbour ordering (nearest_neighbour)
+- Improve an order by reversing parts of it (two_opt)
+- Plan the order to do searches in from the position of an asset (plan_route)
+
+Each search is flown from its start to its end, so the transit from one
+search to the next is from the end of one to the start of the next.
+"""
+import numpy as np
+from search.planning.assign import distance_matrix
+
+
+def route_transit(orders, first_transit, transit):
+    """ Returns the total transit for each order (K x N, or a single order)
+
+    first_transit is the transit from the asset to the start of each search,
+    transit[i, j] is the transit from the end of search i to the start of search j """
+    orders = np.asarray(orders, dtype=np.int64)
+    single = orders.ndim == 1
+    orders = np.atleast_2d(orders)
+    if orders.shape[1] == 0:
+        totals = np.zeros(len(orders))
+    else:
+        totals = first_transit[orders[:, 0]] + transit[orders[:, :-1], orders[:, 1:]].sum(axis=1)
+    return float(totals[0]) if single else totals
+
+
+def nearest_neighbour(first_transit, transit):
+    """ Returns the order found by always going to the closest search left """
+    count = len(first_transit)
+    left = np.ones(count, dtype=bool)
+    order = []
+    distances = first_transit
+    for _ in range(count):
+        nearest = int(np.argmin(np.where(left, distances, np.inf)))
+        order.append(nearest)
+        left[nearest] = False
+        distances = transit[nearest]
+    return np.array(order, dtype=np.int64)
+
+
+def reversal_changes(order, first_transit, transit):
+    """ Returns how much reversing each part of the order (from position i to j)
+    changes the total transit, as an N x N array (inf where i >= j)
+
+    Only the transit into and out of the part, and between the searches in
+    it (transit isn't the same both ways), change. So each change is made
+    from a few N x N arrays, rather than the total of every new order. """
+    count = len(order)
+    # Between the searches in a part, in order (forward) or reversed (backward)
+    forward = np.concatenate(([0], np.cumsum(transit[order[:-1], order[1:]])))
+    backward = np.concatenate(([0], np.cumsum(transit[order[1:], order[:-1]])))
+    # into[i, j] is the transit from before position i (the asset for the first) to the search at j
+    into = np.vstack((first_transit[order], transit[order[:-1]][:, order]))
+    # out_of[i, j] is the transit from the search at i to the one after position j (none after the last)
+    out_of = np.hstack((transit[order][:, order[1:]], np.zeros((count, 1))))
+    changes = (into - into.diagonal()[:, np.newaxis]) + (out_of - out_of.diagonal()[np.newaxis, :])
+    changes += (backward[np.newaxis, :] - backward[:, np.newaxis]) - (forward[np.newaxis, :] - forward[:, np.newaxis])
+    return np.where(np.triu(np.ones((count, count), dtype=bool), k=1), changes, np.inf)
+
+
+def two_opt(order, first_transit, transit):
+    """ Improve the order by reversing the part of it (from i to j) that most
+    reduces the total transit, until no reversal helps
+
+    All the possible reversals are checked at once with numpy (see reversal_changes). """
+    order = np.asarray(order, dtype=np.int64)
+    if len(order) < 3:
+        return order
+    while True:
+        changes = reversal_changes(order, first_transit, transit)
+        first, last = divmod(int(np.argmin(changes)), len(order))
+        # Ignore changes that are only rounding errors
+        if changes[first, last] >= -1e-6:
+            return order
+        order = np.concatenate((order[:first], order[first:last + 1][::-1], order[last + 1:]))
+
+
+def plan_route(position_lonlat, start_lonlat, end_lonlat):
+    """ Plan the order to do searches in, starting at position_lonlat (lon, lat)
+
+    start_lonlat and end_lonlat are the start and end of each search (N x 2).
+    Returns the order (indexes of the searches) and the transit before each
+    search in that order. """
+    first_transit = distance_matrix(position_lonlat, start_lonlat)[0]
+    transit = distance_matrix(end_lonlat, start_lonlat)
+    order = two_opt(nearest_neighbour(first_transit, transit), first_transit, transit)
+    if len(order) == 0:
+        return order, np.zeros(0)
+    legs = np.concatenate(([first_transit[order[0]]], transit[order[:-1], order[1:]]))
+    return order, legs
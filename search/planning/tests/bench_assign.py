@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the search assignment module
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.planning.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+import numpy as np
+from search.planning.assign import distance_matrix, linear_assignment, assign_searches
+
+
+def greedy(distances):
+    """ Each asset (in turn) takes the closest search left, as dispatch does """
+    taken = np.zeros(distances.shape[1], dtype=bool)
+    total = 0
+    for row in distances:
+        col = int(np.argmin(np.where(taken, np.inf, row)))
+        taken[col] = True
+        total += row[col]
+    return total
+
+
+class BenchAssign(unittest.TestCase):
+    """ Benchmark assigning searches to assets """
+    def bench(self, func, number=5):
+        """ Return the best time (in seconds) to run func """
+        return min(timeit.repeat(func, number=1, repeat=number))
+
+    def test_assign_50_assets_500_searches(self):
+        """ Time the assignment of 500 searches to 50 assets, and compare it to greedy """
+        rng = np.random.default_rng(1234)
+        # Searches spread over about 100km x 100km
+        assets = rng.uniform((172, -44), (173.2, -43.1), (50, 2))
+        searches = rng.uniform((172, -44), (173.2, -43.1), (500, 2))
+
+        distances = distance_matrix(assets, searches)
+        rows, cols = linear_assignment(distances)
+        self.assertEqual(len(rows), 50)
+
+        print()
+        print(f"{'step':>18} {'time (ms)':>10}")
+        print(f"{'distance matrix':>18} {self.bench(lambda: distance_matrix(assets, searches)) * 1000:>10.2f}")
+        print(f"{'assignment':>18} {self.bench(lambda: linear_assignment(distances)) * 1000:>10.2f}")
+        print(f"{'assign_searches':>18} {self.bench(lambda: assign_searches(assets, searches)) * 1000:>10.2f}")
+        print(f"{'capacity 5':>18} {self.bench(lambda: assign_searches(assets, searches, capacity=5)) * 1000:>10.2f}")
+        optimal = distances[rows, cols].sum()
+        print(f"total transit: optimal {optimal / 1000:.1f}km, greedy {greedy(distances) / 1000:.1f}km")
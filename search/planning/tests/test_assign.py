@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+UnitTests for the search assignment module
+"""
+
+import itertools
+import unittest
+import numpy as np
+from haversine import haversine, Unit
+from search.planning.assign import distance_matrix, linear_assignment, assign_searches
+
+
+def brute_force(cost):
+    """ The lowest total cost of assigning every row (rows <= columns) """
+    return min(sum(cost[row, col] for row, col in enumerate(cols))
+               for cols in itertools.permutations(range(cost.shape[1]), cost.shape[0]))
+
+
+class TestAssign(unittest.TestCase):
+    """ Test assigning searches to assets """
+    def test_distance_matrix(self):
+        """ Test the distance matrix matches haversine """
+        assets = [(172.5, -43.5), (172.6, -43.6)]
+        searches = [(172.5, -43.4), (173, -44), (172.6, -43.6)]
+        distances = distance_matrix(assets, searches)
+        self.assertEqual(distances.shape, (2, 3))
+        for i, asset in enumerate(assets):
+            for j, search in enumerate(searches):
+                self.assertAlmostEqual(distances[i, j], haversine(asset[::-1], search[::-1], unit=Unit.METERS), places=3)
+        self.assertEqual(distance_matrix([], searches).shape, (0, 3))
+
+    def test_linear_assignment(self):
+        """ Test the assignment has the lowest cost """
+        rng = np.random.default_rng(1234)
+        for shape in ((1, 1), (3, 3), (4, 6), (6, 4), (5, 7), (7, 7)):
+            for _ in range(5):
+                cost = rng.integers(0, 20, shape).astype(np.float64)
+                rows, cols = linear_assignment(cost)
+                self.assertEqual(len(rows), min(shape))
+                self.assertEqual(len(set(rows)), len(rows))
+                self.assertEqual(len(set(cols)), len(cols))
+                expected = brute_force(cost) if shape[0] <= shape[1] else brute_force(cost.T)
+                self.assertEqual(cost[rows, cols].sum(), expected)
+
+    def test_linear_assignment_disallowed(self):
+        """ Test disallowed (inf) entries are never assigned """
+        cost = np.array([
+            [1, np.inf, np.inf],
+            [2, np.inf, np.inf],
+            [np.inf, 5, 1]])
+        rows, cols = linear_assignment(cost)
+        self.assertEqual(list(zip(rows.tolist(), cols.tolist())), [(0, 0), (2, 2)])
+        rows, cols = linear_assignment(np.full((2, 2), np.inf))
+        self.assertEqual(len(rows), 0)
+
+    def test_assign_searches(self):
+        """ Test searches are assigned to the closest assets overall """
+        assets = [(172.5, -43.5), (172.6, -43.5)]
+        # Greedy (asset 0 first) would take search 0 leaving asset 1 a long way to go
+        searches = [(172.55, -43.5), (172.4, -43.5)]
+        assignment = assign_searches(assets, searches)
+        self.assertEqual([(asset, search) for asset, search, _ in assignment], [(0, 1), (1, 0)])
+        self.assertAlmostEqual(assignment[0][2], distance_matrix(assets[0], searches[1])[0, 0])
+
+    def test_assign_searches_constraints(self):
+        """ Test endurance and capacity are honored """
+        assets = [(172.5, -43.5), (172.6, -43.5)]
+        searches = [(172.5, -43.51), (172.5, -43.52), (172.6, -43.51)]
+        assignment = assign_searches(assets, searches, capacity=2)
+        self.assertEqual(sorted((asset, search) for asset, search, _ in assignment), [(0, 0), (0, 1), (1, 2)])
+        # Search 1 is 2.2km away but is 10km long
+        assignment = assign_searches(assets, searches, search_lengths=[1000, 10000, 1000], endurance=5000, capacity=2)
+        self.assertEqual(sorted((asset, search) for asset, search, _ in assignment), [(0, 0), (1, 2)])
+        # Capacity beyond the number of searches makes no difference
+        assignment = assign_searches(assets, searches, capacity=1000000)
+        self.assertEqual(sorted((asset, search) for asset, search, _ in assignment), [(0, 0), (0, 1), (1, 2)])
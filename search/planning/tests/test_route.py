@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+UnitTests for the search route planning module
+"""
+
+import itertools
+import unittest
+import numpy as np
+from search.planning.assign import distance_matrix
+from search.planning.route import route_transit, nearest_neighbour, reversal_changes, two_opt, plan_route
+
+
+class TestRoute(unittest.TestCase):
+    """ Test ordering the searches for an asset """
+    def test_route_transit(self):
+        """ Test the total transit of an order """
+        first_transit = np.array([1., 2., 3.])
+        transit = np.array([
+            [0., 10., 20.],
+            [30., 0., 40.],
+            [50., 60., 0.]])
+        self.assertEqual(route_transit([0, 1, 2], first_transit, transit), 1 + 10 + 40)
+        self.assertEqual(route_transit([2, 1, 0], first_transit, transit), 3 + 60 + 30)
+        self.assertEqual(route_transit([], first_transit, transit), 0)
+        self.assertEqual(route_transit([[0, 1, 2], [2, 1, 0]], first_transit, transit).tolist(), [51, 93])
+
+    def test_nearest_neighbour(self):
+        """ Test nearest neighbour visits every search once """
+        first_transit = np.array([5., 1., 3.])
+        transit = np.array([
+            [0., 9., 9.],
+            [9., 0., 1.],
+            [1., 9., 0.]])
+        self.assertEqual(nearest_neighbour(first_transit, transit).tolist(), [1, 2, 0])
+
+    def test_reversal_changes(self):
+        """ Test the change from each reversal matches the total transit of the reversed order """
+        rng = np.random.default_rng(1234)
+        count = 8
+        first_transit = rng.uniform(0, 100, count)
+        # Not the same both ways
+        transit = rng.uniform(0, 100, (count, count))
+        order = rng.permutation(count)
+        changes = reversal_changes(order, first_transit, transit)
+        total = route_transit(order, first_transit, transit)
+        for first, last in itertools.product(range(count), repeat=2):
+            if first >= last:
+                self.assertEqual(changes[first, last], np.inf)
+                continue
+            reversed_order = np.concatenate((order[:first], order[first:last + 1][::-1], order[last + 1:]))
+            self.assertAlmostEqual(changes[first, last], route_transit(reversed_order, first_transit, transit) - total)
+
+    def test_two_opt(self):
+        """ Test 2-opt never makes an order worse, and is close to the best """
+        rng = np.random.default_rng(1234)
+        for _ in range(20):
+            count = 7
+            starts = rng.uniform((172, -44), (172.5, -43.5), (count, 2))
+            ends = starts + rng.uniform(-0.05, 0.05, (count, 2))
+            first_transit = distance_matrix((172.25, -43.75), starts)[0]
+            transit = distance_matrix(ends, starts)
+            order = nearest_neighbour(first_transit, transit)
+            improved = two_opt(order, first_transit, transit)
+            self.assertEqual(sorted(improved.tolist()), list(range(count)))
+            self.assertLessEqual(route_transit(improved, first_transit, transit), route_transit(order, first_transit, transit))
+            best = min(route_transit(list(perm), first_transit, transit) for perm in itertools.permutations(range(count)))
+            self.assertLess(route_transit(improved, first_transit, transit), best * 1.25)
+
+    def test_plan_route(self):
+        """ Test searches along a line are done in order, in the direction they are flown """
+        # Three searches heading east, given out of order
+        starts = [(172.6, -43.5), (172.4, -43.5), (172.2, -43.5)]
+        ends = [(172.7, -43.5), (172.5, -43.5), (172.3, -43.5)]
+        order, legs = plan_route((172.1, -43.5), starts, ends)
+        self.assertEqual(order.tolist(), [2, 1, 0])
+        self.assertEqual(len(legs), 3)
+        self.assertAlmostEqual(legs.sum(), distance_matrix((172.1, -43.5), (172.2, -43.5))[0, 0] * 3, delta=1)
+        order, legs = plan_route((172.1, -43.5), np.zeros((0, 2)), np.zeros((0, 2)))
+        self.assertEqual(len(order), 0)
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""
+Plan a creeping line across a polygon within a time budget
+
+Decomposing some user drawn polygons (lots of concave points) can take a
+very long time, so the planning is done in another process that can be
+killed when it goes over its budget. When that happens the creeping line
+is planned across the convex hull of the polygon instead, which is always
+quick (a convex polygon doesn't need decomposing).
+
+Points are passed as arrays (N x 2, in meters) rather than GEOS geometry,
+so they are cheap to send between processes.
+"""
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+from django.contrib.gis.geos import LinearRing
+
+from search.polygon.convex import creep_line_concave, creep_line_concave_best_angle, creep_line_at_angle, creep_angles, points_from_linestring
+
+# Default time (in seconds) to spend planning a polygon search
+DEFAULT_TIME_BUDGET = 10
+
+# Processes are forked from a server process (which has this module loaded already)
+# rather than the web worker, so they don't inherit its threads or connections
+_CONTEXT = multiprocessing.get_context('forkserver')
+_CONTEXT.set_forkserver_preload([__name__])
+
+
+def creep_line_task(pts, width, angle=None):
+    """ Returns the points (M x 2) of a creeping line across the polygon
+    (LinearRing points, N x 2), and the angle it was planned at
+
+    When angle is None the best angle is found
+    (see creep_line_concave_best_angle) """
+    lrng = LinearRing(np.asarray(pts, dtype=np.float64))
+    if angle is None:
+        line, angle = creep_line_concave_best_angle(lrng, width)
+    else:
+        line = creep_line_concave(lrng, width, angle=angle)
+    return np.array(points_from_linestring(line)), angle
+
+
+def creep_line_hull(pts, width, angle=None):
+    """ Returns the points (M x 2) of a creeping line across the convex hull
+    of the polygon (LinearRing points, N x 2), and the angle it was planned at
+
+    When angle is None the angle with the fewest turns is used """
+    hull = LinearRing(np.asarray(pts, dtype=np.float64)).convex_hull[0]
+    best = None
+    for candidate in creep_angles(hull) if angle is None else [angle]:
+        line = creep_line_at_angle(hull, width, candidate)
+        key = (len(line), line.length)
+        if best is None or key < best[0]:
+            best = (key, line, candidate)
+    return np.array(points_from_linestring(best[1])), best[2]  # pylint: disable=E1136
+
+
+def creep_line_with_budget(pts, width, angle=None, budget=DEFAULT_TIME_BUDGET):
+    """ Returns the points (M x 2) of a creeping line across the polygon
+    (LinearRing points, N x 2), the angle it was planned at, and whether
+    it went over budget (so the convex hull was used instead) """
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=_CONTEXT)
+    try:
+        # Find the worker now, so it can be stopped if it takes too long
+        pid = pool.submit(os.getpid).result()
+        future = pool.submit(creep_line_task, pts, width, angle)
+        try:
+            line, angle = future.result(timeout=budget)
+            return line, angle, False
+        except FutureTimeoutError:
+            os.kill(pid, signal.SIGKILL)
+    finally:
+        # Don't wait for the worker, it's either finished or been killed
+        pool.shutdown(wait=False, cancel_futures=True)
+    line, angle = creep_line_hull(pts, width, angle)
+    return line, angle, True
@@ -4,11 +4,13 @@ Functions for convex polygons
 
 - Decompose a concave polygon into multiple convex polygons (decomp)
 - Generate a creeping line search over a convex polygon (creep_line)
+- Rotate the creeping line to a given (or the best) orientation
 """
 import math
-from django.contrib.gis.geos import Point, LineString, LinearRing
+import struct
+from django.contrib.gis.geos import GEOSGeometry, Point, LineString, LinearRing
 import numpy as np
-from haversine import haversine, Unit
+from haversine import haversine, haversine_vector, Unit
 
 
 def pt_relv(pt_a, pt_b):
@@ -153,9 +155,175 @@ def sublrng(pt0, pt1, lrng):
     return LinearRing(lrng[idx0:-1] + lrng[:idx1+1] + [pt0])
 
 
+def creep_line_stripes(ymin, ymax, width):
+    """ Returns an array of the y coord of each stripe
+
+    Stripes are spaced width apart from ymin, with a final
+    stripe on ymax. The values are accumulated the same way
+    as repeatedly adding width, so they match creep_line_geos."""
+    if width <= 0:
+        raise ValueError("Width must be positive")
+    count = int((ymax - ymin) // width) + 2
+    ys = np.cumsum(np.concatenate(([ymin], np.full(count, width, dtype=np.float64))))
+    ys = ys[ys < ymax]
+    return np.append(ys, ymax)
+
+
+def stripe_points(geometry, reverse):
+    """ Returns the list of coords in a (normalized) stripe intersection
+
+    Point intersections are returned as is, anything else
+    is flattened and reversed if required."""
+    if isinstance(geometry, Point):
+        return [geometry.coords]
+    pts = []
+    for part in geometry:
+        if isinstance(part, LineString):
+            pts.extend(part.coords)
+        elif isinstance(part, Point):
+            pts.append(part.coords)
+        else:
+            pts.append(part)
+    if reverse:
+        pts.reverse()
+    return pts
+
+
+def creep_line_points(lrng, width):
+    """ Returns an array of points (N x 2) which represents
+    a creeping path through a convex LinearRing
+
+    All of the stripe/edge intersections are calculated
+    in one pass over the edges of the ring.
+    Stripes that pass through a vertex are handed to
+    GEOS, as they can touch or run along an edge."""
+    xmin, ymin, xmax, ymax = lrng.extent
+    coords = np.asarray(lrng.coords, dtype=np.float64)[:, :2]
+    ys = creep_line_stripes(ymin, ymax, width)
+
+    # Find the stripes that cross each edge (excluding the ends)
+    x_0, y_0 = coords[:-1, 0], coords[:-1, 1]
+    x_1, y_1 = coords[1:, 0], coords[1:, 1]
+    first = np.searchsorted(ys, np.minimum(y_0, y_1), side='right')
+    last = np.searchsorted(ys, np.maximum(y_0, y_1), side='left')
+    counts = np.maximum(last - first, 0)
+    edge = np.repeat(np.arange(len(counts)), counts)
+    stripe = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - first, counts)
+
+    # Stripes through a vertex are degenerate
+    degenerate = np.isin(ys, coords[:, 1])
+    keep = ~degenerate[stripe]
+    edge = edge[keep]
+    stripe = stripe[keep]
+    hits_y = ys[stripe]
+    hits_x = x_0[edge] + (hits_y - y_0[edge]) * (x_1[edge] - x_0[edge]) / (y_1[edge] - y_0[edge])
+
+    # Each stripe changes direction, unless it only touched a single point
+    toggles = np.ones(len(ys), dtype=np.int64)
+    fallback = {}
+    for idx in np.flatnonzero(degenerate):
+        i = lrng.intersection(LineString((xmin, ys[idx]), (xmax, ys[idx])))
+        i.normalize()
+        fallback[idx] = i
+        if isinstance(i, Point):
+            toggles[idx] = 0
+    reverse = (np.cumsum(toggles) - toggles) % 2 == 1
+
+    # Normalized stripes run from east to west, reversed ones west to east
+    order = np.lexsort((np.where(reverse[stripe], hits_x, -hits_x), stripe))
+    stripe = stripe[order]
+    hits = np.column_stack((hits_x[order], hits_y[order]))
+
+    pieces = []
+    start = 0
+    for idx in sorted(fallback):
+        end = np.searchsorted(stripe, idx)
+        pieces.append(hits[start:end])
+        pts = stripe_points(fallback[idx], reverse[idx])
+        pieces.append(np.asarray(pts, dtype=np.float64).reshape(-1, 2))
+        start = end
+    pieces.append(hits[start:])
+
+    return np.concatenate(pieces)
+
+
+def linestring_from_points(pts, srid=None):
+    """ Returns a LineString from an array of points (N x 2)
+
+    Builds the WKB directly, which avoids setting each
+    coordinate of the LineString one at a time."""
+    pts = np.ascontiguousarray(pts, dtype='<f8')
+    wkb = b'\x01' + struct.pack('<II', 2, len(pts)) + pts.tobytes()
+    return GEOSGeometry(memoryview(wkb), srid=srid)
+
+
+def points_from_linestring(line):
+    """ Returns an array of points (N x 2) from a LineString (or LinearRing)
+
+    Reads the WKB directly, which avoids getting each
+    coordinate of the LineString one at a time."""
+    if line.hasz:
+        return np.array(line.coords)[:, :2]
+    wkb = bytes(line.wkb)
+    return np.frombuffer(wkb, dtype='<f8' if wkb[0] == 1 else '>f8', offset=9).reshape(-1, 2)
+
+
 def creep_line(lrng, width):
     """ Return a LineString which represents
     a creeping path through a convex LinearRing """
+    return linestring_from_points(creep_line_points(lrng, width))
+
+
+def rotate_points(pts, angle):
+    """ Rotate an array of points (N x 2) anti-clockwise
+    about the origin by angle (in degrees) """
+    if angle % 90 == 0:
+        # Exact, so edges on the axes stay on the axes
+        cos, sin = ((1, 0), (0, 1), (-1, 0), (0, -1))[int(angle // 90) % 4]
+    else:
+        theta = math.radians(angle)
+        cos, sin = math.cos(theta), math.sin(theta)
+    pts = np.asarray(pts, dtype=np.float64)[:, :2]
+    return np.column_stack((pts[:, 0] * cos - pts[:, 1] * sin,
+                            pts[:, 0] * sin + pts[:, 1] * cos))
+
+
+def creep_line_at_angle(lrng, width, angle):
+    """ Return a LineString which represents a creeping path
+    through a convex LinearRing, at the given orientation.
+
+    The angle is the direction (in degrees, clockwise from north)
+    that the path progresses in, with each pass at right angles to it.
+    An angle of 0 runs passes west/east and progresses north
+    (the same as creep_line)."""
+    if angle % 360 == 0:
+        return creep_line(lrng, width)
+    # Rotate so that the direction of progression is north
+    rotated = LinearRing(rotate_points(lrng.coords, angle))
+    pts = creep_line_points(rotated, width)
+    return linestring_from_points(rotate_points(pts, -angle))
+
+
+def creep_angles(lrng):
+    """ Returns the candidate orientations (whole degrees, 0-179) for
+    a creeping path through a LinearRing.
+
+    The narrowest width of a polygon is always across one of the edges
+    of its convex hull (rotating calipers), so progressing at right
+    angles to each hull edge gives the fewest passes."""
+    hull = np.asarray(LinearRing(list(lrng)).convex_hull.coords[0], dtype=np.float64)
+    edges = np.diff(hull, axis=0)
+    bearings = np.degrees(np.arctan2(edges[:, 0], edges[:, 1])) + 90
+    angles = np.round(bearings).astype(int) % 180
+    return sorted(set(angles.tolist()) | {0, 90})
+
+
+def creep_line_geos(lrng, width):
+    """ Return a LineString which represents
+    a creeping path through a convex LinearRing
+
+    Uses one GEOS intersection per stripe, see creep_line
+    for the vectorized version."""
     xmin, ymin, xmax, ymax = lrng.extent
     # xdist = xmax - xmin
     ydist = width
@@ -338,15 +506,19 @@ def perimeter_subarray(pts, pt_arr):
         yield pt_arr[index0:index1+1]
 
 
-def creep_line_concave(lrng, width):
+def creep_line_concave(lrng, width, angle=0, lrngs_convex=None):
     """ Return a LineString creeping path across all convex polygons in a
-    concave polygon"""
+    concave polygon
+
+    angle is the orientation of the creeping path (see creep_line_at_angle)
+    lrngs_convex can be passed in to avoid decomposing lrng again"""
     # Decompose LinearRing into several convex LinearRings
     #pylint: disable=R1721
-    lrngs_convex = decomp(LinearRing([pt for pt in lrng]))
+    if lrngs_convex is None:
+        lrngs_convex = decomp(LinearRing([pt for pt in lrng]))
 
     # Create creeping line (LineString) for each convex LinearRing
-    creep_lines = [creep_line(lr, width) for lr in lrngs_convex]
+    creep_lines = [creep_line_at_angle(lr, width, angle) for lr in lrngs_convex]
 
     # Create a list of points for each creeping line start and end points
     creep_line_start_points = [lr[0] for lr in lrngs_convex]
@@ -420,3 +592,28 @@ def creep_line_concave(lrng, width):
     return LineString([p
                        for l in creep_lines_ordered
                        for p in l])
+
+
+def creep_line_concave_best_angle(lrng, width):
+    """ Return the best LineString creeping path across a concave
+    polygon, and the orientation (in degrees) it was created with
+
+    Each of the candidate orientations from creep_angles is tried, the
+    one with the fewest turns is used, ties are broken by the length."""
+    # pylint: disable=R1721
+    lrngs_convex = decomp(LinearRing([pt for pt in lrng]))
+    best = None
+    for angle in creep_angles(lrng):
+        line = creep_line_concave(lrng, width, angle=angle, lrngs_convex=lrngs_convex)
+        key = (len(line), line.length)
+        if best is None or key < best[0]:
+            best = (key, line, angle)
+    return best[1], best[2]
+
+
+def lonlat_path_length(line_lonlat):
+    """ Returns the length (in meters) of a lon/lat LineString """
+    pts = np.asarray(line_lonlat.coords, dtype=np.float64)[:, 1::-1]
+    if len(pts) < 2:
+        return 0.0
+    return float(np.sum(haversine_vector(pts[:-1], pts[1:], Unit.METERS)))
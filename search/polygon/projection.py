@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Local projection between lon/lat and meters
+
+- Project lon/lat points onto a plane in meters (lonlat_to_local)
+- Convert the points back to lon/lat (local_to_lonlat)
+
+This is an azimuthal equidistant projection centered on the area of
+interest (i.e. the centroid of a polygon), so distances stay accurate
+across the whole area instead of only near a single skew point.
+"""
+import numpy as np
+from django.contrib.gis.geos import LineString
+from search.polygon.convex import linestring_from_points, points_from_linestring
+
+# Mean radius of the earth in meters (the same one haversine uses)
+EARTH_RADIUS = 6371008.8
+
+
+def lonlat_to_local(pts, center):
+    """ Project an array of lon/lat points (N x 2) to meters
+    east (x) and north (y) of the center (lon, lat) """
+    pts = np.radians(np.asarray(pts, dtype=np.float64)[:, :2])
+    lon0, lat0 = np.radians(center[0]), np.radians(center[1])
+    d_lon = pts[:, 0] - lon0
+    sin_lat, cos_lat = np.sin(pts[:, 1]), np.cos(pts[:, 1])
+    sin_lat0, cos_lat0 = np.sin(lat0), np.cos(lat0)
+
+    east = cos_lat * np.sin(d_lon)
+    north = cos_lat0 * sin_lat - sin_lat0 * cos_lat * np.cos(d_lon)
+    cos_c = sin_lat0 * sin_lat + cos_lat0 * cos_lat * np.cos(d_lon)
+
+    # Scale so the distance from the center is the angular distance (c)
+    sin_c = np.hypot(east, north)
+    ang = np.arctan2(sin_c, cos_c)
+    scale = np.ones_like(sin_c)
+    nonzero = sin_c > 0
+    scale[nonzero] = ang[nonzero] / sin_c[nonzero]
+    return np.column_stack((east * scale, north * scale)) * EARTH_RADIUS
+
+
+def local_to_lonlat(pts, center):
+    """ Convert an array of points (N x 2) in meters from the
+    center (lon, lat) back to lon/lat """
+    pts = np.asarray(pts, dtype=np.float64)[:, :2]
+    lon0, lat0 = np.radians(center[0]), np.radians(center[1])
+    sin_lat0, cos_lat0 = np.sin(lat0), np.cos(lat0)
+
+    rho = np.hypot(pts[:, 0], pts[:, 1])
+    ang = rho / EARTH_RADIUS
+    sin_c, cos_c = np.sin(ang), np.cos(ang)
+
+    # At the center the direction is undefined (but doesn't matter)
+    safe_rho = np.where(rho > 0, rho, 1)
+    lat = np.arcsin(np.clip(cos_c * sin_lat0 + pts[:, 1] * sin_c * cos_lat0 / safe_rho, -1, 1))
+    lon = lon0 + np.arctan2(pts[:, 0] * sin_c, rho * cos_lat0 * cos_c - pts[:, 1] * sin_lat0 * sin_c)
+    lon = (lon + np.pi) % (2 * np.pi) - np.pi
+    return np.degrees(np.column_stack((lon, lat)))
+
+
+def _geometry_points(geometry):
+    """ The points of a Geometry as an array (N x 2) """
+    if isinstance(geometry, LineString):
+        return points_from_linestring(geometry)
+    return np.array(geometry.coords)
+
+
+def conv_lonlat_to_local(geometry, center):
+    """ Converts a lonlat Geometry to a meters Geometry
+    centered on center (lon, lat) """
+    pts = lonlat_to_local(_geometry_points(geometry), center)
+    if type(geometry) is LineString:  # pylint: disable=C0123
+        return linestring_from_points(pts)
+    return geometry.__class__(pts)
+
+
+def conv_local_to_lonlat(geometry, center):
+    """ Converts a meters Geometry centered on center (lon, lat)
+    back to a lonlat Geometry """
+    pts = local_to_lonlat(_geometry_points(geometry), center)
+    if type(geometry) is LineString:  # pylint: disable=C0123
+        return linestring_from_points(pts, srid=4326)
+    return geometry.__class__(pts, srid=4326)
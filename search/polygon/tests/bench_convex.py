@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""
+Benchmarks for Convex Polygon module
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.polygon.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+from django.contrib.gis.geos import LinearRing
+from search.polygon.convex import creep_line, creep_line_geos, creep_line_points
+
+
+class BenchConvex(unittest.TestCase):
+    """ Benchmark creeping line generation """
+    # 20km x 10km hexagon (in meters)
+    LRNG = LinearRing((
+        (0, 0), (-5000, 5000), (0, 10000), (15000, 10000),
+        (20000, 5000), (15000, 0), (0, 0)))
+
+    def bench(self, func, width, number=3):
+        """ Return the best time (in seconds) to run func """
+        return min(timeit.repeat(lambda: func(self.LRNG, width), number=1, repeat=number))
+
+    def test_creep_line_sweep_widths(self):
+        """ Compare the vectorized and GEOS creeping lines across sweep widths """
+        print()
+        print(f"{'sweep width':>12} {'stripes':>8} {'geos (ms)':>10} {'numpy (ms)':>11} {'points (ms)':>12} {'speedup':>8}")
+        for width in (1000, 200, 50, 10, 2):
+            stripes = len(creep_line(self.LRNG, width)) // 2
+            geos = self.bench(creep_line_geos, width)
+            vectorized = self.bench(creep_line, width)
+            points = self.bench(creep_line_points, width)
+            print(f"{width:>12} {stripes:>8} {geos * 1000:>10.2f} {vectorized * 1000:>11.2f} {points * 1000:>12.2f} {geos / vectorized:>7.1f}x")
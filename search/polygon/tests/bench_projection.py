@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""
+Benchmarks for the local projection module
+
+These are not run as part of the normal test suite, run them with:
+./manage.py test search.polygon.tests --pattern="bench_*.py"
+"""
+
+import timeit
+import unittest
+import numpy as np
+from django.contrib.gis.geos import LineString
+from search.polygon.convex import conv_lonlat_to_meters, conv_meters_to_lonlat, linestring_from_points
+from search.polygon.projection import conv_lonlat_to_local, conv_local_to_lonlat
+
+
+class BenchProjection(unittest.TestCase):
+    """ Benchmark converting lines between lon/lat and meters """
+    CENTER = (172.5, -43.5)
+    POINTS = 10000
+
+    def bench(self, func, number=5):
+        """ Return the best time (in seconds) to run func """
+        return min(timeit.repeat(func, number=1, repeat=number))
+
+    def test_transform_10k_points(self):
+        """ Compare the skew and local projection transforms on a 10k point line """
+        rng = np.random.default_rng(1234)
+        lonlat = rng.uniform((171.5, -44.5), (173.5, -42.5), (self.POINTS, 2))
+        line_lonlat = linestring_from_points(lonlat, srid=4326)
+        skew_point = line_lonlat[0]
+        line_skew = conv_lonlat_to_meters(line_lonlat, skew_point)
+        line_local = conv_lonlat_to_local(line_lonlat, self.CENTER)
+        self.assertIsInstance(line_local, LineString)
+
+        print()
+        print(f"{'direction':>16} {'skew (ms)':>10} {'local (ms)':>11} {'speedup':>8}")
+        for direction, skew, local in (
+                ('lonlat->meters',
+                 lambda: conv_lonlat_to_meters(line_lonlat, skew_point),
+                 lambda: conv_lonlat_to_local(line_lonlat, self.CENTER)),
+                ('meters->lonlat',
+                 lambda: conv_meters_to_lonlat(line_skew, skew_point),
+                 lambda: conv_local_to_lonlat(line_local, self.CENTER))):
+            skew = self.bench(skew)
+            local = self.bench(local)
+            print(f"{direction:>16} {skew * 1000:>10.2f} {local * 1000:>11.2f} {skew / local:>7.1f}x")
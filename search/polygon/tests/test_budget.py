@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+UnitTests for planning polygon searches within a time budget
+"""
+
+import unittest
+import numpy as np
+from django.contrib.gis.geos import LinearRing, Polygon
+from search.polygon.budget import creep_line_task, creep_line_hull, creep_line_with_budget
+
+
+class TestBudget(unittest.TestCase):
+    """ Test planning a creeping line with a time budget """
+    def setUp(self):
+        # A U shape, 1000m square with a 600m x 800m notch out of the top
+        self.u_shape = np.array([(0, 0), (1000, 0), (1000, 1000), (800, 1000), (800, 200), (200, 200), (200, 1000), (0, 1000), (0, 0)], dtype=np.float64)
+
+    def test_within_budget(self):
+        """ Test a polygon planned within the budget is the same as planning it directly """
+        line, angle, over_budget = creep_line_with_budget(self.u_shape, 100, angle=None, budget=60)
+        expected, expected_angle = creep_line_task(self.u_shape, 100)
+        self.assertFalse(over_budget)
+        self.assertEqual(angle, expected_angle)
+        np.testing.assert_allclose(line, expected)
+
+        line, angle, over_budget = creep_line_with_budget(self.u_shape, 100, angle=45, budget=60)
+        self.assertFalse(over_budget)
+        self.assertEqual(angle, 45)
+
+    def test_over_budget(self):
+        """ Test the convex hull is searched when the budget runs out """
+        line, angle, over_budget = creep_line_with_budget(self.u_shape, 100, angle=0, budget=0)
+        self.assertTrue(over_budget)
+        self.assertEqual(angle, 0)
+        expected, _ = creep_line_hull(self.u_shape, 100, 0)
+        np.testing.assert_allclose(line, expected)
+        # It still works after the worker was stopped
+        _, _, over_budget = creep_line_with_budget(self.u_shape, 100, angle=0, budget=60)
+        self.assertFalse(over_budget)
+
+    def test_hull(self):
+        """ Test the hull search covers the notch, where the polygon search doesn't """
+        polygon_line, _ = creep_line_task(self.u_shape, 100, 0)
+        hull_line, angle = creep_line_hull(self.u_shape, 100)
+        self.assertIn(angle, (0, 90))
+        notch = Polygon(LinearRing(((300, 300), (700, 300), (700, 900), (300, 900), (300, 300))))
+        in_notch = [notch.contains(Polygon.from_bbox((x - 1, y - 1, x + 1, y + 1))) for x, y in polygon_line]
+        self.assertFalse(any(in_notch))
+        self.assertGreater(len(hull_line), 2)
+        hull_ys = sorted(set(np.round(hull_line[:, 1]).tolist()))
+        self.assertLessEqual(hull_ys[0], 100)
+        self.assertGreaterEqual(hull_ys[-1], 900)
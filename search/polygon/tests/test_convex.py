@@ -5,7 +5,8 @@ UnitTests for Convex Polygon module
 
 import unittest
 import math
-from django.contrib.gis.geos import LineString, LinearRing, Point
+import numpy as np
+from django.contrib.gis.geos import LineString, LinearRing, Point, MultiPoint
 from search.polygon.convex import (pt_relv,
                                    pt_corner_relv,
                                    vec_cosine_rule,
@@ -16,8 +17,18 @@ from search.polygon.convex import (pt_relv,
                                    sublrng,
                                    decomp,
                                    creep_line,
+                                   creep_line_geos,
+                                   creep_line_points,
+                                   creep_line_stripes,
+                                   linestring_from_points,
+                                   points_from_linestring,
                                    perimeter_subarray,
                                    creep_line_concave,
+                                   creep_line_at_angle,
+                                   creep_angles,
+                                   creep_line_concave_best_angle,
+                                   rotate_points,
+                                   lonlat_path_length,
                                    conv_lonlat_to_meters)
 
 
@@ -265,6 +276,62 @@ class TestConvex(unittest.TestCase):
         self.assertEqual(lstr0bbb, lstr0bbb_expected)
         self.assertEqual(lstr1aaa, lstr1aaa_expected)
 
+    def assert_lines_equal(self, line_a, line_b, places=6):
+        """ Check two LineStrings have the same points (within places) """
+        self.assertEqual(len(line_a), len(line_b))
+        for pt_a, pt_b in zip(line_a, line_b):
+            self.assertAlmostEqual(pt_a[0], pt_b[0], places=places)
+            self.assertAlmostEqual(pt_a[1], pt_b[1], places=places)
+
+    def test_creep_line_stripes(self):
+        """ Test stripes are spaced by width with a final stripe on ymax """
+        self.assertEqual(list(creep_line_stripes(0, 1, 1)), [0, 1])
+        self.assertEqual(list(creep_line_stripes(0, 1, 1.1)), [0, 1])
+        self.assertEqual(list(creep_line_stripes(0, 1, 0.3)),
+                         [0, 0.3, 0.6, 0.8999999999999999, 1])
+        self.assertEqual(list(creep_line_stripes(2, 2, 1)), [2])
+        with self.assertRaises(ValueError):
+            creep_line_stripes(0, 1, 0)
+
+    def test_creep_line_parity(self):
+        """ Test the vectorized creeping line matches the GEOS version """
+        rings = [
+            # Square, triangle and a W shape (concave)
+            LinearRing(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0))),
+            LinearRing(((0, 0), (0, 1), (1, 1), (0, 0))),
+            LinearRing(((0, 0), (1, 4), (2, 1), (3, 4), (4, 0.5), (0, 0))),
+            # Diamond (single point at the top and bottom)
+            LinearRing(((0, 0), (-3, 5), (0, 10), (3, 5), (0, 0))),
+        ]
+        rng = np.random.default_rng(1234)
+        for _ in range(20):
+            hull = MultiPoint([Point(*pt) for pt in rng.uniform(-5000, 5000, (12, 2))]).convex_hull
+            rings.append(hull[0])
+
+        for lrng in rings:
+            height = lrng.extent[3] - lrng.extent[1]
+            for stripes in (1, 3, 10, 97, 200):
+                width = height / stripes * 1.01
+                self.assert_lines_equal(creep_line(lrng, width),
+                                        creep_line_geos(lrng, width))
+
+    def test_creep_line_points(self):
+        """ Test the point array for a creeping line over a rectangle """
+        lrng0 = LinearRing((
+            (0, 0), (0, 10), (4, 10), (4, 0), (0, 0)))
+        pts = creep_line_points(lrng0, 5)
+        self.assertEqual(pts.shape, (6, 2))
+        self.assertEqual(pts.tolist(),
+                         [[0, 0], [4, 0], [0, 5], [4, 5], [0, 10], [4, 10]])
+
+    def test_points_from_linestring(self):
+        """ Test reading the point array back out of lines and rings """
+        pts = [[0, 0], [0, 10.5], [4, 10], [4, 0], [0, 0]]
+        self.assertEqual(points_from_linestring(LineString(pts)).tolist(), pts)
+        self.assertEqual(points_from_linestring(LinearRing(pts)).tolist(), pts)
+        self.assertEqual(points_from_linestring(linestring_from_points(pts, srid=4326)).tolist(), pts)
+        self.assertEqual(points_from_linestring(LineString((0, 1, 2), (3, 4, 5))).tolist(), [[0, 1], [3, 4]])
+
     def test_creep_line_lonlat(self):
         """ Test creeping line generation over geographic data"""
         # Triangle
@@ -332,6 +399,15 @@ class TestConvex(unittest.TestCase):
         self.assertEqual(pt_array[1:4 + 1],
                          peri_sub_gen.__next__())
 
+    def test_rotate_points(self):
+        """ Test rotating points anti-clockwise about the origin """
+        pts = rotate_points([(1, 0), (0, 2)], 90)
+        self.assertEqual(pts.shape, (2, 2))
+        self.assertAlmostEqual(pts[0][0], 0)
+        self.assertAlmostEqual(pts[0][1], 1)
+        self.assertAlmostEqual(pts[1][0], -2)
+        self.assertAlmostEqual(pts[1][1], 0)
+
     def test_creep_line_at_angle(self):
         """ Test creeping line generation over convex LinearRing,
         at various angles. """
@@ -340,13 +416,53 @@ class TestConvex(unittest.TestCase):
         # Angle +90deg = East
 
         # Plain square
-        #lrng0 = LinearRing((
-        #    (0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))
+        lrng0 = LinearRing((
+            (0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))
 
         # Creeping line @ same size as square
-        #lstr0aaa = creep_line_at_angle(lrng0, 1, 0)
-        #lstr0aaa_expected = LineString(
-        #    (0, 0), (1, 0), (1, 1), (0, 1)
-        #)
+        lstr0aaa = creep_line_at_angle(lrng0, 1, 0)
+        lstr0aaa_expected = LineString(
+            (0, 0), (1, 0), (1, 1), (0, 1)
+        )
 
-        #self.assertEqual(lstr0aaa, lstr0aaa_expected)
+        self.assertEqual(lstr0aaa, lstr0aaa_expected)
+
+        # Progressing east, so each pass runs south/north
+        lrng1 = LinearRing((
+            (0, 0), (0, 10), (4, 10), (4, 0), (0, 0)))
+        lstr1 = creep_line_at_angle(lrng1, 1, 90)
+        self.assertEqual(len(lstr1), 10)
+        for i in range(0, len(lstr1), 2):
+            self.assertAlmostEqual(lstr1[i][0], lstr1[i + 1][0])
+            self.assertAlmostEqual(abs(lstr1[i][1] - lstr1[i + 1][1]), 10)
+        self.assertEqual(sorted({round(pt[0], 6) for pt in lstr1}),
+                         [0, 1, 2, 3, 4])
+
+    def test_creep_angles(self):
+        """ Test the candidate angles follow the convex hull edges """
+        # Rectangle with edges at 30 and 120 degrees (and a notch)
+        pts = rotate_points([(0, 0), (0, 200), (5000, 200), (5000, 0),
+                             (2500, 100), (0, 0)], -30)
+        angles = creep_angles(LinearRing(pts))
+        self.assertIn(30, angles)
+        self.assertIn(120, angles)
+        self.assertIn(0, angles)
+        self.assertIn(90, angles)
+        for angle in angles:
+            self.assertTrue(0 <= angle < 180)
+
+    def test_creep_line_concave_best_angle(self):
+        """ Test the best angle follows a long thin polygon """
+        # 10km x 400m rectangle, rotated to run north-east
+        lrng = LinearRing(rotate_points([(0, 0), (0, 400), (10000, 400),
+                                         (10000, 0), (0, 0)], 45))
+        line, angle = creep_line_concave_best_angle(lrng, 100)
+        line_0 = creep_line_concave(lrng, 100)
+        self.assertEqual(angle, 135)
+        self.assertLess(len(line), 12)
+        self.assertLess(len(line), len(line_0))
+
+    def test_lonlat_path_length(self):
+        """ Test the length of a lon/lat line """
+        line = LineString((172.5, -43.5), (172.5, -43.6), (172.6, -43.6))
+        self.assertAlmostEqual(lonlat_path_length(line), 11119.5 + 8052.5, delta=10)
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""
+UnitTests for the local projection module
+"""
+
+import unittest
+import numpy as np
+from haversine import haversine_vector, Unit
+from django.contrib.gis.geos import LinearRing, LineString
+from search.polygon.convex import (creep_line_concave,
+                                   conv_lonlat_to_meters,
+                                   conv_meters_to_lonlat)
+from search.polygon.projection import (lonlat_to_local,
+                                       local_to_lonlat,
+                                       conv_lonlat_to_local,
+                                       conv_local_to_lonlat)
+
+
+def square_lonlat(center, size):
+    """ A LinearRing (lon/lat) that is roughly size meters across """
+    d_lat = size / 111195 / 2
+    d_lon = d_lat / np.cos(np.radians(center[1]))
+    lon, lat = center
+    return LinearRing((
+        (lon - d_lon, lat - d_lat), (lon - d_lon, lat + d_lat),
+        (lon + d_lon, lat + d_lat), (lon + d_lon, lat - d_lat),
+        (lon - d_lon, lat - d_lat)))
+
+
+def spacing_error(line_lonlat, center, width):
+    """ The largest error (as a ratio of width) in the spacing between
+    the ends of north/south passes, along the north and south edges """
+    pts = np.asarray(line_lonlat.coords)
+    errors = []
+    for edge in (pts[pts[:, 1] > center[1]], pts[pts[:, 1] < center[1]]):
+        edge = edge[np.argsort(edge[:, 0])]
+        spacing = haversine_vector(edge[:-1, ::-1], edge[1:, ::-1], Unit.METERS)
+        # The last pass is on the edge of the area, not width apart
+        errors.append(np.max(np.abs(spacing[1:-1] - width)) / width)
+    return max(errors)
+
+
+class TestProjection(unittest.TestCase):
+    """ Test the azimuthal equidistant projection """
+    CENTER = (172.5, -43.5)
+
+    def test_center(self):
+        """ Test the center is at the origin """
+        pts = lonlat_to_local([self.CENTER], self.CENTER)
+        self.assertEqual(pts.tolist(), [[0, 0]])
+        pts = local_to_lonlat([(0, 0)], self.CENTER)
+        self.assertAlmostEqual(pts[0][0], self.CENTER[0])
+        self.assertAlmostEqual(pts[0][1], self.CENTER[1])
+
+    def test_round_trip(self):
+        """ Test converting to meters and back """
+        rng = np.random.default_rng(1234)
+        lonlat = rng.uniform((170, -46), (175, -41), (1000, 2))
+        back = local_to_lonlat(lonlat_to_local(lonlat, self.CENTER), self.CENTER)
+        self.assertLess(np.max(np.abs(back - lonlat)), 1e-9)
+
+    def test_distance_from_center(self):
+        """ Test distances from the center are the great circle distances """
+        rng = np.random.default_rng(1234)
+        lonlat = rng.uniform((170, -46), (175, -41), (1000, 2))
+        pts = lonlat_to_local(lonlat, self.CENTER)
+        expected = haversine_vector(np.array([self.CENTER[::-1]]), lonlat[:, ::-1], Unit.METERS, comb=True)[:, 0]
+        self.assertLess(np.max(np.abs(np.hypot(pts[:, 0], pts[:, 1]) - expected)), 1e-6)
+
+    def test_north_is_up(self):
+        """ Test north is +y and east is +x """
+        pts = lonlat_to_local([(172.5, -43.4), (172.6, -43.5)], self.CENTER)
+        self.assertAlmostEqual(pts[0][0], 0)
+        self.assertGreater(pts[0][1], 0)
+        self.assertGreater(pts[1][0], 0)
+        self.assertAlmostEqual(pts[1][1], 0, delta=50)
+
+    def test_geometry(self):
+        """ Test converting geometries keeps their type """
+        lrng = square_lonlat(self.CENTER, 10000)
+        lrng_meters = conv_lonlat_to_local(lrng, self.CENTER)
+        self.assertIsInstance(lrng_meters, LinearRing)
+        self.assertAlmostEqual(lrng_meters.extent[2] - lrng_meters.extent[0], 10000, delta=10)
+        line = conv_local_to_lonlat(LineString((0, 0), (0, 1000)), self.CENTER)
+        self.assertIsInstance(line, LineString)
+        self.assertEqual(line.srid, 4326)
+        self.assertAlmostEqual(line[0][0], self.CENTER[0])
+
+    def test_spacing_error_by_area(self):
+        """ Test the spacing of passes stays accurate as the area grows
+
+        Scaling by the degree lengths at the first point drifts by
+        about 1.5% per 100km north/south (at 43 degrees south),
+        the local projection should stay within 0.1%. """
+        sizes = (1000, 10000, 100000, 300000)
+        skew_errors = []
+        local_errors = []
+        for size in sizes:
+            width = size / 20
+            lrng = square_lonlat(self.CENTER, size)
+
+            skew_point = lrng[0]
+            line = creep_line_concave(conv_lonlat_to_meters(lrng), width, angle=90)
+            skew_errors.append(spacing_error(conv_meters_to_lonlat(line, skew_point), self.CENTER, width))
+
+            line = creep_line_concave(conv_lonlat_to_local(lrng, self.CENTER), width, angle=90)
+            local_errors.append(spacing_error(conv_local_to_lonlat(line, self.CENTER), self.CENTER, width))
+
+        for size, error in zip(sizes, local_errors):
+            self.assertLess(error, 0.001, f"{size}m area")
+        self.assertGreater(skew_errors[2], 0.01)
+        self.assertGreater(skew_errors[3], 0.04)
+        self.assertEqual(skew_errors, sorted(skew_errors))
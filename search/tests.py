@@ -2,17 +2,25 @@
 Tests for search creation/management
 """
 
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.gis.geos import Point, LineString, Polygon
 
-from data.models import GeoTimeLabel
+from data.models import GeoTimeLabel, AssetPointTime
 
 from smm.tests import SMMTestUsers
 
+from assets.models import Asset
 from assets.tests import AssetsHelpers
 from mission.tests import MissionFunctions
 
-from .models import Search
+from jobs.models import Job
+
+from .models import Search, SearchCoverage
 
 
 class SearchWrapper:
@@ -65,21 +73,21 @@ class SearchWrapper:
             client = self.smm.client1
         return client.get(f'/search/{self.search_id}/', HTTP_ACCEPT='application/json')
 
-    def begin(self, client=None):
+    def begin(self, asset, client=None):
         """
         Begin this search
         """
         if client is None:
             client = self.smm.client1
-        return client.post(f'/search/{self.search_id}/begin/')
+        return client.post(f'/search/{self.search_id}/begin/', data={'asset_id': asset.pk})
 
-    def finished(self, client=None):
+    def finished(self, asset, client=None):
         """
         Mark this search as finished
         """
         if client is None:
             client = self.smm.client1
-        return client.post(f'/search/{self.search_id}/details/')
+        return client.post(f'/search/{self.search_id}/finished/', data={'asset_id': asset.pk})
 
 
 class SearchHelpers:
@@ -161,17 +169,21 @@ class SearchHelpers:
         })
         return SearchWrapper(self.smm, response.json())
 
-    def create_creepingline_search_polygon(self, polygon, sweep_width, asset_type, client=None):
+    def create_creepingline_search_polygon(self, polygon, sweep_width, asset_type, orientation=None, client=None):
+        # pylint: disable=R0913,R0917
         """
         Create a creeping line search from a line
         """
         if client is None:
             client = self.smm.client1
-        response = client.post('/search/creepingline/create/polygon/', data={
+        data = {
             'poly_id': polygon.pk,
             'asset_type_id': asset_type.pk,
             'sweep_width': sweep_width,
-        })
+        }
+        if orientation is not None:
+            data['orientation'] = orientation
+        response = client.post('/search/creepingline/create/polygon/', data=data)
         return SearchWrapper(self.smm, response.json())
 
     def find_closest(self, lat, long, asset, client=None):
@@ -364,6 +376,105 @@ class SearchTestCase(TestCase):
         self.assertEqual(search.iterations, None)
         self.assertEqual(search.first_bearing, None)
         self.assertEqual(search.width, None)
+        self.assertEqual(search.orientation, 0)
+        self.assertGreater(search.path_length, 0)
+
+    def test_0501_create_creepingline_polygon_orientation(self):
+        """
+        Test creating a creepingline search from polygon with a set orientation
+        """
+        polygon = self.create_polygon(((172.5, -43.5), (172.5, -43.6), (172.6, -43.6), (172.6, -43.5), (172.5, -43.5)))
+        search = self.searches.create_creepingline_search_polygon(polygon, 200, self.asset_type1, orientation=90).as_object()
+        self.assertEqual(search.search_type, 'Parallel Line')
+        self.assertEqual(search.orientation, 90)
+        # Progressing east, so the first pass runs north/south
+        self.assertAlmostEqual(search.geo[0][0], search.geo[1][0])
+
+    def test_0502_create_creepingline_polygon_auto_orientation(self):
+        """
+        Test creating a creepingline search from a long thin polygon with the best orientation
+        """
+        polygon = self.create_polygon(((172.5, -43.5), (172.51, -43.5), (172.61, -43.6), (172.6, -43.6), (172.5, -43.5)))
+        auto = self.searches.create_creepingline_search_polygon(polygon, 200, self.asset_type1, orientation='auto').as_object()
+        fixed = self.searches.create_creepingline_search_polygon(polygon, 200, self.asset_type1, orientation=0).as_object()
+        self.assertNotEqual(auto.orientation, 0)
+        self.assertLess(len(auto.geo), len(fixed.geo))
+        response = self.smm.client1.get('/search/creepingline/create/polygon/', data={
+            'poly_id': polygon.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+            'orientation': 'auto',
+        })
+        properties = response.json()['features'][0]['properties']
+        self.assertEqual(properties['orientation'], auto.orientation)
+        self.assertAlmostEqual(properties['path_length'], auto.path_length)
+
+    def test_0503_create_creepingline_polygon_invalid_orientation(self):
+        """
+        Test creating a creepingline search from polygon with an invalid orientation
+        """
+        polygon = self.create_polygon(((172.5, -43.5), (172.5, -43.6), (172.6, -43.6), (172.6, -43.5), (172.5, -43.5)))
+        response = self.smm.client1.post('/search/creepingline/create/polygon/', data={
+            'poly_id': polygon.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+            'orientation': 400,
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_0504_create_creepingline_polygon_background(self):
+        """
+        Test creating a creepingline search from polygon in a background job
+        """
+        polygon = self.create_polygon(((172.5, -43.5), (172.5, -43.6), (172.6, -43.6), (172.6, -43.5), (172.5, -43.5)))
+        data = {
+            'poly_id': polygon.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+            'background': 1,
+        }
+        # Preview
+        response = self.smm.client1.get('/search/creepingline/create/polygon/', data=data)
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.smm.client1.get(status_url).json()['status'], 'queued')
+        self.assertEqual(Job.run_queued(), 1)
+        preview = self.smm.client1.get(status_url).json()
+        self.assertEqual(preview['status'], 'done')
+        self.assertEqual(preview['result']['features'][0]['properties']['search_type'], 'Parallel Line')
+        self.assertFalse(Search.objects.filter(datum=polygon).exists())
+
+        # Create
+        response = self.smm.client1.post('/search/creepingline/create/polygon/', data=data)
+        self.assertEqual(response.status_code, 202)
+        Job.run_queued()
+        result = self.smm.client1.get(response.json()['status_url']).json()['result']
+        search = Search.objects.get(datum=polygon)
+        self.assertEqual(result['features'][0]['properties']['pk'], search.pk)
+        self.assertEqual(search.created_by, self.smm.user1)
+        self.assertEqual(len(result['features'][0]['geometry']['coordinates']), len(search.geo))
+
+    def test_0505_create_creepingline_polygon_over_budget(self):
+        """
+        Test a polygon that takes too long to plan searches the convex hull instead
+        """
+        # A U shape, so the convex hull is different
+        polygon = self.create_polygon(((172.5, -43.5), (172.5, -43.6), (172.6, -43.6), (172.6, -43.5), (172.58, -43.5), (172.58, -43.58), (172.52, -43.58), (172.52, -43.5), (172.5, -43.5)))
+        data = {
+            'poly_id': polygon.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+            'orientation': 0,
+        }
+        response = self.smm.client1.get('/search/creepingline/create/polygon/', data=data)
+        self.assertNotIn('X-Search-Fallback', response)
+        planned = response.json()['features'][0]['geometry']['coordinates']
+        with self.settings(SEARCH_POLYGON_TIME_BUDGET=0):
+            response = self.smm.client1.get('/search/creepingline/create/polygon/', data=data)
+        self.assertEqual(response['X-Search-Fallback'], 'convex hull')
+        hull = response.json()['features'][0]['geometry']['coordinates']
+        self.assertNotEqual(len(hull), len(planned))
+        self.assertEqual(response.json()['features'][0]['properties']['orientation'], 0)
 
     def test_0600_create_shoreline_basic(self):
         """
@@ -385,6 +496,70 @@ class SearchTestCase(TestCase):
         self.assertEqual(search.first_bearing, None)
         self.assertEqual(search.width, None)
 
+    def test_0601_search_shape_fields(self):
+        """
+        Test the length, start/end points and bounding box are stored with a search
+        """
+        line = self.create_line(((172.5, -43.5), (172.6, -43.6), (172.55, -43.65)))
+        wrapper = self.searches.create_shoreline_search(line, 200, self.asset_type1)
+        search = wrapper.as_object()
+        self.assertEqual(search.start_point.coords, (172.5, -43.5))
+        self.assertEqual(search.end_point.coords, (172.55, -43.65))
+        self.assertEqual(search.bbox.extent, (172.5, -43.65, 172.6, -43.5))
+        self.assertAlmostEqual(search.length(), super(Search, search).length(), delta=search.length() * 0.005)
+        response = wrapper.json()
+        properties = response.json()['features'][0]['properties']
+        self.assertAlmostEqual(properties['path_length'], search.path_length)
+        self.assertIn('start_point', properties)
+        self.assertIn('end_point', properties)
+        self.assertIn('bbox', properties)
+
+    def test_0700_create_tracklinereturn(self):
+        """
+        Test creating a track line return search (from the generic pattern url)
+        """
+        line = self.create_line(((172.5, -43.5), (172.6, -43.6)))
+        response = self.smm.client1.post('/search/pattern/tracklinereturn/create/', data={
+            'line_id': line.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+        })
+        search = SearchWrapper(self.smm, response.json()).as_object()
+        self.assertEqual(search.search_type, 'Track Line Return')
+        self.assertEqual(search.datum.pk, line.pk)
+        self.assertEqual(len(search.geo), 4)
+        # Out and back, so about twice as long as the line
+        self.assertAlmostEqual(search.length(), 2 * line.length(), delta=search.length() * 0.01)
+
+    def test_0701_pattern_errors(self):
+        """
+        Test unknown patterns, datums of the wrong type and invalid parameters are rejected
+        """
+        poi = self.create_poi(-43.5, 172.5)
+        line = self.create_line(((172.5, -43.5), (172.6, -43.6)))
+        data = {
+            'poi_id': poi.pk,
+            'asset_type_id': self.asset_type1.pk,
+            'sweep_width': 200,
+        }
+        self.assertEqual(self.smm.client1.get('/search/pattern/unknown/create/', data=data).status_code, 404)
+        self.assertEqual(self.smm.client1.get('/search/pattern/trackline/create/', data={**data, 'line_id': poi.pk}).status_code, 404)
+        self.assertEqual(self.smm.client1.get('/search/pattern/expandingbox/create/', data=data).status_code, 400)
+        self.assertEqual(self.smm.client1.get('/search/pattern/sector/create/', data={**data, 'sweep_width': 0}).status_code, 400)
+        self.assertEqual(self.smm.client1.get('/search/pattern/sector/create/', data=data).status_code, 200)
+        self.assertEqual(self.smm.client1.get('/search/pattern/trackline/create/', data={**data, 'line_id': line.pk}).status_code, 200)
+        self.assertFalse(Search.objects.exists())
+
+    def test_0702_pattern_list(self):
+        """
+        Test listing the search patterns and their parameters
+        """
+        patterns = {pattern['name']: pattern for pattern in self.smm.client1.get('/search/pattern/list/').json()['patterns']}
+        self.assertEqual(patterns['expandingbox']['datum_type'], 'poi')
+        self.assertEqual([parameter['name'] for parameter in patterns['expandingbox']['parameters']], ['sweep_width', 'iterations', 'first_bearing'])
+        self.assertEqual(patterns['creepingline-polygon']['parameters'][1]['choices'], ['auto'])
+        self.assertEqual(patterns['tracklinereturn']['search_type'], 'Track Line Return')
+
     def test_1000_check_find_next_creation_time(self):
         """
         Test finding the next search when the only difference is creation time
@@ -434,6 +609,244 @@ class SearchTestCase(TestCase):
         self.assertEqual(data['object_url'], f'/search/{search2_obj.pk}/')
         self.assertEqual(data['distance'], 0)
 
+    def test_1002_check_closest_start_point(self):
+        """
+        Test finding the closest search uses the start of the search
+        not the closest point along it
+        """
+        line1 = self.create_line(((173.5, -44.5), (172.5, -43.5)))
+        self.searches.create_shoreline_search(line1, 200, self.asset_type1)
+        line2 = self.create_line(((172.51, -43.5), (172.6, -43.6)))
+        search2 = self.searches.create_shoreline_search(line2, 200, self.asset_type1).as_object()
+        self.assertEqual(search2.start_point.coords, (172.51, -43.5))
+        response = self.searches.find_closest(-43.5, 172.5, self.asset1)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['object_url'], f'/search/{search2.pk}/')
+        self.assertAlmostEqual(data['distance'], 808, delta=5)
+        self.assertEqual(data['length'], int(search2.length()))
+
+    def test_1003_check_find_next_single_query(self):
+        """
+        Test the next search is found (with distance and length) in a single query
+        whichever of the preferences it comes from
+        """
+        mission = self.mission1.get_object()
+        point = Point(172.5, -43.5, srid=4326)
+        closest = self.searches.create_expanding_box_search(self.create_poi(-43.5, 172.5), 200, 2, self.asset_type1)
+        queued_type = self.searches.create_expanding_box_search(self.create_poi(-43.6, 172.6), 200, 2, self.asset_type1)
+        queued_asset = self.searches.create_expanding_box_search(self.create_poi(-43.7, 172.7), 200, 2, self.asset_type1)
+        inprogress = self.searches.create_expanding_box_search(self.create_poi(-43.8, 172.8), 200, 2, self.asset_type1)
+
+        def check_next(expected, at_point):
+            # As the find next search view has it (without the asset type loaded)
+            asset = Asset.objects.get(pk=self.asset1.pk)
+            with self.assertNumQueries(1):
+                search = Search.find_next(mission, asset, point)
+                self.assertEqual(search.pk, expected.search_id)
+                self.assertEqual(search.start_distance == 0, at_point)
+                self.assertGreater(search.line_length, 0)
+
+        check_next(closest, True)
+        queued_type.queue()
+        check_next(queued_type, False)
+        queued_asset.queue(asset=self.asset1)
+        check_next(queued_asset, False)
+        inprogress.as_object().set_inprogress_by(self.asset1, self.smm.user1)
+        check_next(inprogress, False)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.searches.find_closest(-43.5, 172.5, self.asset1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['object_url'], f'/search/{inprogress.search_id}/')
+        self.assertEqual(len([query for query in queries if '"search_search"' in query['sql']]), 1)
+
+    def test_1100_assign_searches(self):
+        """
+        Test planning which asset does which search minimizes the total transit
+        """
+        mission = self.mission1.get_object()
+        asset2 = self.assets.create_asset(name='test_asset2', asset_type=self.asset_type1)
+        self.mission1.add_asset(asset2)
+        asset3 = self.assets.create_asset(name='test_asset3', asset_type=self.asset_type1)
+        self.mission1.add_asset(asset3)
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(174, -41), created_by=self.smm.user1, mission=mission,
+                                      created_at=timezone.now() - timedelta(minutes=10))
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.5, -43.5), created_by=self.smm.user1, mission=mission)
+        AssetPointTime.objects.create(asset=asset2, geo=Point(172.6, -43.5), created_by=self.smm.user1, mission=mission)
+        near = self.searches.create_expanding_box_search(self.create_poi(-43.5, 172.55), 200, 2, self.asset_type1)
+        far = self.searches.create_expanding_box_search(self.create_poi(-43.5, 172.4), 200, 2, self.asset_type1)
+
+        response = self.smm.client1.get(f'/mission/{mission.pk}/search/assign/', data={'asset_type_id': self.asset_type1.pk})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # Giving asset1 the nearest search would leave asset2 16km from the other one
+        assigned = {assignment['asset']: assignment['object_url'] for assignment in data['assignments']}
+        self.assertEqual(assigned, {self.asset1.pk: f'/search/{far.search_id}/', asset2.pk: f'/search/{near.search_id}/'})
+        self.assertAlmostEqual(data['distance'], 8070 + 4035, delta=20)
+        self.assertIsNone(far.as_object().queued_at)
+
+        response = self.smm.client1.post(f'/mission/{mission.pk}/search/assign/', data={'asset_type_id': self.asset_type1.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(assignment['queued'] for assignment in response.json()['assignments']))
+        self.assertEqual(far.as_object().queued_for_asset, self.asset1)
+        self.assertEqual(near.as_object().queued_for_asset, asset2)
+        response = self.searches.find_closest(-43.5, 172.5, self.asset1)
+        self.assertEqual(response.json()['object_url'], f'/search/{far.search_id}/')
+
+    def test_1101_assign_searches_invalid(self):
+        """
+        Test invalid search assignment requests
+        """
+        mission = self.mission1.get_object()
+        url = f'/mission/{mission.pk}/search/assign/'
+        response = self.smm.client1.get(url, data={'asset_type_id': self.asset_type1.pk, 'capacity': 0})
+        self.assertEqual(response.status_code, 400)
+        response = self.smm.client1.get(url, data={'asset_type_id': self.asset_type1.pk, 'capacity': 1000000})
+        self.assertEqual(response.status_code, 400)
+        response = self.smm.client1.get(url, data={'asset_type_id': self.asset_type1.pk, 'endurance': 'far'})
+        self.assertEqual(response.status_code, 400)
+        for endurance in ('nan', 'inf'):
+            response = self.smm.client1.get(url, data={'asset_type_id': self.asset_type1.pk, 'endurance': endurance})
+            self.assertEqual(response.status_code, 400)
+        response = self.smm.client2.get(url, data={'asset_type_id': self.asset_type1.pk})
+        self.assertEqual(response.status_code, 403)
+
+    def test_1110_route_queued_searches(self):
+        """
+        Test planning the order to do the searches queued for an asset
+        """
+        mission = self.mission1.get_object()
+        # Three searches heading east, queued in the wrong order
+        searches = []
+        for lon in (172.6, 172.4, 172.2):
+            line = self.create_line(((lon, -43.5), (lon + 0.1, -43.5)))
+            search = self.searches.create_shoreline_search(line, 200, self.asset_type1)
+            search.queue(asset=self.asset1)
+            searches.append(search)
+        expected = [f'/search/{search.search_id}/' for search in reversed(searches)]
+
+        url = f'/mission/{mission.pk}/search/route/'
+        response = self.smm.client1.get(url, data={'asset_id': self.asset1.pk, 'latitude': -43.5, 'longitude': 172.1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([leg['object_url'] for leg in data['route']], expected)
+        self.assertAlmostEqual(data['distance'], 8066 * 3, delta=20)
+        # Not saved, so still the oldest first
+        self.assertEqual(Search.oldest_queued_for_asset(mission, self.asset1).pk, searches[0].search_id)
+
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.1, -43.5), created_by=self.smm.user1, mission=mission)
+        response = self.smm.client1.post(url, data={'asset_id': self.asset1.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([leg['object_url'] for leg in response.json()['route']], expected)
+        self.assertEqual(Search.oldest_queued_for_asset(mission, self.asset1).pk, searches[2].search_id)
+        response = self.searches.find_closest(-43.5, 172.1, self.asset1)
+        self.assertEqual(response.json()['object_url'], expected[0])
+
+    def test_1111_route_invalid(self):
+        """
+        Test invalid route planning requests
+        """
+        mission = self.mission1.get_object()
+        url = f'/mission/{mission.pk}/search/route/'
+        response = self.smm.client1.get(url, data={'asset_id': self.asset1.pk})
+        self.assertEqual(response.status_code, 400)
+        response = self.smm.client1.get(url, data={'asset_id': self.asset1.pk, 'latitude': 'north', 'longitude': 172.1})
+        self.assertEqual(response.status_code, 400)
+        asset2 = self.assets.create_asset(name='test_asset2', asset_type=self.asset_type1)
+        response = self.smm.client1.get(url, data={'asset_id': asset2.pk, 'latitude': -43.5, 'longitude': 172.1})
+        self.assertEqual(response.status_code, 404)
+
+    def test_1200_coverage(self):
+        """
+        Test the coverage of completed searches is added as they are finished
+        """
+        mission = self.mission1.get_object()
+        line1 = self.create_line(((172.5, -43.5), (172.52, -43.5)))
+        search1 = self.searches.create_shoreline_search(line1, 200, self.asset_type1)
+        line2 = self.create_line(((172.51, -43.49), (172.51, -43.51)))
+        search2 = self.searches.create_shoreline_search(line2, 200, self.asset_type1)
+        url = f'/mission/{mission.pk}/search/coverage/'
+
+        response = self.smm.client1.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['features'], [])
+        self.assertEqual(self.smm.client1.get(url + 'png/').status_code, 404)
+
+        self.assertEqual(search1.begin(self.asset1).status_code, 200)
+        response = self.smm.client1.get(url, data={'inprogress': 1})
+        self.assertGreater(len(response.json()['features']), 0)
+        self.assertFalse(SearchCoverage.objects.filter(mission=mission).exists())
+
+        self.assertEqual(search1.finished(self.asset1).status_code, 200)
+        coverage = SearchCoverage.objects.get(mission=mission)
+        self.assertEqual(list(coverage.searches.all()), [search1.as_object()])
+        self.assertEqual(coverage.grid().max(), 1)
+
+        self.assertEqual(search2.begin(self.asset1).status_code, 200)
+        self.assertEqual(search2.finished(self.asset1).status_code, 200)
+        coverage.refresh_from_db()
+        self.assertEqual(coverage.searches.count(), 2)
+        # The searches cross, so some cells have been searched twice
+        self.assertEqual(coverage.grid().max(), 2)
+
+        response = self.smm.client1.get(url)
+        features = response.json()['features']
+        self.assertEqual(len(features), len(coverage.grid().cells()[2]))
+        self.assertAlmostEqual(max(feature['properties']['pod'] for feature in features), 0.865, places=3)
+        response = self.smm.client1.get(url + 'png/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(self.smm.client1.get(url, data={'step': 0}).status_code, 400)
+        self.assertEqual(self.smm.client2.get(url).status_code, 403)
+
+    def test_1201_coverage_catch_up(self):
+        """
+        Test searches finished without being added to the coverage are added by the job run after the next search is finished
+        """
+        mission = self.mission1.get_object()
+        url = f'/mission/{mission.pk}/search/coverage/'
+        line = self.create_line(((172.5, -43.5), (172.52, -43.5)))
+        search1 = self.searches.create_shoreline_search(line, 200, self.asset_type1).as_object()
+        Search.objects.filter(pk=search1.pk).update(inprogress_at=timezone.now(), inprogress_by=self.asset1, completed_at=timezone.now(), completed_by=self.asset1)
+        # Showing the coverage doesn't change it
+        self.assertEqual(self.smm.client1.get(url).json()['features'], [])
+        self.assertFalse(SearchCoverage.objects.filter(mission=mission).exists())
+
+        line = self.create_line(((172.5, -43.6), (172.52, -43.6)))
+        search2 = self.searches.create_shoreline_search(line, 200, self.asset_type1)
+        self.assertEqual(search2.begin(self.asset1).status_code, 200)
+        self.assertEqual(search2.finished(self.asset1).status_code, 200)
+        self.assertEqual(SearchCoverage.objects.get(mission=mission).searches.count(), 1)
+        self.assertEqual(Job.run_queued(), 1)
+        self.assertEqual(SearchCoverage.objects.get(mission=mission).searches.count(), 2)
+
+    def test_1210_track_coverage(self):
+        """
+        Test the coverage of the track the asset actually flew is worked out after a search is finished
+        """
+        mission = self.mission1.get_object()
+        line = self.create_line(((172.5, -43.5), (172.52, -43.5)))
+        search = self.searches.create_shoreline_search(line, 200, self.asset_type1)
+        self.assertEqual(search.begin(self.asset1).status_code, 200)
+        started = Search.objects.get(pk=search.as_object().pk).inprogress_at
+        # Only fly the first half of the line (every 10 seconds)
+        for i in range(11):
+            AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.5 + i * 0.001, -43.5), created_by=self.smm.user1, mission=mission, created_at=started + timedelta(seconds=10 * i))
+        # A position from before the search started is ignored
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.52, -43.5), created_by=self.smm.user1, mission=mission, created_at=started - timedelta(seconds=10))
+        self.assertEqual(search.finished(self.asset1).status_code, 200)
+
+        search = Search.objects.get(pk=search.as_object().pk)
+        self.assertEqual(search.actual_track().shape, (11, 2))
+        # The coverage is worked out by a background job
+        self.assertIsNone(search.track_coverage)
+        self.assertEqual(Job.run_queued(), 1)
+        search.refresh_from_db()
+        # Just over half, the track sweeps a little past where it stopped
+        self.assertGreater(search.track_coverage, 50)
+        self.assertLess(search.track_coverage, 60)
+
     def test_1010_check_invalid_closest_queries(self):
         """
         Test that invalid queries for find closest get a failure
@@ -14,16 +14,22 @@ urlpatterns = [
     re_path(r'^mission/(?P<mission_id>\d+)/search/inprogress/kml/$', views.search_inprogress_kml, {'search_class': Search}, name='search_inprogress_kml'),
     re_path(r'^mission/(?P<mission_id>\d+)/search/completed/$', views.search_completed, {'search_class': Search}, name='search_completed'),
     re_path(r'^mission/(?P<mission_id>\d+)/search/completed/kml/$', views.search_completed_kml, {'search_class': Search}, name='search_completed_kml'),
+    re_path(r'^mission/(?P<mission_id>\d+)/search/assign/$', views.search_assign, name='search_assign'),
+    re_path(r'^mission/(?P<mission_id>\d+)/search/route/$', views.search_route, name='search_route'),
+    re_path(r'^mission/(?P<mission_id>\d+)/search/coverage/$', views.search_coverage, name='search_coverage'),
+    re_path(r'^mission/(?P<mission_id>\d+)/search/coverage/png/$', views.search_coverage_png, name='search_coverage_png'),
     re_path(r'^search/(?P<search_id>\d+)/$', views.SearchView.as_view(), name='search_view'),
     re_path(r'^search/(?P<search_id>\d+)/queue/$', views.search_queue, name='search_queue'),
     re_path(r'^search/(?P<search_id>\d+)/begin/$', views.search_begin, {'object_class': Search}, name='search_begin'),
     re_path(r'^search/(?P<search_id>\d+)/finished/$', views.search_finished, {'object_class': Search}, name='search_finished'),
-    re_path(r'^search/sector/create/$', views.sector_search_create, name='sector_search_create'),
-    re_path(r'^search/expandingbox/create/$', views.expanding_box_search_create, name='expanding_box_search_create'),
-    re_path(r'^search/trackline/create/$', views.track_line_search_create, name='track_line_search_create'),
-    re_path(r'^search/shoreline/create/$', views.shore_line_search_create, name='shore_line_search_create'),
-    re_path(r'^search/creepingline/create/track/$', views.track_creeping_line_search_create, name='track_creeping_line_search_create'),
-    re_path(r'^search/creepingline/create/polygon/$', views.polygon_creeping_line_search_create, name='polygon_creeping_line_search_create'),
+    re_path(r'^search/pattern/list/$', views.search_pattern_list, name='search_pattern_list'),
+    re_path(r'^search/pattern/(?P<pattern_name>[a-z-]+)/create/$', views.search_create, name='search_create'),
+    re_path(r'^search/sector/create/$', views.search_create, {'pattern_name': 'sector'}, name='sector_search_create'),
+    re_path(r'^search/expandingbox/create/$', views.search_create, {'pattern_name': 'expandingbox'}, name='expanding_box_search_create'),
+    re_path(r'^search/trackline/create/$', views.search_create, {'pattern_name': 'trackline'}, name='track_line_search_create'),
+    re_path(r'^search/shoreline/create/$', views.search_create, {'pattern_name': 'shoreline'}, name='shore_line_search_create'),
+    re_path(r'^search/creepingline/create/track/$', views.search_create, {'pattern_name': 'creepingline-track'}, name='track_creeping_line_search_create'),
+    re_path(r'^search/creepingline/create/polygon/$', views.search_create, {'pattern_name': 'creepingline-polygon'}, name='polygon_creeping_line_search_create'),
     re_path(r'^search/find/closest/$', views.find_next_search, name='find_next_search'),
 
     re_path(r'^mission/all/search/notstarted/$', views.search_notstarted_user, {'search_class': Search, 'current_only': False}),
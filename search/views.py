@@ -12,6 +12,8 @@ Basic overview of presented API:
  - List all completed searches
  - Details
 """
+import math
+
 from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound, JsonResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
@@ -23,14 +25,29 @@ from django.views import View
 from assets.models import AssetType, Asset
 from assets.decorators import asset_id_in_get_post
 from data.decorators import data_get_mission_id
-from data.models import GeoTimeLabel
-from data.view_helpers import to_kml, to_geojson
+from data.models import GeoTimeLabel, AssetPointTime
+from data.view_helpers import to_kml, to_geojson, to_geojson_or_topojson
+from jobs.models import Job
 from mission.models import Mission, MissionAsset
 from mission.decorators import mission_is_member, mission_asset_get_mission
 from timeline.helpers import timeline_record_search_finished
 from .decorators import search_from_id
-from .models import Search, SearchParams, ExpandingBoxSearchParams, TrackLineCreepingSearchParams
+from .jobs import create_search, update_track_coverage
+from .models import Search, SearchCoverage
+from .patterns.library import PATTERNS, get_pattern
 from .view_helpers import check_searches_in_progress
+from .coverage.overlay import coverage_geojson, coverage_png
+
+
+# The parameter that gives the datum for each type of pattern
+DATUM_ID_PARAMS = {
+    'poi': 'poi_id',
+    'line': 'line_id',
+    'polygon': 'poly_id',
+}
+
+# Most searches each asset can be given at once when assigning searches
+MAX_ASSIGN_CAPACITY = 100
 
 
 def mission_get(mission_id):
@@ -69,30 +86,15 @@ def find_next_search(request, asset, mission):
 
     point = Point(long, lat, srid=4326)
 
-    def search_data(search):
-        data = {
-            'object_url': f"/search/{search.pk}/",
-            'distance': int(search.distance_from(point)),
-            'length': int(search.length()),
-            'sweep_width': int(search.sweep_width),
-        }
-        return JsonResponse(data)
-
-    # If this asset already has a search in progress, only offer that
-    search = check_searches_in_progress(mission, asset)
-
-    if search is None:
-        search = Search.oldest_queued_for_asset(mission, asset)
-
-    if search is None:
-        # Check for the oldest queue entry for this asset
-        search = Search.oldest_queued_for_asset_type(mission, asset.asset_type)
-
-    if search is None:
-        search = Search.find_closest(mission, asset.asset_type, point)
+    search = Search.find_next(mission, asset, point)
 
     if search:
-        return search_data(search)
+        return JsonResponse({
+            'object_url': f"/search/{search.pk}/",
+            'distance': int(search.start_distance),
+            'length': int(search.line_length),
+            'sweep_width': int(search.sweep_width),
+        })
 
     return HttpResponseNotFound("No suitable searches exist")
 
@@ -164,6 +166,9 @@ def search_finished(request, search_id, object_class, asset, mission):
     search.completed_by = asset
     search.save()
 
+    SearchCoverage.add_searches(search.mission, [search])
+    Job.enqueue(update_track_coverage, search.pk, mission=mission, created_by=request.user)
+
     timeline_record_search_finished(mission, request.user, asset, search)
 
     return HttpResponse("Completed")
@@ -194,245 +199,270 @@ def search_queue(request, search, mission_user):
 
 @login_required
 @mission_is_member
-def search_notstarted(request, mission_user, search_class):
+def search_assign(request, mission_user):
     """
-    Get a list of all the not started (search_class) searches (as json)
+    Plan which waiting searches the available assets (of an asset type) should do
+    to minimize the total transit, POST also queues each search for its asset
+
+    Optional limits are endurance (how far, in m, an asset can travel including
+    the search) and capacity (how many searches each asset can be given)
     """
-    return to_geojson(search_class, search_class.all_current(mission_user.mission, started=False, finished=False))
+    queue = False
+    if request.method == 'POST':
+        asset_type_id = request.POST.get('asset_type_id')
+        endurance = request.POST.get('endurance')
+        capacity = request.POST.get('capacity')
+        queue = True
+    elif request.method == 'GET':
+        asset_type_id = request.GET.get('asset_type_id')
+        endurance = request.GET.get('endurance')
+        capacity = request.GET.get('capacity')
+    else:
+        return HttpResponseNotFound('Unknown Method')
+
+    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
+    try:
+        endurance = float(endurance) if endurance else None
+        if endurance is not None and not math.isfinite(endurance):
+            raise ValueError("Endurance must be a number")
+        capacity = int(capacity) if capacity else 1
+        if not 1 <= capacity <= MAX_ASSIGN_CAPACITY:
+            raise ValueError(f"Capacity must be from 1 to {MAX_ASSIGN_CAPACITY}")
+    except ValueError:
+        return HttpResponseBadRequest('Invalid endurance or capacity')
+
+    assignments = []
+    for asset, search, transit in Search.plan_assignments(mission_user.mission, asset_type, endurance=endurance, capacity=capacity):
+        assignments.append({
+            'asset': asset.pk,
+            'asset_name': asset.name,
+            'object_url': f"/search/{search.pk}/",
+            'distance': int(transit),
+            'length': int(search.length()),
+            'queued': search.queue_search(mission_user=mission_user, asset=asset) if queue else False,
+        })
+
+    return JsonResponse({
+        'assignments': assignments,
+        'distance': sum(assignment['distance'] for assignment in assignments),
+    })
 
 
 @login_required
-def search_notstarted_user(request, search_class, current_only):
+@mission_is_member
+def search_route(request, mission_user):
     """
-    Get a list of all the not started (search_class) searches in current missions this user is a member of (as json)
+    Plan the order for an asset to do the searches queued for it, to minimize transit,
+    POST also stores the order so the asset is given them in that order
+
+    The route starts from latitude/longitude, or the last position of the asset
     """
-    return to_geojson(search_class, search_class.all_current_user(request.user, current_only=current_only, started=False, finished=False))
+    if request.method == 'POST':
+        asset_id = request.POST.get('asset_id')
+        lat = request.POST.get('latitude')
+        long = request.POST.get('longitude')
+    elif request.method == 'GET':
+        asset_id = request.GET.get('asset_id')
+        lat = request.GET.get('latitude')
+        long = request.GET.get('longitude')
+    else:
+        return HttpResponseNotFound('Unknown Method')
 
+    asset = get_object_or_404(Asset, pk=asset_id)
+    # Make sure this asset is a member of this mission
+    get_object_or_404(MissionAsset, mission=mission_user.mission, asset=asset, removed__isnull=True)
 
-def search_notstarted_kml(request, mission_id, search_class):
-    """
-    Get a list of all the not started (search_type) searches (as kml)
-    """
-    mission = mission_get(mission_id)
-    return to_kml(search_class, search_class.all_current(mission, started=False, finished=False))
+    if lat is None and long is None:
+        position = AssetPointTime.objects.filter(mission=mission_user.mission, asset=asset).order_by('-created_at').first()
+        if position is None:
+            return HttpResponseBadRequest('No position for this asset')
+        point = position.geo
+    else:
+        try:
+            point = Point(float(long), float(lat), srid=4326)
+        except (ValueError, TypeError):
+            return HttpResponseBadRequest('Invalid lat or long')
+
+    route = Search.plan_route_for_asset(mission_user.mission, asset, point, save=request.method == 'POST')
+
+    return JsonResponse({
+        'route': [{
+            'object_url': f"/search/{search.pk}/",
+            'distance': int(transit),
+            'length': int(search.length()),
+        } for search, transit in route],
+        'distance': int(sum(transit for _, transit in route)),
+    })
 
 
 @login_required
 @mission_is_member
-def search_inprogress(request, mission_user, search_class):
+def search_coverage(request, mission_user):
     """
-    Get a list of all the inprogress (search_class) searches (as json)
+    Get the coverage (and POD) of the completed searches in a mission (as GeoJSON cells)
+
+    Set inprogress to include searches that are in progress,
+    step combines step x step cells to make fewer features
     """
-    return to_geojson(search_class, search_class.all_current(mission_user.mission, started=True, finished=False))
+    try:
+        step = int(request.GET.get('step', 1))
+        if step < 1:
+            raise ValueError("Step must be at least 1")
+    except ValueError:
+        return HttpResponseBadRequest('Invalid step')
+
+    include_inprogress = request.GET.get('inprogress', '').lower() in ('1', 'true', 'yes')
+    grid, center = SearchCoverage.for_mission(mission_user.mission, include_inprogress=include_inprogress)
+    if grid is None:
+        return JsonResponse({'type': 'FeatureCollection', 'features': []}, content_type='application/geo+json')
+    return JsonResponse(coverage_geojson(grid, center, step=step), content_type='application/geo+json')
 
 
 @login_required
-def search_inprogress_user(request, search_class, current_only):
-    """
-    Get a list of all the inprogress (search_class) searches in current missions this user is a member of (as json)
+@mission_is_member
+def search_coverage_png(request, mission_user):
     """
-    return to_geojson(search_class, search_class.all_current_user(request.user, current_only=current_only, started=True, finished=False))
+    Get the POD of the completed searches in a mission (as a PNG overlay)
 
-
-def search_inprogress_kml(request, mission_id, search_class):
+    The bounds of the image are the bbox of the coverage GeoJSON
+    Set inprogress to include searches that are in progress
     """
-    Get a list of all the inprogress (search_type) searches (as kml)
-    """
-    mission = mission_get(mission_id)
-    return to_kml(search_class, search_class.all_current(mission, started=True, finished=False))
+    include_inprogress = request.GET.get('inprogress', '').lower() in ('1', 'true', 'yes')
+    grid, center = SearchCoverage.for_mission(mission_user.mission, include_inprogress=include_inprogress)
+    if grid is None:
+        return HttpResponseNotFound('No searches have been completed')
+    return HttpResponse(coverage_png(grid, center), content_type='image/png')
 
 
 @login_required
 @mission_is_member
-def search_completed(request, mission_user, search_class):
+def search_notstarted(request, mission_user, search_class):
     """
-    Get a list of all the completed (search_class) searches (as json)
+    Get a list of all the not started (search_class) searches (as geojson, or topojson with format=topojson)
     """
-    return to_geojson(search_class, search_class.all_current(mission_user.mission, started=True, finished=True))
+    return to_geojson_or_topojson(request, search_class, search_class.all_current(mission_user.mission, started=False, finished=False))
 
 
 @login_required
-def search_completed_user(request, search_class, current_only):
+def search_notstarted_user(request, search_class, current_only):
     """
-    Get a list of all the completed (search_class) searches in all missions this user has been a member of (as json)
+    Get a list of all the not started (search_class) searches in current missions this user is a member of (as geojson, or topojson with format=topojson)
     """
-    return to_geojson(search_class, search_class.all_current_user(request.user, current_only=current_only, started=True, finished=True))
+    return to_geojson_or_topojson(request, search_class, search_class.all_current_user(request.user, current_only=current_only, started=False, finished=False))
 
 
-def search_completed_kml(request, mission_id, search_class):
+def search_notstarted_kml(request, mission_id, search_class):
     """
-    Get a list of all the completed (search_class) searches (as kml)
+    Get a list of all the not started (search_type) searches (as kml)
     """
     mission = mission_get(mission_id)
-    return to_kml(search_class, search_class.all_current(mission, started=True, finished=True))
+    return to_kml(search_class, search_class.all_current(mission, started=False, finished=False))
 
 
 @login_required
-def sector_search_create(request):
+@mission_is_member
+def search_inprogress(request, mission_user, search_class):
     """
-    Create a sector search
+    Get a list of all the inprogress (search_class) searches (as geojson, or topojson with format=topojson)
     """
-    save = False
-    if request.method == 'POST':
-        poi_id = request.POST.get('poi_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
-        save = True
-    elif request.method == 'GET':
-        poi_id = request.GET.get('poi_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
-    else:
-        return HttpResponseNotFound('Unknown Method')
-
-    poi = get_object_or_404(GeoTimeLabel, pk=poi_id, geo_type='poi')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
-
-    search = Search.create_sector_search(SearchParams(poi, asset_type, request.user, sweep_width), save=save)
-
-    return to_geojson(Search, [search])
+    return to_geojson_or_topojson(request, search_class, search_class.all_current(mission_user.mission, started=True, finished=False))
 
 
 @login_required
-def expanding_box_search_create(request):
+def search_inprogress_user(request, search_class, current_only):
     """
-    Create an expanding box search
+    Get a list of all the inprogress (search_class) searches in current missions this user is a member of (as geojson, or topojson with format=topojson)
     """
-    save = False
-    if request.method == 'POST':
-        poi_id = request.POST.get('poi_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
-        iterations = request.POST.get('iterations')
-        first_bearing = request.POST.get('first_bearing')
-        save = True
-    elif request.method == 'GET':
-        poi_id = request.GET.get('poi_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
-        iterations = request.GET.get('iterations')
-        first_bearing = request.GET.get('first_bearing')
-    else:
-        return HttpResponseNotFound('Unknown Method')
+    return to_geojson_or_topojson(request, search_class, search_class.all_current_user(request.user, current_only=current_only, started=True, finished=False))
 
-    poi = get_object_or_404(GeoTimeLabel, pk=poi_id, geo_type='poi')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
-
-    sweep_width = float(sweep_width)
-    try:
-        first_bearing = int(first_bearing)
-    except TypeError:
-        first_bearing = 0
 
-    search = Search.create_expanding_box_search(ExpandingBoxSearchParams(poi, asset_type, request.user, sweep_width, iterations, first_bearing), save=save)
-
-    return to_geojson(Search, [search])
+def search_inprogress_kml(request, mission_id, search_class):
+    """
+    Get a list of all the inprogress (search_type) searches (as kml)
+    """
+    mission = mission_get(mission_id)
+    return to_kml(search_class, search_class.all_current(mission, started=True, finished=False))
 
 
 @login_required
-def track_line_search_create(request):
+@mission_is_member
+def search_completed(request, mission_user, search_class):
     """
-    Create a trackline search
+    Get a list of all the completed (search_class) searches (as geojson, or topojson with format=topojson)
     """
-    save = False
-    if request.method == 'POST':
-        line_id = request.POST.get('line_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
-        save = True
-    elif request.method == 'GET':
-        line_id = request.GET.get('line_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
-    else:
-        return HttpResponseNotFound('Unknown Method')
-
-    line = get_object_or_404(GeoTimeLabel, pk=line_id, geo_type='line')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
-
-    search = Search.create_track_line_search(SearchParams(line, asset_type, request.user, sweep_width), save=save)
-
-    return to_geojson(Search, [search])
+    return to_geojson_or_topojson(request, search_class, search_class.all_current(mission_user.mission, started=True, finished=True))
 
 
 @login_required
-def shore_line_search_create(request):
+def search_completed_user(request, search_class, current_only):
     """
-    Create a shore line search
+    Get a list of all the completed (search_class) searches in all missions this user has been a member of (as geojson, or topojson with format=topojson)
     """
-    save = False
-    if request.method == 'POST':
-        line_id = request.POST.get('line_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
-        save = True
-    elif request.method == 'GET':
-        line_id = request.GET.get('line_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
-    else:
-        return HttpResponseNotFound('Unknown Method')
+    return to_geojson_or_topojson(request, search_class, search_class.all_current_user(request.user, current_only=current_only, started=True, finished=True))
 
-    line = get_object_or_404(GeoTimeLabel, pk=line_id, geo_type='line')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
 
-    search = Search.create_shore_line_search(SearchParams(line, asset_type, request.user, sweep_width), save=save)
-
-    return to_geojson(Search, [search])
+def search_completed_kml(request, mission_id, search_class):
+    """
+    Get a list of all the completed (search_class) searches (as kml)
+    """
+    mission = mission_get(mission_id)
+    return to_kml(search_class, search_class.all_current(mission, started=True, finished=True))
 
 
 @login_required
-def track_creeping_line_search_create(request):
+def search_pattern_list(request):
     """
-    Create a creeping line ahead search (from a line)
+    List the search patterns that can be created, and the parameters they need
     """
-    save = False
-    if request.method == 'POST':
-        line_id = request.POST.get('line_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
-        width = request.POST.get('width')
-        save = True
-    elif request.method == 'GET':
-        line_id = request.GET.get('line_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
-        width = request.GET.get('width')
-    else:
-        return HttpResponseNotFound('Unknown Method')
-
-    line = get_object_or_404(GeoTimeLabel, pk=line_id, geo_type='line')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
-
-    search = Search.create_track_line_creeping_search(TrackLineCreepingSearchParams(line, asset_type, request.user, sweep_width, width), save=save)
-
-    return to_geojson(Search, [search])
+    return JsonResponse({'patterns': [pattern.as_object() for pattern in PATTERNS.values()]})
 
 
 @login_required
-def polygon_creeping_line_search_create(request):
+def search_create(request, pattern_name):
     """
-    Create a creeping line ahead search (from a polygon)
+    Create a search from a pattern (see search.patterns)
+
+    GET previews the search, POST saves it.
+    The datum is given by poi_id, line_id or poly_id (depending on what the pattern
+    starts from), along with asset_type_id, sweep_width and the pattern's parameters.
+    When background is set the search is created by a job, and the job is returned.
     """
-    save = False
     if request.method == 'POST':
-        poly_id = request.POST.get('poly_id')
-        asset_type_id = request.POST.get('asset_type_id')
-        sweep_width = request.POST.get('sweep_width')
+        data = request.POST
         save = True
     elif request.method == 'GET':
-        poly_id = request.GET.get('poly_id')
-        asset_type_id = request.GET.get('asset_type_id')
-        sweep_width = request.GET.get('sweep_width')
+        data = request.GET
+        save = False
     else:
         return HttpResponseNotFound('Unknown Method')
 
-    poly = get_object_or_404(GeoTimeLabel, pk=poly_id, geo_type='polygon')
-    asset_type = get_object_or_404(AssetType, pk=asset_type_id)
+    try:
+        pattern_class = get_pattern(pattern_name)
+    except KeyError:
+        return HttpResponseNotFound('Unknown Search Pattern')
 
-    search = Search.create_polygon_creeping_line_search(SearchParams(poly, asset_type, request.user, sweep_width), save=save)
+    datum = get_object_or_404(GeoTimeLabel, pk=data.get(DATUM_ID_PARAMS[pattern_class.datum_type]), geo_type=pattern_class.datum_type)
+    asset_type = get_object_or_404(AssetType, pk=data.get('asset_type_id'))
 
-    return to_geojson(Search, [search])
+    values = {parameter.name: data.get(parameter.name) for parameter in pattern_class.parameters}
+    try:
+        pattern = pattern_class(data.get('sweep_width'), **values)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    if data.get('background'):
+        # Large/complex searches can take a while, so let a worker create it
+        job = Job.enqueue(create_search, pattern_name, datum.pk, asset_type.pk, request.user.pk, data.get('sweep_width'), values, save,
+                          mission=datum.mission, created_by=request.user)
+        return JsonResponse({'job': job.pk, 'status_url': f'/job/{job.pk}/'}, status=202)
+
+    search = Search.create_from_pattern(pattern, datum, request.user, asset_type, save=save)
+
+    response = to_geojson(Search, [search])
+    if search.fallback:
+        # The search took too long to plan, so something simpler was searched
+        response['X-Search-Fallback'] = search.fallback
+    return response
 
 
 @method_decorator(login_required, name="dispatch")
@@ -5,7 +5,7 @@ pip install wheel
 pip install -r requirements.txt
 
 # Setup the image storage directory
-mkdir -p images/full images/thumbnail
+mkdir -p images/full images/screen images/preview images/thumbnail
 
 if [ "x${NODE_DONE}" != "xyes" ]
 then
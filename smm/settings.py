@@ -34,6 +34,8 @@ INSTALLED_APPS = [
     'marinesar',
     'organization',
     'icons',
+    'jobs',
+    'tiles',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
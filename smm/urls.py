@@ -27,5 +27,7 @@ urlpatterns = [
     re_path(r'', include('marinesar.urls')),
     re_path(r'', include('map.urls')),
     re_path(r'', include('organization.urls')),
+    re_path(r'', include('jobs.urls')),
+    re_path(r'', include('tiles.urls')),
     path('icons/', include('icons.urls')),
 ]
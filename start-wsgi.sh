@@ -3,4 +3,5 @@
 source venv/bin/activate
 
 ./manage.py migrate
+./manage.py run_workers &
 uwsgi --socket 127.0.0.1:8080 --protocol=http -w smm.wsgi
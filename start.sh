@@ -1,4 +1,5 @@
 #!/bin/bash
 
 ./manage.py migrate
+./manage.py run_workers &
 ./manage.py runserver 0.0.0.0:8080
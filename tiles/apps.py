@@ -0,0 +1,17 @@
+"""
+App definition for tiles
+"""
+
+from django.apps import AppConfig
+
+
+class TilesConfig(AppConfig):
+    """
+    Map Tiles App definition
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tiles'
+
+    def ready(self):
+        # pylint: disable=C0415,W0611
+        from . import signals  # noqa: F401
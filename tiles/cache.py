@@ -0,0 +1,65 @@
+"""
+Caching of map tiles
+
+Tiles are stored in the django cache under the current version of their
+layer (see TileLayerVersion), so changing a layer doesn't need to find and
+delete its tiles, they just stop being asked for.
+
+Asset positions are reported far more often than anything else changes, so
+the tracks layer moves on to a new version at most once every
+TILE_TRACKS_INTERVAL seconds (see invalidate_tracks), rather than the
+version being updated in the database for every position.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import TileLayerVersion
+
+
+def tile_cache_timeout():
+    """
+    How long (seconds) tiles are kept in the cache
+    """
+    return getattr(settings, 'TILE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def tracks_interval():
+    """
+    Most often (seconds) the tracks layer of a mission moves on to a new version
+    """
+    return getattr(settings, 'TILE_TRACKS_INTERVAL', 5)
+
+
+def invalidate_tracks(mission_id):
+    """
+    Invalidate the tracks layer of a mission, now unless it was in the last TILE_TRACKS_INTERVAL seconds,
+    in which case it's left for the next time a tracks tile is asked for after that (see tile_version)
+    """
+    interval = tracks_interval()
+    if interval <= 0 or cache.add(f"tiles:{mission_id}:tracks:recent", True, interval):
+        TileLayerVersion.invalidate(mission_id, ['tracks'])
+    else:
+        cache.set(f"tiles:{mission_id}:tracks:pending", True, None)
+
+
+def tile_version(mission_id, layer):
+    """
+    The current version of the tiles of layer
+    """
+    if layer == 'tracks' and cache.get(f"tiles:{mission_id}:tracks:pending") and cache.add(f"tiles:{mission_id}:tracks:recent", True, tracks_interval()):
+        cache.delete(f"tiles:{mission_id}:tracks:pending")
+        TileLayerVersion.invalidate(mission_id, ['tracks'])
+    return TileLayerVersion.current(mission_id, layer)
+
+
+def cached_tile(mission_id, layer, version, z, x, y, make_tile):
+    # pylint: disable=R0913,R0917
+    """
+    Get a tile from the cache, or make it (with make_tile()) and cache it
+    """
+    key = f"tiles:{mission_id}:{layer}:{version}:{z}:{x}:{y}"
+    tile = cache.get(key)
+    if tile is None:
+        tile = make_tile()
+        cache.set(key, tile, tile_cache_timeout())
+    return tile
@@ -0,0 +1,154 @@
+"""
+Vector tile (Mapbox Vector Tile) layers of mission data
+
+Each layer is made by PostGIS (ST_AsMVT) from the current (not deleted
+or replaced) objects in the mission that are in (or near) the tile.
+"""
+from django.db import connection
+
+from assets.models import Asset
+from data.models import AssetPointTime, GeoTimeLabel
+from images.models import GeoImage
+from marinesar.models import MarineTotalDriftVector
+from search.models import Search
+from .mercator import tile_bounds
+
+# Size of a tile in tile coordinates
+EXTENT = 4096
+# Tile coordinates around the tile to include (so lines/icons aren't cut off at the edges)
+BUFFER = 64
+# Below this zoom tiles are too big for the bounds to be a geography (and the whole mission is in them anyway)
+MIN_FILTER_ZOOM = 2
+# Positions further apart in time than this are separate lines in a track
+TRACK_GAP = '5 minutes'
+ASSET_TABLE = Asset._meta.db_table  # pylint: disable=W0212
+
+
+class VectorLayer:
+    """
+    A layer of the objects in a model
+
+    columns are the (sql) properties of each feature, selected from the model table as t
+    """
+    def __init__(self, name, model, columns):
+        self.name = name
+        self.model = model
+        self.columns = columns
+
+    @property
+    def table(self):
+        """
+        The database table of the model
+        """
+        return self.model._meta.db_table  # pylint: disable=W0212
+
+    def features(self):
+        """
+        SQL for the features in the tile, as geom (in tile coordinates) and the columns
+        """
+        return f"""
+            SELECT ST_AsMVTGeom(ST_Transform(t.geo::geometry, 3857), bounds.geom, {EXTENT}, {BUFFER}, true) AS geom,
+                   {', '.join(self.columns)}
+            FROM {self.table} AS t, bounds, area
+            WHERE t.mission_id = %(mission_id)s AND t.deleted_at IS NULL AND t.replaced_at IS NULL
+                AND (area.geo IS NULL OR t.geo && area.geo)
+        """
+
+    def tile(self, mission_id, z, x, y):
+        """
+        The tile (bytes, empty when there is nothing in it)
+        """
+        params = {'mission_id': mission_id, 'z': z, 'x': x, 'y': y, 'name': self.name, 'area': None}
+        if z >= MIN_FILTER_ZOOM:
+            west, south, east, north = tile_bounds(z, x, y, margin=BUFFER / EXTENT)
+            params['area'] = f'SRID=4326;POLYGON(({west} {south},{east} {south},{east} {north},{west} {north},{west} {south}))'
+        query = f"""
+            WITH bounds AS (SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom),
+            -- Short segments so the edges of the area (as a geography) follow the edges of the tile
+            area AS (SELECT ST_Segmentize(ST_GeomFromEWKT(%(area)s), 0.5)::geography AS geo)
+            SELECT ST_AsMVT(features.*, %(name)s, {EXTENT}, 'geom')
+            FROM ({self.features()}) AS features
+            WHERE features.geom IS NOT NULL
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+        return bytes(row[0]) if row and row[0] is not None else b''
+
+
+class TrackLayer(VectorLayer):
+    """
+    The tracks of the assets in the mission
+
+    Each track is split into separate lines where there is a gap
+    of more than TRACK_GAP between positions.
+    The tracks are made from all the positions in the mission, then only the
+    parts (between positions) that cross the tile are kept, so a track that
+    leaves the tile and comes back isn't joined straight across, and one that
+    crosses the tile without a position in it is still shown.
+    """
+    def features(self):
+        return f"""
+            SELECT ST_AsMVTGeom(ST_Transform(lines.geo, 3857), bounds.geom, {EXTENT}, {BUFFER}, true) AS geom,
+                   lines.asset, lines.name, lines.start_time, lines.end_time
+            FROM (
+                SELECT ST_MakeLine(parts.geo::geometry ORDER BY parts.created_at) AS geo,
+                       parts.asset_id AS asset, MIN(assets.name) AS name,
+                       EXTRACT(EPOCH FROM MIN(parts.created_at))::bigint AS start_time,
+                       EXTRACT(EPOCH FROM MAX(parts.created_at))::bigint AS end_time
+                FROM (
+                    -- A line is a position followed by the positions with a kept segment to them
+                    SELECT segments.*,
+                           SUM(CASE WHEN segments.kept THEN 0 ELSE 1 END)
+                               OVER (PARTITION BY segments.asset_id ORDER BY segments.created_at) AS part
+                    FROM (
+                        -- The segment from the previous position is kept if it isn't a gap, and crosses the tile
+                        SELECT positions.geo, positions.created_at, positions.asset_id,
+                               COALESCE(positions.created_at - positions.previous_at <= interval '{TRACK_GAP}'
+                                        AND (area.geo IS NULL OR ST_Intersects(ST_MakeLine(positions.previous_geo::geometry, positions.geo::geometry),
+                                                                               area.geo::geometry)), false) AS kept
+                        FROM (
+                            SELECT t.geo, t.created_at, t.asset_id,
+                                   LAG(t.created_at) OVER track AS previous_at, LAG(t.geo) OVER track AS previous_geo
+                            FROM {self.table} AS t
+                            WHERE t.mission_id = %(mission_id)s AND t.deleted_at IS NULL AND t.replaced_at IS NULL
+                            WINDOW track AS (PARTITION BY t.asset_id ORDER BY t.created_at)
+                        ) AS positions, area
+                    ) AS segments
+                ) AS parts
+                JOIN {ASSET_TABLE} AS assets ON assets.id = parts.asset_id
+                GROUP BY parts.asset_id, parts.part
+                HAVING COUNT(*) > 1
+            ) AS lines, bounds
+        """
+
+
+LAYERS = {layer.name: layer for layer in (
+    VectorLayer('labels', GeoTimeLabel, (
+        't.id',
+        't.label',
+        't.geo_type',
+    )),
+    VectorLayer('searches', Search, (
+        't.id',
+        't.search_type',
+        't.sweep_width',
+        't.created_for_id AS asset_type',
+        """CASE WHEN t.completed_at IS NOT NULL THEN 'completed'
+                WHEN t.inprogress_at IS NOT NULL THEN 'inprogress'
+                WHEN t.queued_at IS NOT NULL THEN 'queued'
+                ELSE 'unstarted' END AS status""",
+    )),
+    VectorLayer('images', GeoImage, (
+        't.id',
+        't.description',
+        't.priority',
+    )),
+    VectorLayer('drifts', MarineTotalDriftVector, (
+        't.id',
+        't.datum_id AS datum',
+        't.leeway_multiplier',
+        't.leeway_modifier',
+    )),
+    TrackLayer('tracks', AssetPointTime, ()),
+)}
@@ -0,0 +1,32 @@
+"""
+Web map (slippy map/web mercator) tile maths
+
+- The latitude of a row of tiles (tile_lat)
+- The lon/lat bounds of a tile (tile_bounds)
+"""
+import numpy as np
+
+# Tiles stop short of the poles, where web mercator goes to infinity
+MAX_LAT = 85.0511287798066
+# Deepest zoom that tiles are served for
+MAX_ZOOM = 24
+
+
+def tile_lat(z, y):
+    """ Returns the latitude of the top edge of row y (which can be fractional) of the tiles at zoom z """
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=np.float64) / 2 ** z))))
+
+
+def tile_bounds(z, x, y, margin=0):
+    """ Returns (west, south, east, north) of tile z/x/y,
+    expanded by margin (a fraction of the tile) on each side """
+    west = max((x - margin) / 2 ** z * 360 - 180, -180)
+    east = min((x + 1 + margin) / 2 ** z * 360 - 180, 180)
+    south = float(tile_lat(z, min(y + 1 + margin, 2 ** z)))
+    north = float(tile_lat(z, max(y - margin, 0)))
+    return (west, south, east, north)
+
+
+def valid_tile(z, x, y):
+    """ Returns whether z/x/y is a tile that exists """
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('mission', '0010_missionorganization_permissions_organization_add_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TileLayerVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(max_length=20)),
+                ('version', models.IntegerField(default=0)),
+                ('mission', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='mission.mission')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('mission', 'layer'), name='tiles_layer_version_unique')],
+            },
+        ),
+    ]
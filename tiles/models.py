@@ -0,0 +1,42 @@
+"""
+Models for map tiles
+
+Tiles are cached (in the django cache) under the version of their layer,
+when anything on a layer changes its version goes up so the old tiles
+are never used again (and expire from the cache).
+The versions are stored in the database so every process sees the change.
+"""
+from django.db import models
+from django.db.models import F
+
+from mission.models import Mission
+
+
+class TileLayerVersion(models.Model):
+    """
+    The version of the tiles of a layer in a mission
+    """
+    mission = models.ForeignKey(Mission, on_delete=models.PROTECT)
+    layer = models.CharField(max_length=20)
+    version = models.IntegerField(default=0)
+
+    @classmethod
+    def current(cls, mission_id, layer):
+        """
+        The current version of the layer
+        """
+        layer_version, _ = cls.objects.get_or_create(mission_id=mission_id, layer=layer)
+        return layer_version.version
+
+    @classmethod
+    def invalidate(cls, mission_id, layers):
+        """
+        Move layers on to a new version (so tiles are made again)
+        Layers without a version have never had a tile made, so don't need one
+        """
+        cls.objects.filter(mission_id=mission_id, layer__in=layers).update(version=F('version') + 1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mission', 'layer'], name='tiles_layer_version_unique'),
+        ]
@@ -0,0 +1,45 @@
+"""
+Move tile layers on to a new version when their data changes
+
+Everything except asset positions is recorded in the timeline (when it's
+added, changed or deleted), so any new entry invalidates those layers.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from data.models import AssetPointTime
+from search.models import SearchCoverage
+from timeline.models import TimeLineEntry
+from .cache import invalidate_tracks
+from .layers import LAYERS
+from .models import TileLayerVersion
+
+TIMELINE_LAYERS = [name for name in LAYERS if name != 'tracks'] + ['coverage']
+
+
+@receiver(post_save, sender=TimeLineEntry)
+def timeline_entry_saved(sender, instance, created, **kwargs):
+    # pylint: disable=W0613
+    """
+    Invalidate the layers that come from objects in the timeline
+    """
+    if created:
+        TileLayerVersion.invalidate(instance.mission_id, TIMELINE_LAYERS)
+
+
+@receiver(post_save, sender=AssetPointTime)
+def asset_position_saved(sender, instance, **kwargs):
+    # pylint: disable=W0613
+    """
+    Invalidate the tracks layer (at most every few seconds, see invalidate_tracks)
+    """
+    invalidate_tracks(instance.mission_id)
+
+
+@receiver(post_save, sender=SearchCoverage)
+def coverage_saved(sender, instance, **kwargs):
+    # pylint: disable=W0613
+    """
+    Invalidate the coverage layer
+    """
+    TileLayerVersion.invalidate(instance.mission_id, ['coverage'])
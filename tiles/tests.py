@@ -0,0 +1,210 @@
+"""
+Tests for map tiles
+"""
+import io
+import math
+from datetime import timedelta
+
+from PIL import Image
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from assets.tests import AssetsHelpers
+from data.models import AssetPointTime, GeoTimeLabel
+from mission.tests import MissionFunctions
+from smm.tests import SMMTestUsers
+
+from .mercator import tile_bounds, valid_tile
+
+
+def lonlat_tile(lon, lat, z):
+    """
+    The x/y of the tile at zoom z that lon/lat is in
+    """
+    x = int((lon + 180) / 360 * 2 ** z)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * 2 ** z)
+    return x, y
+
+
+class MercatorTestCase(SimpleTestCase):
+    """
+    Test the tile maths
+    """
+    def test_0001_tile_bounds(self):
+        """
+        Test the bounds of web map tiles
+        """
+        self.assertEqual(tile_bounds(0, 0, 0)[0::2], (-180, 180))
+        self.assertAlmostEqual(tile_bounds(0, 0, 0)[1], -85.0511287798)
+        self.assertAlmostEqual(tile_bounds(0, 0, 0)[3], 85.0511287798)
+        west, south, east, north = tile_bounds(1, 1, 1)
+        self.assertEqual((west, east), (0, 180))
+        self.assertAlmostEqual(north, 0)
+        self.assertLess(south, -85)
+        # The margin stops at the edges of the world
+        west, south, east, north = tile_bounds(2, 0, 1, margin=0.5)
+        self.assertEqual(west, -180)
+        self.assertLess(south, tile_bounds(2, 0, 1)[1])
+        self.assertGreater(north, tile_bounds(2, 0, 1)[3])
+        self.assertEqual(tile_bounds(1, 0, 0, margin=1)[3], tile_bounds(1, 0, 0)[3])
+
+    def test_0002_valid_tile(self):
+        """
+        Test tiles outside the world are found
+        """
+        self.assertTrue(valid_tile(0, 0, 0))
+        self.assertTrue(valid_tile(3, 7, 7))
+        self.assertFalse(valid_tile(3, 8, 0))
+        self.assertFalse(valid_tile(3, 0, 8))
+        self.assertFalse(valid_tile(30, 0, 0))
+
+
+class TilesTestCase(TestCase):
+    """
+    Test the tiles of mission layers
+    """
+    def setUp(self):
+        cache.clear()
+        self.smm = SMMTestUsers()
+        self.assets = AssetsHelpers(self.smm)
+        self.missions = MissionFunctions(self.smm)
+        self.asset1 = self.assets.create_asset(asset_type=self.assets.create_asset_type())
+        self.mission1 = self.missions.create_mission('test mission')
+        self.mission1.add_asset(self.asset1)
+        self.x, self.y = lonlat_tile(172.5, -43.5, 12)
+
+    def tile_url(self, layer, z=12, x=None, y=None, ext='mvt'):
+        """
+        The url of a tile (the one with the test data in it by default)
+        """
+        x = self.x if x is None else x
+        y = self.y if y is None else y
+        return f'/mission/{self.mission1.mission_pk}/tiles/{layer}/{z}/{x}/{y}.{ext}'
+
+    def create_poi(self, label, lon=172.5, lat=-43.5):
+        """
+        Create a POI in the test mission
+        """
+        return GeoTimeLabel.objects.create(geo=Point(lon, lat), created_by=self.smm.user1, label=label, geo_type='poi', mission=self.mission1.get_object())
+
+    def test_0001_labels(self):
+        """
+        Test POIs are only in the tile they are in
+        """
+        self.create_poi('Test Point')
+        response = self.smm.client1.get(self.tile_url('labels'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertIn(b'labels', response.content)
+        self.assertIn(b'Test Point', response.content)
+        response = self.smm.client1.get(self.tile_url('labels', x=self.x + 2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        # Zoomed all the way out
+        self.assertIn(b'Test Point', self.smm.client1.get(self.tile_url('labels', z=0, x=0, y=0)).content)
+        # Deleted POIs aren't shown
+        GeoTimeLabel.objects.get(label='Test Point').delete(self.smm.user1)
+        self.assertNotIn(b'Test Point', self.smm.client1.get(self.tile_url('labels')).content)
+
+    def test_0002_cache(self):
+        """
+        Test tiles are cached until the layer changes
+        """
+        self.create_poi('First Point')
+        response = self.smm.client1.get(self.tile_url('labels'))
+        etag = response['ETag']
+        self.assertEqual(self.smm.client1.get(self.tile_url('labels'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.create_poi('Second Point', lon=172.501)
+        response = self.smm.client1.get(self.tile_url('labels'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(b'First Point', response.content)
+        self.assertIn(b'Second Point', response.content)
+
+    @override_settings(TILE_TRACKS_INTERVAL=0)
+    def test_0003_tracks(self):
+        """
+        Test asset tracks, and new positions make new tiles
+        """
+        now = timezone.now()
+        for minutes in (0, 1, 2, 20, 21):
+            AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.5 + minutes / 10000, -43.5), created_by=self.smm.user1,
+                                          mission=self.mission1.get_object(), created_at=now + timedelta(minutes=minutes))
+        response = self.smm.client1.get(self.tile_url('tracks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.asset1.name.encode(), response.content)
+        etag = response['ETag']
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.6, -43.5), created_by=self.smm.user1, mission=self.mission1.get_object())
+        self.assertEqual(self.smm.client1.get(self.tile_url('tracks'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Other layers aren't affected by positions
+        etag = self.smm.client1.get(self.tile_url('labels'))['ETag']
+        AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.7, -43.5), created_by=self.smm.user1, mission=self.mission1.get_object())
+        self.assertEqual(self.smm.client1.get(self.tile_url('labels'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_0003_tracks_leave_tile(self):
+        """
+        Test a track that leaves a tile and comes back goes out and back, not straight across,
+        and is in the tiles it crosses without a position in them
+        """
+        now = timezone.now()
+        mission = self.mission1.get_object()
+        # Out about 30km north and back, a minute apart
+        for minutes, lat in ((0, -43.5), (1, -43.2), (2, -43.5)):
+            AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.5 + minutes / 10000, lat), created_by=self.smm.user1,
+                                          mission=mission, created_at=now + timedelta(minutes=minutes))
+        self.assertIn(self.asset1.name.encode(), self.smm.client1.get(self.tile_url('tracks')).content)
+        x, y = lonlat_tile(172.5, -43.35, 12)
+        self.assertNotEqual(y, self.y)
+        self.assertIn(self.asset1.name.encode(), self.smm.client1.get(self.tile_url('tracks', x=x, y=y)).content)
+        # Nowhere near it
+        self.assertEqual(self.smm.client1.get(self.tile_url('tracks', x=x + 2, y=y)).content, b'')
+
+    def test_0003_tracks_interval(self):
+        """
+        Test positions only make new tracks tiles every TILE_TRACKS_INTERVAL seconds
+        """
+        mission = self.mission1.get_object()
+        etag = self.smm.client1.get(self.tile_url('tracks'))['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.5, -43.5), created_by=self.smm.user1, mission=mission)
+        self.assertTrue(any('tiles_tilelayerversion' in query['sql'] for query in queries))
+        response = self.smm.client1.get(self.tile_url('tracks'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            AssetPointTime.objects.create(asset=self.asset1, geo=Point(172.6, -43.5), created_by=self.smm.user1, mission=mission)
+        # The version isn't changed in the database for every position
+        self.assertFalse(any('tiles_tilelayerversion' in query['sql'] for query in queries))
+        self.assertEqual(self.smm.client1.get(self.tile_url('tracks'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Once the interval has passed, the position is in the next tile asked for
+        cache.delete(f'tiles:{mission.pk}:tracks:recent')
+        response = self.smm.client1.get(self.tile_url('tracks'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_0004_coverage(self):
+        """
+        Test the coverage tile is transparent when there is nothing to show
+        """
+        response = self.smm.client1.get(self.tile_url('coverage', ext='png'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        image = Image.open(io.BytesIO(response.content)).convert('RGBA')
+        self.assertEqual(image.getextrema()[3], (0, 0))
+
+    def test_0005_invalid(self):
+        """
+        Test tiles are only available to mission members, for real layers and tiles
+        """
+        self.create_poi('Test Point')
+        self.assertEqual(self.smm.client2.get(self.tile_url('labels')).status_code, 404)
+        self.assertEqual(self.smm.client2.get(self.tile_url('coverage', ext='png')).status_code, 404)
+        self.assertEqual(self.smm.client1.get(self.tile_url('unknown')).status_code, 404)
+        self.assertEqual(self.smm.client1.get(self.tile_url('labels', z=1, x=2, y=0)).status_code, 404)
+        self.assertEqual(self.smm.client1.get(self.tile_url('labels', z=1, x=0, y=2)).status_code, 404)
+        self.assertEqual(self.smm.client1.get(self.tile_url('labels', z=25, x=0, y=0)).status_code, 404)
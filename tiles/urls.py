@@ -0,0 +1,13 @@
+"""
+URLs for map tiles
+
+This is mapped in at the top level
+"""
+
+from django.urls import re_path
+from . import views
+
+urlpatterns = [
+    re_path(r'^mission/(?P<mission_id>\d+)/tiles/coverage/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.png$', views.mission_coverage_tile, name='mission_coverage_tile'),
+    re_path(r'^mission/(?P<mission_id>\d+)/tiles/(?P<layer>[a-z]+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt$', views.mission_vector_tile, name='mission_vector_tile'),
+]
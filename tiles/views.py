@@ -0,0 +1,72 @@
+"""
+Views for map tiles
+
+Tiles are z/x/y web map (slippy map) tiles. They can be cached by the
+browser, but must be checked each time (the ETag is the layer version).
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from mission.decorators import mission_is_member
+from search.coverage.overlay import coverage_tile_png, empty_tile_png
+from search.models import SearchCoverage
+from .cache import cached_tile, tile_version
+from .layers import LAYERS, MIN_FILTER_ZOOM
+from .mercator import tile_bounds, valid_tile
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+
+def tile_response(request, mission_id, layer, z, x, y, make_tile, content_type):
+    # pylint: disable=R0913,R0917
+    """
+    Respond with the tile (from the cache when possible)
+    or not modified when the browser has the current version
+    """
+    version = tile_version(mission_id, layer)
+    etag = f'"{layer}-{version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        tile = cached_tile(mission_id, layer, version, z, x, y, make_tile)
+        response = HttpResponse(tile, content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@mission_is_member
+def mission_vector_tile(request, mission_user, layer, z, x, y):
+    # pylint: disable=R0913,R0917
+    """
+    Get a vector tile (MVT) of a layer of the mission
+    Layers are labels, searches, images, drifts and tracks
+    """
+    z, x, y = int(z), int(x), int(y)
+    if layer not in LAYERS or not valid_tile(z, x, y):
+        return HttpResponseNotFound("Unknown tile")
+    mission_id = mission_user.mission.pk
+    return tile_response(request, mission_id, layer, z, x, y, lambda: LAYERS[layer].tile(mission_id, z, x, y), MVT_CONTENT_TYPE)
+
+
+@login_required
+@mission_is_member
+def mission_coverage_tile(request, mission_user, z, x, y):
+    """
+    Get a raster (PNG) tile of the POD of the completed searches in the mission
+    """
+    z, x, y = int(z), int(x), int(y)
+    if not valid_tile(z, x, y):
+        return HttpResponseNotFound("Unknown tile")
+    mission = mission_user.mission
+
+    def make_tile():
+        # Only the part of the coverage in the tile is read (unless the tile is most of the world)
+        grid, center = SearchCoverage.for_mission(mission, bounds=tile_bounds(z, x, y) if z >= MIN_FILTER_ZOOM else None)
+        tile = coverage_tile_png(grid, center, z, x, y) if grid is not None else None
+        return tile if tile is not None else empty_tile_png()
+
+    return tile_response(request, mission.pk, 'coverage', z, x, y, make_tile, 'image/png')
@@ -15,6 +15,16 @@ def timeline_record_create(mission, user, obj):
     entry.save()
 
 
+def timeline_record_create_many(mission, user, objs):
+    """
+    Create the timeline entries for many objects being created, in one query
+    """
+    TimeLineEntry.objects.bulk_create([
+        TimeLineEntry(mission=mission, user=user, event_type='add', message=f"{user} Created {type(obj).__name__} ({obj.pk}): {str(obj)}", url="")
+        for obj in objs
+    ])
+
+
 def timeline_record_delete(mission, user, obj):
     """
     Create a timeline entry for an object being deleted